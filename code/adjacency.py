@@ -0,0 +1,271 @@
+import weakref
+from array import array
+import numpy as np
+from compact_structures import CompactMaze
+from structures import CellTypes
+from validation import connectivities, corner_rules
+
+# (row, column) step of each move, in row-major order so the neighbors of a cell are listed the way cells are stored
+moves_of = {4: [(-1, 0), (0, -1), (0, 1), (1, 0)],
+            8: [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]}
+chunk_cells = 2 ** 20  # number of the cells whose moves are found at once, so the temporary arrays stay small
+
+
+def can_cut(corner_rule, first_open, second_open):
+    """
+        Its job is to apply a corner rule to a diagonal move
+    :param corner_rule: strict, cut or squeeze
+    :param first_open: whether the cell next to the move in the row of its start is open (a bool or an array of them)
+    :param second_open: whether the cell next to the move in the column of its start is open
+    :return: whether the diagonal move can be made
+    """
+    if corner_rule == "strict":  # no corner is cut
+        return first_open & second_open
+    if corner_rule == "cut":  # a corner is cut, but the move does not squeeze between two obstacles
+        return first_open | second_open
+    return True
+
+
+class Adjacency:
+    def __init__(self, maze):
+        """
+            Its job is to initialize the adjacency table of a maze in the CSR form over the cell ids: the ids of the
+            neighbors of every cell in one flat array and where the neighbors of each cell end in another one, the
+            obstacles excluded. Every cell gets room for as many neighbors as a cell can have (width), so the neighbors
+            of a cell start at id * width and the table is patched in place when a cell is changed.
+        :param maze: the maze (Maze or CompactMaze) of the table, with its connectivity and corner rule
+        """
+        if maze.connectivity not in connectivities:
+            raise Exception(f"Connectivity of a maze must be one of {connectivities}!")
+        if maze.corner_rule not in corner_rules:
+            raise Exception(f"Corner rule of a maze must be one of {corner_rules}!")
+        self.maze = weakref.proxy(maze)  # the table does not keep the maze alive
+        self.n_rows, self.n_columns = maze.n_rows, maze.n_columns
+        self.connectivity, self.corner_rule = maze.connectivity, maze.corner_rule
+        self.moves = moves_of[maze.connectivity]
+        self.width = len(self.moves)
+        self.neighbor_ids = array('i')  # ids of the neighbors of each cell, width of them kept for each cell
+        self.ends = array('i')  # index in neighbor_ids after the last neighbor of each cell id
+        self.neighbors = None  # memoryview of neighbor_ids, so a slice of it is not a copy
+        # the obstacle grid of a Maze is kept and patched with the table, as its cells have to be read one by one
+        self.open_cells = None
+        self.build()
+        maze.revision.watchers.add(self)
+
+    def open_grid(self):
+        """
+            Its job is to give a boolean grid of the maze which is True for the cells that are not obstacles. The grid
+            of a Maze is built once and kept up to date after its cells are changed, so it must not be changed.
+        :return: a 2D numpy array of shape (n_rows, n_columns)
+        """
+        if isinstance(self.maze, CompactMaze):
+            types = np.frombuffer(self.maze.types, dtype=np.uint8).reshape(self.n_rows, self.n_columns)
+            return types != CellTypes.Obstacle.value
+        if self.open_cells is None:
+            types = np.fromiter((cell.type for cell in self.maze.cells), dtype=np.uint8, count=len(self.maze.cells))
+            self.open_cells = (types != CellTypes.Obstacle.value).reshape(self.n_rows, self.n_columns)
+        return self.open_cells
+
+    def is_open(self, cell):
+        """
+            Its job is to check whether a cell is not an obstacle
+        :param cell: id of a cell
+        :return: True if the cell is not an obstacle and False otherwise
+        """
+        return self.maze.is_open(cell)
+
+    def build(self):
+        """
+            Its job is to build the whole table at once with array operations over the obstacle grid
+        :return: None
+        """
+        n_rows, n_columns, width = self.n_rows, self.n_columns, self.width
+        is_open = np.zeros((n_rows + 2, n_columns + 2), dtype=bool)  # the cells out of the maze are closed
+        is_open[1:-1, 1:-1] = self.open_grid()
+
+        def shifted(d_row, d_column):
+            return is_open[1 + d_row:1 + d_row + n_rows, 1 + d_column:1 + d_column + n_columns]
+
+        ids = np.arange(n_rows * n_columns, dtype=np.int64)
+        allowed = np.empty((n_rows * n_columns, width), dtype=bool)  # whether each move of each cell can be made
+        for move, (d_row, d_column) in enumerate(self.moves):
+            can_move = shifted(0, 0) & shifted(d_row, d_column)
+            if d_row and d_column:
+                can_move &= can_cut(self.corner_rule, shifted(0, d_column), shifted(d_row, 0))
+            allowed[:, move] = can_move.ravel()
+        # the allowed moves of each cell are packed at the start of its room in the order of the moves
+        slots = ids[:, None] * width + np.cumsum(allowed, axis=1) - 1
+        steps = np.array([d_row * n_columns + d_column for d_row, d_column in self.moves], dtype=np.int64)
+        neighbor_ids = np.zeros(n_rows * n_columns * width, dtype=np.int32)
+        neighbor_ids[slots[allowed]] = (ids[:, None] + steps[None, :])[allowed]
+        self.neighbor_ids = array('i', neighbor_ids.tobytes())
+        self.ends = array('i', (ids * width + allowed.sum(axis=1)).astype(np.int32).tobytes())
+        self.neighbors = memoryview(self.neighbor_ids)
+
+    def edges(self):
+        """
+            Its job is to list every move of the table once, from the lower id to the higher one
+        :return: two numpy arrays of the ids of the first and the second ends of the moves
+        """
+        n_cells = self.n_rows * self.n_columns
+        neighbor_ids = np.frombuffer(self.neighbor_ids, dtype=np.int32)
+        ends = np.frombuffer(self.ends, dtype=np.int32)
+        slots = np.arange(n_cells * self.width)
+        cells = slots // self.width
+        is_used = slots < ends[cells]  # the room of a cell after its neighbors is not used
+        first, second = cells[is_used], neighbor_ids[is_used].astype(np.int64)
+        is_forward = first < second  # every move is in the table both ways
+        return first[is_forward], second[is_forward]
+
+    def n_bytes(self):
+        """
+            Its job is to give the size of the table and the kept obstacle grid
+        :return: the size in bytes
+        """
+        return len(self.neighbor_ids) * self.neighbor_ids.itemsize + len(self.ends) * self.ends.itemsize + \
+            (self.open_cells.nbytes if self.open_cells is not None else 0)
+
+    def update_row(self, cell):
+        """
+            Its job is to find the neighbors of a cell again
+        :param cell: id of a cell
+        :return: None
+        """
+        row, column = divmod(cell, self.n_columns)
+        end = cell * self.width
+        if self.is_open(cell):
+            for d_row, d_column in self.moves:
+                neighbor_row, neighbor_column = row + d_row, column + d_column
+                if not (0 <= neighbor_row < self.n_rows and 0 <= neighbor_column < self.n_columns):
+                    continue
+                neighbor_cell = neighbor_row * self.n_columns + neighbor_column
+                if not self.is_open(neighbor_cell):
+                    continue
+                if d_row and d_column and not can_cut(self.corner_rule, self.is_open(cell + d_column),
+                                                      self.is_open(cell + d_row * self.n_columns)):
+                    continue
+                self.neighbor_ids[end] = neighbor_cell
+                end += 1
+        self.ends[cell] = end
+
+    def cell_changed(self, cell):
+        """
+            Its job is to patch the table after a cell of the maze is changed. The cells around it are found again,
+            as the cell can be one of their neighbors or a corner of their diagonal moves.
+        :param cell: the changed cell (a Cell of a Maze or id of a cell of a CompactMaze)
+        :return: None
+        """
+        cell = cell if isinstance(self.maze, CompactMaze) else cell.id
+        row, column = divmod(cell, self.n_columns)
+        if self.open_cells is not None:
+            self.open_cells[row, column] = self.is_open(cell)
+        for neighbor_row in range(max(0, row - 1), min(self.n_rows, row + 2)):
+            for neighbor_column in range(max(0, column - 1), min(self.n_columns, column + 2)):
+                self.update_row(neighbor_row * self.n_columns + neighbor_column)
+
+    def neighbors_of(self, cell):
+        """
+            Its job is to give the neighbors of a cell without copying them
+        :param cell: id of a cell
+        :return: a memoryview of the ids of the neighbors of the cell in row-major order, empty for an obstacle
+        """
+        return self.neighbors[cell * self.width:self.ends[cell]]
+
+
+class MoveMasks(Adjacency):
+    def __init__(self, maze):
+        """
+            Its job is to initialize the adjacency of a compact maze as one byte for each cell, bit i of which is set if
+            the move moves[i] can be made from the cell. The neighbors of a cell are the steps of its set bits added to
+            its id, so the maze keeps 1 byte per cell for its moves instead of the ids of the neighbors.
+        :param maze: the compact maze of the masks, with its connectivity and corner rule
+        """
+        self.masks = bytearray()  # allowed moves of each cell id, bit i for moves[i]
+        # id steps of the allowed moves of each value of a mask, in row-major order
+        self.steps_of = []
+        super().__init__(maze)
+
+    def build(self):
+        """
+            Its job is to find the masks of all the cells with array operations, a chunk of rows at a time
+        :return: None
+        """
+        n_rows, n_columns = self.n_rows, self.n_columns
+        steps = [d_row * n_columns + d_column for d_row, d_column in self.moves]
+        self.steps_of = [tuple(step for move, step in enumerate(steps) if mask >> move & 1)
+                         for mask in range(2 ** self.width)]
+        self.masks = bytearray(n_rows * n_columns)
+        types = np.frombuffer(self.maze.types, dtype=np.uint8).reshape(n_rows, n_columns)
+        masks = np.frombuffer(self.masks, dtype=np.uint8).reshape(n_rows, n_columns)
+        chunk_rows = max(1, chunk_cells // max(1, n_columns))
+        for start_row in range(0, n_rows, chunk_rows):
+            end_row = min(n_rows, start_row + chunk_rows)
+            # the rows of the chunk with one more row on each side, the cells out of the maze are closed
+            is_open = np.zeros((end_row - start_row + 2, n_columns + 2), dtype=bool)
+            top_row, bottom_row = max(0, start_row - 1), min(n_rows, end_row + 1)
+            is_open[top_row - start_row + 1:bottom_row - start_row + 1, 1:-1] = \
+                types[top_row:bottom_row] != CellTypes.Obstacle.value
+
+            def shifted(d_row, d_column):
+                return is_open[1 + d_row:1 + d_row + end_row - start_row, 1 + d_column:1 + d_column + n_columns]
+
+            chunk_masks = np.zeros((end_row - start_row, n_columns), dtype=np.uint8)
+            for move, (d_row, d_column) in enumerate(self.moves):
+                can_move = shifted(0, 0) & shifted(d_row, d_column)
+                if d_row and d_column:
+                    can_move &= can_cut(self.corner_rule, shifted(0, d_column), shifted(d_row, 0))
+                chunk_masks |= can_move.astype(np.uint8) << move
+            masks[start_row:end_row] = chunk_masks
+        del types, masks  # the bytearrays cannot be resized while a NumPy view of them is alive
+
+    def edges(self):
+        """
+            Its job is to list every move of the masks once, from the lower id to the higher one
+        :return: two numpy arrays of the ids of the first and the second ends of the moves
+        """
+        masks = np.frombuffer(self.masks, dtype=np.uint8)
+        firsts, seconds = [], []
+        for move, (d_row, d_column) in enumerate(self.moves):
+            step = d_row * self.n_columns + d_column
+            if step > 0:  # every move is in the masks both ways
+                cells = np.flatnonzero(masks & (1 << move))
+                firsts.append(cells)
+                seconds.append(cells + step)
+        del masks
+        return np.concatenate(firsts), np.concatenate(seconds)
+
+    def n_bytes(self):
+        """
+            Its job is to give the size of the masks
+        :return: the size in bytes
+        """
+        return len(self.masks)
+
+    def update_row(self, cell):
+        """
+            Its job is to find the mask of a cell again
+        :param cell: id of a cell
+        :return: None
+        """
+        row, column = divmod(cell, self.n_columns)
+        mask = 0
+        if self.is_open(cell):
+            for move, (d_row, d_column) in enumerate(self.moves):
+                neighbor_row, neighbor_column = row + d_row, column + d_column
+                if not (0 <= neighbor_row < self.n_rows and 0 <= neighbor_column < self.n_columns):
+                    continue
+                if not self.is_open(neighbor_row * self.n_columns + neighbor_column):
+                    continue
+                if d_row and d_column and not can_cut(self.corner_rule, self.is_open(cell + d_column),
+                                                      self.is_open(cell + d_row * self.n_columns)):
+                    continue
+                mask |= 1 << move
+        self.masks[cell] = mask
+
+    def neighbors_of(self, cell):
+        """
+            Its job is to give the neighbors of a cell from its mask
+        :param cell: id of a cell
+        :return: a list of the ids of the neighbors of the cell in row-major order, empty for an obstacle
+        """
+        return [cell + step for step in self.steps_of[self.masks[cell]]]
@@ -1,7 +1,17 @@
 import heuristics
 import heapq
 import time
+import numpy as np
+import jump_points
+import weakref
+from collections import deque
 from enum import Enum
+from heuristic_tables import heuristic_table
+from hierarchical import AbstractGraph
+from incremental import DStarLite
+from compact_structures import CompactMaze
+from structures import CellTypes
+from validation import max_cost
 
 
 class AlgorithmTypes(Enum):
@@ -12,64 +22,80 @@ class AlgorithmTypes(Enum):
     BFS = 1
     GreedyBFS = 2
     A_star = 3
-
-
-iteration = 0  # used for calculating depth of DFS
-max_iteration = 0  # used for store maximum depth of DFS
+    WavefrontBFS = 4
+    OptimizedA_star = 5
+    JPS = 6
+    BidirectionalBFS = 7
+    BidirectionalA_star = 8
+    DStarLite = 9
+    Dijkstra = 10
+    HierarchicalA_star = 11
+
+# the incremental planner of each maze and heuristic, kept between the runs
+planners = weakref.WeakKeyDictionary()
+# the abstract graph of each maze for hierarchical A*, kept between the runs
+graphs = weakref.WeakKeyDictionary()
+
+
+def ends_of(maze, cell, ui):
+    """
+        Its job is to check a maze is ready to be solved and to find the ids of the ends of the search, so one
+        implementation of an algorithm solves both a Maze and a CompactMaze through their search data by cell id
+    :param maze: The given maze (Maze or CompactMaze)
+    :param cell: The starting cell (a Cell of a Maze or id of a cell of a CompactMaze), None for the source
+    :param ui: the given user interface
+    :return: (id of the starting cell, id of the target)
+    """
+    if maze.source is None:
+        raise Exception("Maze is not complete to start! Source is not determined.")
+    if isinstance(maze, CompactMaze):
+        if ui is not None:
+            raise Exception("A compact maze cannot be drawn! Run it without user interface.")
+        return (maze.source if cell is None else cell), maze.target
+    return (maze.source if cell is None else cell).id, maze.target.id
 
 
 def dfs(maze, cell=None, *args):
     """
-        Its job is doing DFS algorithm
+        Its job is doing DFS algorithm with an explicit stack, so there is no limit on the depth of the search
     :param maze: The given maze
-    :param cell: The current cell
+    :param cell: The starting cell
     :param args: other arguments like ui object or others functions heuristic function
     :return: The result of performing DFS
     """
-    global iteration, max_iteration
-
-    ui = None
-    if len(args) > 1:
-        ui = args[1]
-    source = False
-    elapsed_time = 0
-    if cell is None:  # if cell is None, it means its the first time function is calling so we need initializing
-        source = True
-        iteration = 0
-        start_time = time.process_time()
-        cell = maze.source
-        cell.passed_distance = 0
-        cell.total_distance = cell.passed_distance
-        if maze.source is None:
-            raise Exception("Maze is not complete to start! Source is not determined.")
-    iteration += 1
-    if cell == maze.target:  # if we found target its done
-        max_iteration = max(iteration, max_iteration)
-        return {"total_distance": maze.target.total_distance, "time": elapsed_time,
-                "checked_cells_no": maze.n_checked_cells, "memory": max_iteration}
-    if iteration > 2500:  # the threshold for dfs to perform recursion before os stops the process
-        max_iteration = max(iteration, max_iteration)
-        return {"total_distance": maze.target.total_distance, "time": elapsed_time,
-                "checked_cells_no": maze.n_checked_cells, "memory": max_iteration}
-    for neighbor_cell in maze.get_neighbors(cell):
-        if neighbor_cell.passed_distance == float("inf"):  # Not visited
-            neighbor_cell.previous_cell = cell
-            neighbor_cell.passed_distance = cell.passed_distance + neighbor_cell.cost
-            neighbor_cell.total_distance = neighbor_cell.passed_distance
-            maze.n_checked_cells += 1
-            if ui is not None:
-                ui.draw_checking_cell(neighbor_cell)
-                ui.draw_visited_cell(cell)
-            res = dfs(maze, neighbor_cell, *args)
-            iteration -= 1
-            if res.get("total_distance") != float("inf"):  # we found the target and its time to come back.
+    ui = args[1] if len(args) > 1 else None
+    start_time = time.process_time()
+    cell, target = ends_of(maze, cell, ui)
+    neighbors_of = maze.get_adjacency().neighbors_of
+    is_visited, passed_distance_of, set_search_data, cost_of = \
+        maze.is_visited, maze.passed_distance_of, maze.set_search_data, maze.cost_of
+
+    set_search_data(cell, 0, 0, -1)
+    # each entry is a cell and the iterator of its remaining neighbors, like a frame of the recursive DFS
+    stack = [(cell, iter(neighbors_of(cell)))]
+    memory = len(stack)  # maximum depth of the search
+    while stack:
+        cell, neighbors = stack[-1]
+        if cell == target:  # if we found target its done
+            break
+        for neighbor_cell in neighbors:
+            if not is_visited(neighbor_cell):
+                passed_distance = passed_distance_of(cell) + cost_of(neighbor_cell)
+                set_search_data(neighbor_cell, passed_distance, passed_distance, cell)
+                maze.n_checked_cells += 1
+                if ui is not None:
+                    ui.draw_checking_cell(maze.cells[neighbor_cell])
+                    ui.draw_visited_cell(maze.cells[cell])
+                stack.append((neighbor_cell, iter(neighbors_of(neighbor_cell))))
+                memory = max(memory, len(stack))
                 break
-    if source:
-        end_time = time.process_time()
-        elapsed_time = end_time - start_time  # calculating the time
-    max_iteration = max(iteration, max_iteration)
-    return {"total_distance": maze.target.total_distance, "time": elapsed_time,
-            "checked_cells_no": maze.n_checked_cells, "memory": max_iteration}
+        else:  # all neighbors are checked so we come back
+            stack.pop()
+
+    end_time = time.process_time()
+    elapsed_time = end_time - start_time
+    return {"total_distance": maze.total_distance_of(target), "time": elapsed_time,
+            "checked_cells_no": maze.n_checked_cells, "memory": memory}
 
 
 def bfs(maze, cell=None, *args):
@@ -78,44 +104,40 @@ def bfs(maze, cell=None, *args):
     :param maze: The given maze
     :param cell: The current cell
     :param args: other arguments like ui object or others functions heuristic function
-    :return: The result of performing DFS
+    :return: The result of performing BFS
     """
-    ui = None
-    if len(args) > 1:
-        ui = args[1]
+    ui = args[1] if len(args) > 1 else None
     start_time = time.process_time()
-    if cell is None:
-        cell = maze.source
-        if maze.source is None:
-            raise Exception("Maze is not complete to start! Source is not determined.")
+    cell, target = ends_of(maze, cell, ui)
+    neighbors_of = maze.get_adjacency().neighbors_of
+    is_visited, passed_distance_of, set_search_data, cost_of = \
+        maze.is_visited, maze.passed_distance_of, maze.set_search_data, maze.cost_of
 
-    cell.passed_distance = 0
-    cell.total_distance = cell.passed_distance
-    queue = [cell]
+    set_search_data(cell, 0, 0, -1)
+    queue = deque([cell])
     memory = len(queue)
     while queue:
-        cell = queue.pop(0)
-        if cell == maze.target:
+        cell = queue.popleft()
+        if cell == target:
             break
-        for neighbor_cell in maze.get_neighbors(cell):
-            if neighbor_cell.passed_distance == float("inf"):
-                neighbor_cell.previous_cell = cell
-                neighbor_cell.passed_distance = cell.passed_distance + neighbor_cell.cost
-                neighbor_cell.total_distance = neighbor_cell.passed_distance
+        cell_distance = passed_distance_of(cell)
+        for neighbor_cell in neighbors_of(cell):
+            if not is_visited(neighbor_cell):
+                passed_distance = cell_distance + cost_of(neighbor_cell)
+                set_search_data(neighbor_cell, passed_distance, passed_distance, cell)
                 queue.append(neighbor_cell)
                 maze.n_checked_cells += 1
 
                 if ui is not None:
-                    ui.draw_checking_cell(neighbor_cell)
+                    ui.draw_checking_cell(maze.cells[neighbor_cell])
         if ui is not None:
-            ui.draw_visited_cell(cell)
+            ui.draw_visited_cell(maze.cells[cell])
 
         memory = max(memory, len(queue))
 
     end_time = time.process_time()
     elapsed_time = end_time - start_time
-
-    return {"total_distance": maze.target.total_distance, "time": elapsed_time,
+    return {"total_distance": maze.total_distance_of(target), "time": elapsed_time,
             "checked_cells_no": maze.n_checked_cells, "memory": memory}
 
 
@@ -128,103 +150,653 @@ def a_star(maze, cell=None, h=heuristics.manhattan_distance, *args):
     :param args: other arguments like ui object
     :return: The result of performing A*
     """
-    ui = args[0]
+    ui = args[0] if args else None
     start_time = time.process_time()
-    if cell is None:
-        cell = maze.source
-        if maze.source is None:
-            raise Exception("Maze is not complete to start! Source is not determined.")
+    cell, target = ends_of(maze, cell, ui)
+    neighbors_of = maze.get_adjacency().neighbors_of
+    is_visited, passed_distance_of, total_distance_of, set_search_data, cost_of = \
+        maze.is_visited, maze.passed_distance_of, maze.total_distance_of, maze.set_search_data, maze.cost_of
+    h_table = heuristic_table(maze, h)  # heuristic value of each cell id
+
+    set_search_data(cell, 0, h_table[cell], -1, h_table[cell])
+    # cell ids are row-major, so ties on f are broken in favor of the upper row, then the left column
+    frontier = [(h_table[cell], cell)]
+    memory = len(frontier)
+
+    while frontier:
+        cell = heapq.heappop(frontier)[1]
+        if cell == target:
+            break
+        cell_distance = passed_distance_of(cell)
+        for neighbor_cell in neighbors_of(cell):
+            passed_distance = cell_distance + cost_of(neighbor_cell)
+            total_distance = passed_distance + h_table[neighbor_cell]
+            if not is_visited(neighbor_cell) or total_distance_of(neighbor_cell) > total_distance:
+                set_search_data(neighbor_cell, passed_distance, total_distance, cell, h_table[neighbor_cell])
+                heapq.heappush(frontier, (total_distance, neighbor_cell))
+                maze.n_checked_cells += 1
+
+                if ui is not None:
+                    ui.draw_checking_cell(maze.cells[neighbor_cell])
+        if ui is not None:
+            ui.draw_visited_cell(maze.cells[cell])
 
-    def g(prev_cell, nxt_cell):
-        return prev_cell.passed_distance + nxt_cell.cost
+        memory = max(memory, len(frontier))
 
-    def add(pq, val):
-        heapq.heappush(pq, val)
+    end_time = time.process_time()
+    elapsed_time = end_time - start_time
+    return {"total_distance": total_distance_of(target), "time": elapsed_time,
+            "checked_cells_no": maze.n_checked_cells, "memory": memory}
 
-    def pop(pq):
-        return heapq.heappop(pq)[1]
 
-    cell.passed_distance = 0
-    cell.ongoing_distance = h(cell, maze.target)
-    cell.total_distance = cell.passed_distance + cell.ongoing_distance
-    frontier = [(cell.total_distance, cell)]
-    heapq.heapify(frontier)
+def greedy_best_first_search(maze, cell=None, h=heuristics.manhattan_distance, *args):
+    """
+        Its job is doing Greedy Best-First Search algorithm
+    :param maze: The given maze
+    :param cell: The current cell
+    :param h: given heuristic function
+    :param args: other arguments like ui object
+    :return: The result of performing Greedy Best-First Search
+    """
+    ui = args[0] if args else None
+    start_time = time.process_time()
+    cell, target = ends_of(maze, cell, ui)
+    neighbors_of = maze.get_adjacency().neighbors_of
+    is_visited, passed_distance_of, set_search_data, cost_of = \
+        maze.is_visited, maze.passed_distance_of, maze.set_search_data, maze.cost_of
+    h_table = heuristic_table(maze, h)  # heuristic value of each cell id
+
+    set_search_data(cell, 0, h_table[cell], -1, h_table[cell])
+    frontier = [(h_table[cell], cell)]
     memory = len(frontier)
 
-    while len(frontier):
-        cell = pop(frontier)
-        if cell == maze.target:
+    while frontier:
+        cell = heapq.heappop(frontier)[1]
+        if cell == target:
             break
-        for neighbor_cell in maze.get_neighbors(cell):
-            if neighbor_cell.total_distance == float(
-                    "inf") or neighbor_cell.total_distance > g(cell, neighbor_cell) + h(neighbor_cell, maze.target):
-                neighbor_cell.ongoing_distance = h(neighbor_cell, maze.target)
-                neighbor_cell.passed_distance = g(cell, neighbor_cell)
-                neighbor_cell.total_distance = neighbor_cell.passed_distance + neighbor_cell.ongoing_distance
-                add(frontier, (neighbor_cell.total_distance, neighbor_cell))
-                neighbor_cell.previous_cell = cell
+        cell_distance = passed_distance_of(cell)
+        for neighbor_cell in neighbors_of(cell):
+            if not is_visited(neighbor_cell):
+                set_search_data(neighbor_cell, cell_distance + cost_of(neighbor_cell),
+                                h_table[neighbor_cell], cell, h_table[neighbor_cell])
+                heapq.heappush(frontier, (h_table[neighbor_cell], neighbor_cell))
                 maze.n_checked_cells += 1
 
                 if ui is not None:
-                    ui.draw_checking_cell(neighbor_cell)
+                    ui.draw_checking_cell(maze.cells[neighbor_cell])
         if ui is not None:
-            ui.draw_visited_cell(cell)
+            ui.draw_visited_cell(maze.cells[cell])
 
         memory = max(memory, len(frontier))
+    end_time = time.process_time()
+    elapsed_time = end_time - start_time
+    return {"total_distance": passed_distance_of(target), "time": elapsed_time,
+            "checked_cells_no": maze.n_checked_cells, "memory": memory}
+
+
+def wavefront_bfs(maze, cell=None, *args):
+    """
+        Its job is doing BFS algorithm level by level, expanding the whole frontier at once with array operations
+        over the obstacle grid and then rebuilding the path from the distance field. All cells cost 1 and there are 4
+        moves from a cell, so a maze with weighted cells or diagonal moves is solved by dijkstra instead. The frontiers
+        are drawn after the search, so the measured time is only the search.
+    :param maze: The given maze (Maze or CompactMaze)
+    :param cell: The starting cell
+    :param args: other arguments like ui object or others functions heuristic function
+    :return: The result of performing wavefront BFS
+    """
+    if maze.n_weighted_cells or maze.connectivity != 4:
+        return dijkstra(maze, cell, *args)
+    ui = args[1] if len(args) > 1 else None
+    start_time = time.process_time()
+    source, target = ends_of(maze, cell, ui)
+    n_columns = maze.n_columns
+    target_row, target_column = divmod(target, n_columns)
+
+    if isinstance(maze, CompactMaze):  # the types of a compact maze are read in place, without building its adjacency
+        is_open = np.frombuffer(maze.types, dtype=np.uint8) != CellTypes.Obstacle.value
+    else:  # the obstacle grid of a Maze is kept by its adjacency
+        is_open = maze.get_adjacency().open_grid().ravel()
+    distance = np.full(maze.n_rows * n_columns, -1, dtype=np.int64)  # -1 means not reached
+    # the frontier is kept as the flat ids of its cells, so each level costs as much as the frontier not the grid
+    frontier = np.array([source], dtype=np.int64)
+    level = 0
+    memory = 1
+    levels = []  # the frontier of each level, drawn after the search so the measured time is only the search
+    while frontier.size:
+        distance[frontier] = level
+        if distance[target] != -1:
+            break
+        # shifting the frontier one step in each direction (up, left, right, down) without leaving the grid
+        columns = frontier % n_columns
+        candidates = np.concatenate((frontier[frontier >= n_columns] - n_columns,
+                                     frontier[columns > 0] - 1,
+                                     frontier[columns < n_columns - 1] + 1,
+                                     frontier[frontier < distance.size - n_columns] + n_columns))
+        # every open cell next to the frontier which is not reached yet is the next frontier
+        frontier = np.unique(candidates[is_open[candidates] & (distance[candidates] == -1)])
+        level += 1
+        memory = max(memory, int(frontier.size))
+        if ui is not None:
+            levels.append(frontier)
+    distance = distance.reshape(maze.n_rows, n_columns)
+    maze.n_checked_cells = int(np.count_nonzero(distance != -1)) - 1
+
+    total_distance = float("inf")
+    if distance[target_row, target_column] != -1:
+        total_distance = int(distance[target_row, target_column])
+        # walking back from the target to a neighbor one step closer to the source each time
+        path = [(target_row, target_column)]
+        r, c = target_row, target_column
+        while distance[r, c] > 0:
+            for nr, nc in ((r - 1, c), (r, c - 1), (r, c + 1), (r + 1, c)):
+                if 0 <= nr < maze.n_rows and 0 <= nc < maze.n_columns and distance[nr, nc] == distance[r, c] - 1:
+                    r, c = nr, nc
+                    break
+            path.append((r, c))
+        previous_cell = -1
+        for r, c in reversed(path):
+            d = int(distance[r, c])
+            maze.set_search_data(r * n_columns + c, d, d, previous_cell)
+            previous_cell = r * n_columns + c
 
     end_time = time.process_time()
     elapsed_time = end_time - start_time
-    return {"total_distance": maze.target.total_distance, "time": elapsed_time,
+    for frontier in levels:
+        for frontier_cell in frontier.tolist():
+            ui.draw_checking_cell(maze.cells[frontier_cell])
+    return {"total_distance": total_distance, "time": elapsed_time,
             "checked_cells_no": maze.n_checked_cells, "memory": memory}
 
 
-def greedy_best_first_search(maze, cell=None, h=heuristics.manhattan_distance, *args):
+def optimized_a_star(maze, cell=None, h=heuristics.manhattan_distance, *args):
     """
-        Its job is doing Greedy Best-First Search algorithm
+        Its job is doing A* algorithm with a closed set, lazy deletion of stale heap entries, plain number heap keys
+        and the heuristic values read from a precomputed table
     :param maze: The given maze
     :param cell: The current cell
     :param h: given heuristic function
     :param args: other arguments like ui object
-    :return: The result of performing Greedy Best-First Search
+    :return: The result of performing A*, also having the number of re-opened cells
     """
-    ui = args[0]
+    ui = args[0] if args else None
     start_time = time.process_time()
-    if cell is None:
-        cell = maze.source
-        if maze.source is None:
-            raise Exception("Maze is not complete to start! Source is not determined.")
+    cell, target = ends_of(maze, cell, ui)
+    neighbors_of = maze.get_adjacency().neighbors_of
+    is_visited, is_closed, close = maze.is_visited, maze.is_closed, maze.close
+    passed_distance_of, total_distance_of, set_search_data, cost_of = \
+        maze.passed_distance_of, maze.total_distance_of, maze.set_search_data, maze.cost_of
+    n_cells = maze.n_rows * maze.n_columns
+    h_table = heuristic_table(maze, h)  # heuristic value of each cell id
+
+    set_search_data(cell, 0, h_table[cell], -1, h_table[cell])
+    # heap of (f, key), ties on f are broken in favor of the higher g, then the lower cell id: id - g * n_cells
+    frontier = [(h_table[cell], cell)]
+    memory = len(frontier)
+    n_reopened_cells = 0
+
+    while frontier:
+        total_distance, cell_key = heapq.heappop(frontier)
+        cell = cell_key % n_cells
+        if is_closed(cell) or total_distance != total_distance_of(cell):  # stale entry of a cell which is improved
+            continue
+        if cell == target:
+            break
+        close(cell)  # the closed cells are kept in the search data, so there is no closed set to allocate
+        cell_distance = passed_distance_of(cell)
+        for neighbor_cell in neighbors_of(cell):
+            passed_distance = cell_distance + cost_of(neighbor_cell)
+            if not is_visited(neighbor_cell) or passed_distance < passed_distance_of(neighbor_cell):
+                if is_closed(neighbor_cell):
+                    n_reopened_cells += 1
+                total_distance = passed_distance + h_table[neighbor_cell]
+                set_search_data(neighbor_cell, passed_distance, total_distance, cell, h_table[neighbor_cell])
+                heapq.heappush(frontier, (total_distance, neighbor_cell - int(passed_distance) * n_cells))
+                maze.n_checked_cells += 1
 
-    def add(pq, val):
-        heapq.heappush(pq, val)
+                if ui is not None:
+                    ui.draw_checking_cell(maze.cells[neighbor_cell])
+        if ui is not None:
+            ui.draw_visited_cell(maze.cells[cell])
+
+        memory = max(memory, len(frontier))
+
+    end_time = time.process_time()
+    elapsed_time = end_time - start_time
+    return {"total_distance": total_distance_of(target), "time": elapsed_time,
+            "checked_cells_no": maze.n_checked_cells, "memory": memory, "reopened_cells_no": n_reopened_cells}
+
+
+def jump_point_search(maze, cell=None, h=heuristics.manhattan_distance, *args):
+    """
+        Its job is doing Jump Point Search algorithm for 4-connected movement, which is A* over the jump points of the
+        maze instead of all of its cells. All cells cost 1 and there are 4 moves from a cell, so a maze with weighted
+        cells or diagonal moves is solved by optimized_a_star instead.
+    :param maze: The given maze
+    :param cell: The current cell
+    :param h: given heuristic function
+    :param args: other arguments like ui object
+    :return: The result of performing Jump Point Search
+    """
+    if maze.n_weighted_cells or maze.connectivity != 4:
+        return optimized_a_star(maze, cell, h, *args)
+    ui = args[0] if args else None
+    start_time = time.process_time()
+    cell, target = ends_of(maze, cell, ui)
+    is_visited, is_closed, close, is_open_cell = maze.is_visited, maze.is_closed, maze.close, maze.is_open
+    passed_distance_of, total_distance_of, previous_cell_of, set_search_data = \
+        maze.passed_distance_of, maze.total_distance_of, maze.previous_cell_of, maze.set_search_data
+    n_rows, n_columns = maze.n_rows, maze.n_columns
+    n_cells = n_rows * n_columns
+    target_coords = divmod(target, n_columns)
+
+    def is_open(row, column):
+        return 0 <= row < n_rows and 0 <= column < n_columns and is_open_cell(row * n_columns + column)
 
-    def pop(pq):
-        return heapq.heappop(pq)[1]
+    h_table = heuristic_table(maze, h)  # heuristic value of each cell id
 
-    cell.passed_distance = 0
-    cell.total_distance = cell.ongoing_distance = h(cell, maze.target)
-    frontier = [(cell.total_distance, cell)]
-    heapq.heapify(frontier)
+    set_search_data(cell, 0, h_table[cell], -1, h_table[cell])
+    frontier = [(h_table[cell], cell)]  # the keys of the heap are the ones of optimized_a_star
     memory = len(frontier)
 
-    while len(frontier):
-        cell = pop(frontier)
-        if cell == maze.target:
+    while frontier:
+        total_distance, cell_key = heapq.heappop(frontier)
+        cell = cell_key % n_cells
+        if is_closed(cell) or total_distance != total_distance_of(cell):  # stale entry of a cell which is improved
+            continue
+        if cell == target:
             break
-        for neighbor_cell in maze.get_neighbors(cell):
-            if neighbor_cell.total_distance == float("inf"):
-                neighbor_cell.passed_distance = cell.passed_distance + neighbor_cell.cost
-                neighbor_cell.total_distance = neighbor_cell.ongoing_distance = h(neighbor_cell, maze.target)
-                add(frontier, (neighbor_cell.total_distance, neighbor_cell))
-                neighbor_cell.previous_cell = cell
+        close(cell)
+        row, column = divmod(cell, n_columns)
+        parent = previous_cell_of(cell)
+        d_row, d_column = (0, 0) if parent == -1 else jump_points.direction(*divmod(parent, n_columns), row, column)
+        cell_distance = passed_distance_of(cell)
+        for d_row, d_column in jump_points.directions_of(d_row, d_column):
+            point = jump_points.jump(is_open, row, column, d_row, d_column, target_coords)
+            if point is None:
+                continue
+            jump_cell = point[0] * n_columns + point[1]
+            passed_distance = cell_distance + abs(point[0] - row) + abs(point[1] - column)
+            if not is_visited(jump_cell) or passed_distance < passed_distance_of(jump_cell):
+                total_distance = passed_distance + h_table[jump_cell]
+                set_search_data(jump_cell, passed_distance, total_distance, cell, h_table[jump_cell])
+                heapq.heappush(frontier, (total_distance, jump_cell - int(passed_distance) * n_cells))
                 maze.n_checked_cells += 1
 
                 if ui is not None:
-                    ui.draw_checking_cell(neighbor_cell)
+                    ui.draw_checking_cell(maze.cells[jump_cell])
         if ui is not None:
-            ui.draw_visited_cell(cell)
+            ui.draw_visited_cell(maze.cells[cell])
 
         memory = max(memory, len(frontier))
+
+    if is_visited(target):
+        fill_jump_path(maze, target, h_table)
+    end_time = time.process_time()
+    elapsed_time = end_time - start_time
+    return {"total_distance": total_distance_of(target), "time": elapsed_time,
+            "checked_cells_no": maze.n_checked_cells, "memory": memory}
+
+
+def fill_jump_path(maze, target, h_table):
+    """
+        Its job is to link the cells between the jump points of the found path, so the path can be tracked back from
+        the target cell by cell
+    :param maze: The solved maze
+    :param target: id of the target
+    :param h_table: heuristic values of the cell ids against the target
+    :return: None
+    """
+    n_columns = maze.n_columns
+    jump_path = [target]
+    while maze.previous_cell_of(jump_path[-1]) != -1:
+        jump_path.append(maze.previous_cell_of(jump_path[-1]))
+    jump_path.reverse()
+    for jump_cell, next_jump_cell in zip(jump_path, jump_path[1:]):
+        d_row, d_column = jump_points.direction(*divmod(jump_cell, n_columns), *divmod(next_jump_cell, n_columns))
+        step = d_row * n_columns + d_column
+        previous_cell = jump_cell
+        while previous_cell != next_jump_cell:
+            cell = previous_cell + step
+            passed_distance = maze.passed_distance_of(previous_cell) + 1
+            maze.set_search_data(cell, passed_distance, passed_distance + h_table[cell], previous_cell, h_table[cell])
+            previous_cell = cell
+
+
+def bidirectional_bfs(maze, cell=None, *args):
+    """
+        Its job is doing BFS algorithm from the source and the target at the same time, a whole level of the smaller
+        frontier at a time, until the two searches meet
+    :param maze: The given maze
+    :param cell: The starting cell
+    :param args: other arguments like ui object or others functions heuristic function
+    :return: The result of performing bidirectional BFS
+    """
+    ui = args[1] if len(args) > 1 else None
+    start_time = time.process_time()
+    cell, target = ends_of(maze, cell, ui)
+    neighbors_of = maze.get_adjacency().neighbors_of
+    is_visited, passed_distance_of, set_search_data, cost_of = \
+        maze.is_visited, maze.passed_distance_of, maze.set_search_data, maze.cost_of
+    # the backward search keeps its distances to the target and the next cells towards it in the search data kept for
+    # it, the previous cell of a cell reached backward is the next one towards the target
+    backward = maze.get_backward_search()
+    backward.new_generation()
+    is_reached_backward, backward_distance_of, set_backward_data = \
+        backward.is_visited, backward.passed_distance_of, backward.set_search_data
+
+    set_search_data(cell, 0, 0, -1)
+    set_backward_data(target, 0, 0, -1)
+    forward_level, backward_level = [cell], [target]
+    memory = len(forward_level) + len(backward_level)
+    best_distance, meeting = float("inf"), None  # the shortest found path passes the (forward, backward) edge
+
+    while forward_level and backward_level and meeting is None and cell != target:
+        next_level = []
+        if len(forward_level) <= len(backward_level):
+            for current_cell in forward_level:
+                current_distance = passed_distance_of(current_cell)
+                for neighbor_cell in neighbors_of(current_cell):
+                    if is_reached_backward(neighbor_cell):
+                        distance = current_distance + cost_of(neighbor_cell) + backward_distance_of(neighbor_cell)
+                        if distance < best_distance:
+                            best_distance, meeting = distance, (current_cell, neighbor_cell)
+                    if not is_visited(neighbor_cell):
+                        passed_distance = current_distance + cost_of(neighbor_cell)
+                        set_search_data(neighbor_cell, passed_distance, passed_distance, current_cell)
+                        next_level.append(neighbor_cell)
+                        maze.n_checked_cells += 1
+
+                        if ui is not None:
+                            ui.draw_checking_cell(maze.cells[neighbor_cell])
+                if ui is not None:
+                    ui.draw_visited_cell(maze.cells[current_cell])
+            forward_level = next_level
+        else:
+            for current_cell in backward_level:
+                current_distance = backward_distance_of(current_cell) + cost_of(current_cell)  # from a neighbor
+                for neighbor_cell in neighbors_of(current_cell):
+                    if is_visited(neighbor_cell):
+                        distance = passed_distance_of(neighbor_cell) + current_distance
+                        if distance < best_distance:
+                            best_distance, meeting = distance, (neighbor_cell, current_cell)
+                    if not is_reached_backward(neighbor_cell):
+                        set_backward_data(neighbor_cell, current_distance, current_distance, current_cell)
+                        next_level.append(neighbor_cell)
+                        maze.n_checked_cells += 1
+
+                        if ui is not None:
+                            ui.draw_checking_cell(maze.cells[neighbor_cell])
+                if ui is not None:
+                    ui.draw_visited_cell(maze.cells[current_cell])
+            backward_level = next_level
+
+        memory = max(memory, len(forward_level) + len(backward_level))
+
+    if meeting is not None:
+        join_searches(maze, meeting, backward)
+    end_time = time.process_time()
+    elapsed_time = end_time - start_time
+    return {"total_distance": maze.total_distance_of(target), "time": elapsed_time,
+            "checked_cells_no": maze.n_checked_cells, "memory": memory}
+
+
+def bidirectional_a_star(maze, cell=None, h=heuristics.manhattan_distance, *args):
+    """
+        Its job is doing A* algorithm from the source towards the target and from the target towards the source at the
+        same time, expanding the side with the smaller frontier. It stops when the shortest found path is no longer than
+        the smallest f of one of the frontiers, so the path is the shortest one for an admissible heuristic.
+    :param maze: The given maze
+    :param cell: The current cell
+    :param h: given heuristic function
+    :param args: other arguments like ui object
+    :return: The result of performing bidirectional A*
+    """
+    ui = args[0] if args else None
+    start_time = time.process_time()
+    source, target = ends_of(maze, cell, ui)
+    neighbors_of = maze.get_adjacency().neighbors_of
+    is_visited, is_closed, close = maze.is_visited, maze.is_closed, maze.close
+    passed_distance_of, total_distance_of, set_search_data, cost_of = \
+        maze.passed_distance_of, maze.total_distance_of, maze.set_search_data, maze.cost_of
+    # the backward search keeps its search data apart from the forward one, like in bidirectional_bfs
+    backward = maze.get_backward_search()
+    backward.new_generation()
+    is_reached_backward, is_closed_backward, close_backward = backward.is_visited, backward.is_closed, backward.close
+    backward_distance_of, backward_total_distance_of, set_backward_data = \
+        backward.passed_distance_of, backward.total_distance_of, backward.set_search_data
+    n_cells = maze.n_rows * maze.n_columns
+    h_table, backward_h_table = heuristic_table(maze, h), heuristic_table(maze, h, source)
+
+    set_search_data(source, 0, h_table[source], -1, h_table[source])
+    set_backward_data(target, 0, backward_h_table[target], -1)
+    # the keys of the heaps are the ones of optimized_a_star
+    forward_frontier = [(h_table[source], source)]
+    backward_frontier = [(backward_h_table[target], target)]
+    memory = len(forward_frontier) + len(backward_frontier)
+    best_distance, meeting = (0, None) if source == target else (float("inf"), None)
+
+    while forward_frontier and backward_frontier:
+        if best_distance <= max(forward_frontier[0][0], backward_frontier[0][0]):
+            break
+        if len(forward_frontier) <= len(backward_frontier):
+            total_distance, cell_key = heapq.heappop(forward_frontier)
+            cell = cell_key % n_cells
+            if is_closed(cell) or total_distance != total_distance_of(cell):  # stale entry of a cell which is improved
+                continue
+            close(cell)
+            cell_distance = passed_distance_of(cell)
+            for neighbor_cell in neighbors_of(cell):
+                passed_distance = cell_distance + cost_of(neighbor_cell)
+                if not is_visited(neighbor_cell) or passed_distance < passed_distance_of(neighbor_cell):
+                    total_distance = passed_distance + h_table[neighbor_cell]
+                    set_search_data(neighbor_cell, passed_distance, total_distance, cell, h_table[neighbor_cell])
+                    heapq.heappush(forward_frontier, (total_distance, neighbor_cell - int(passed_distance) * n_cells))
+                    maze.n_checked_cells += 1
+
+                    if ui is not None:
+                        ui.draw_checking_cell(maze.cells[neighbor_cell])
+                if is_reached_backward(neighbor_cell):
+                    distance = passed_distance + backward_distance_of(neighbor_cell)
+                    if distance < best_distance:
+                        best_distance, meeting = distance, (cell, neighbor_cell)
+        else:
+            total_distance, cell_key = heapq.heappop(backward_frontier)
+            cell = cell_key % n_cells
+            if is_closed_backward(cell) or total_distance != backward_total_distance_of(cell):
+                continue
+            close_backward(cell)
+            passed_distance = backward_distance_of(cell) + cost_of(cell)  # moving from a neighbor to the cell
+            for neighbor_cell in neighbors_of(cell):
+                if not is_reached_backward(neighbor_cell) or passed_distance < backward_distance_of(neighbor_cell):
+                    total_distance = passed_distance + backward_h_table[neighbor_cell]
+                    set_backward_data(neighbor_cell, passed_distance, total_distance, cell)
+                    heapq.heappush(backward_frontier, (total_distance, neighbor_cell - int(passed_distance) * n_cells))
+                    maze.n_checked_cells += 1
+
+                    if ui is not None:
+                        ui.draw_checking_cell(maze.cells[neighbor_cell])
+                if is_visited(neighbor_cell):
+                    distance = passed_distance_of(neighbor_cell) + passed_distance
+                    if distance < best_distance:
+                        best_distance, meeting = distance, (neighbor_cell, cell)
+        if ui is not None:
+            ui.draw_visited_cell(maze.cells[cell])
+
+        memory = max(memory, len(forward_frontier) + len(backward_frontier))
+
+    if meeting is not None:
+        join_searches(maze, meeting, backward, h_table)
+    end_time = time.process_time()
+    elapsed_time = end_time - start_time
+    return {"total_distance": total_distance_of(target), "time": elapsed_time,
+            "checked_cells_no": maze.n_checked_cells, "memory": memory}
+
+
+def join_searches(maze, meeting, backward, h_table=None):
+    """
+        Its job is to link the path found by the backward search to the one found by the forward search, so the whole
+        path can be tracked back from the target
+    :param maze: The solved maze
+    :param meeting: (id reached forward, id reached backward) pair of neighbors the two searches meet at
+    :param backward: search data of the backward search, the previous cell of a cell reached backward is the next
+        one towards the target
+    :param h_table: heuristic values of the cell ids against the target, if the total distances have to include them
+    :return: None
+    """
+    previous_cell, cell = meeting
+    while cell != -1:
+        passed_distance = maze.passed_distance_of(previous_cell) + maze.cost_of(cell)
+        if h_table is None:
+            maze.set_search_data(cell, passed_distance, passed_distance, previous_cell)
+        else:
+            maze.set_search_data(cell, passed_distance, passed_distance + h_table[cell], previous_cell, h_table[cell])
+        previous_cell, cell = cell, backward.previous_cell_of(cell)
+
+
+def d_star_lite(maze, cell=None, h=heuristics.manhattan_distance, *args):
+    """
+        Its job is doing D* Lite algorithm, an incremental planner which keeps its search of the maze between the runs.
+        After cells are changed by Maze.set_obstacle, Cell.reset and others only the affected part of the search is
+        repaired. The expanded cells are drawn after the planning, so the measured time is only the planning.
+    :param maze: The given maze
+    :param cell: The starting cell
+    :param h: given heuristic function
+    :param args: other arguments like ui object
+    :return: The result of performing D* Lite, the checked cells are the cells expanded in this run
+    """
+    ui = args[0] if args else None
+    start_time = time.process_time()
+    ends_of(maze, cell, ui)
+    if cell is None:
+        cell = maze.source
+    planner = planners.setdefault(maze, {}).get(h)
+    if planner is None:
+        planner = planners[maze][h] = DStarLite(maze, h)
+    expanded_cells = [] if ui is not None else None
+    planner.plan(cell, expanded_cells.append if ui is not None else None)
+    path = planner.path()
+    if path is not None:
+        fill_planned_path(maze, path, planner.costs.__getitem__)
+    maze.n_checked_cells = planner.n_expanded_cells
+
+    end_time = time.process_time()
+    elapsed_time = end_time - start_time
+    if ui is not None:
+        for expanded_cell in expanded_cells:
+            ui.draw_visited_cell(maze.cells[expanded_cell])
+    return {"total_distance": planner.passed_distance[planner.source], "time": elapsed_time,
+            "checked_cells_no": maze.n_checked_cells, "memory": planner.memory}
+
+
+def fill_planned_path(maze, path, cost_of):
+    """
+        Its job is to put a path found without the search data of the cells, like the one of an incremental planner,
+        in the search data of the cells, so the path can be tracked back from the target
+    :param maze: The solved maze (Maze or CompactMaze)
+    :param path: list of the ids of the cells of the path from the source to the target
+    :param cost_of: a function giving the cost of moving to a cell by its id
+    :return: None
+    """
+    total_distance = sum(cost_of(cell) for cell in path[1:])
+    passed_distance, previous_cell = 0, -1
+    for cell in path:
+        if previous_cell != -1:
+            passed_distance += cost_of(cell)
+        # the ongoing distance is the rest of the path to the target
+        maze.set_search_data(cell, passed_distance, total_distance, previous_cell, total_distance - passed_distance)
+        previous_cell = cell
+
+
+def dijkstra(maze, cell=None, *args):
+    """
+        Its job is doing Dijkstra algorithm with a bucket queue (Dial's algorithm). The costs of the cells are small
+        integers, so the frontier is max_cost + 1 buckets of the cells by their distance modulo max_cost + 1: putting a
+        cell in it is an append and taking the closest one is popping from the bucket of the current distance, instead
+        of heap operations.
+    :param maze: The given maze
+    :param cell: The starting cell
+    :param args: other arguments like ui object or others functions heuristic function
+    :return: The result of performing Dijkstra
+    """
+    ui = args[1] if len(args) > 1 else None
+    start_time = time.process_time()
+    cell, target = ends_of(maze, cell, ui)
+    neighbors_of = maze.get_adjacency().neighbors_of
+    is_visited, passed_distance_of, set_search_data, cost_of = \
+        maze.is_visited, maze.passed_distance_of, maze.set_search_data, maze.cost_of
+
+    # a cell in the frontier is at most max_cost farther than the closest one, so the buckets never collide
+    buckets = [deque() for _ in range(max_cost + 1)]
+    set_search_data(cell, 0, 0, -1)
+    buckets[0].append(cell)
+    n_frontier_cells = memory = 1  # entries in the buckets, stale ones of improved cells included
+    distance = 0  # distance of the bucket being emptied
+    while n_frontier_cells:
+        bucket = buckets[distance % len(buckets)]
+        if not bucket:
+            distance += 1
+            continue
+        cell = bucket.popleft()
+        n_frontier_cells -= 1
+        if passed_distance_of(cell) != distance:  # stale entry of a cell which is improved
+            continue
+        if cell == target:
+            break
+        for neighbor_cell in neighbors_of(cell):
+            passed_distance = distance + cost_of(neighbor_cell)
+            if not is_visited(neighbor_cell) or passed_distance < passed_distance_of(neighbor_cell):
+                set_search_data(neighbor_cell, passed_distance, passed_distance, cell)
+                buckets[passed_distance % len(buckets)].append(neighbor_cell)
+                n_frontier_cells += 1
+                maze.n_checked_cells += 1
+
+                if ui is not None:
+                    ui.draw_checking_cell(maze.cells[neighbor_cell])
+        if ui is not None:
+            ui.draw_visited_cell(maze.cells[cell])
+
+        memory = max(memory, n_frontier_cells)
+
+    end_time = time.process_time()
+    elapsed_time = end_time - start_time
+    return {"total_distance": maze.total_distance_of(target), "time": elapsed_time,
+            "checked_cells_no": maze.n_checked_cells, "memory": memory}
+
+
+def hierarchical_a_star(maze, cell=None, h=heuristics.manhattan_distance, *args):
+    """
+        Its job is doing hierarchical A* (HPA*): searching the abstract graph of the clusters of the maze, which is
+        kept between the runs and brought up to date after cells are changed, and then refining its path inside the
+        clusters. The path is close to the shortest one but can be longer than it, as the abstract graph only crosses
+        the borders of the clusters at its transitions (a path of 317 is found where the shortest one is 315 on one
+        maze, for example), so its total distance is an upper bound of the shortest one. The expanded nodes of the
+        abstract graph are drawn after the planning, so the measured time is only the planning.
+    :param maze: The given maze
+    :param cell: The starting cell
+    :param h: given heuristic function
+    :param args: other arguments like ui object
+    :return: The result of performing hierarchical A*, the checked cells are the reached nodes of the abstract graph
+        and the cells reached by the searches inside the clusters in this run
+    """
+    ui = args[0] if args else None
+    start_time = time.process_time()
+    source, target = ends_of(maze, cell, ui)
+    h_table = heuristic_table(maze, h)
+    graph = graphs.get(maze)
+    if graph is None:
+        graph = graphs[maze] = AbstractGraph(maze)
+    expanded_nodes = [] if ui is not None else None
+    path, total_distance, n_reached_nodes, memory = graph.find_path(source, target, h_table, expanded_nodes.append
+                                                                    if ui is not None else None)
+    if path is not None:
+        fill_planned_path(maze, path, graph.cost_of)
+    maze.n_checked_cells = n_reached_nodes + graph.n_searched_cells
+
     end_time = time.process_time()
     elapsed_time = end_time - start_time
-    return {"total_distance": maze.target.passed_distance, "time": elapsed_time,
+    if ui is not None:
+        for expanded_node in expanded_nodes:
+            ui.draw_visited_cell(maze.cells[expanded_node])
+    return {"total_distance": total_distance, "time": elapsed_time,
             "checked_cells_no": maze.n_checked_cells, "memory": memory}
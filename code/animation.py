@@ -0,0 +1,257 @@
+import math
+import os
+import struct
+import numpy as np
+import pygame
+import event_trace
+import structures
+
+image_formats = ["gif", "png"]
+
+
+def lzw_encode(indices, min_code_size):
+    """
+        Its job is to compress the color indices of an image with the variable-length LZW coding of GIF
+    :param indices: iterable of the color indices of the pixels in row-major order
+    :param min_code_size: number of bits of the color indices
+    :return: the compressed bytes
+    """
+    clear_code = 1 << min_code_size
+    end_code = clear_code + 1
+    code_size = min_code_size + 1
+    codes, code_sizes = [clear_code], [code_size]  # every stream starts with a clear code
+    next_code = end_code + 1
+    table = {}  # (code of the prefix << 8 | index of the next pixel) -> code of the longer string
+    find_code = table.get
+    indices = iter(indices)
+    prefix = next(indices)
+    for index in indices:
+        key = prefix << 8 | index
+        code = find_code(key)
+        if code is not None:
+            prefix = code
+            continue
+        codes.append(prefix)
+        code_sizes.append(code_size)
+        if next_code < 4096:
+            table[key] = next_code
+            next_code += 1
+            if next_code > 1 << code_size and code_size < 12:
+                code_size += 1
+        else:  # the table is full, so it is cleared
+            codes.append(clear_code)
+            code_sizes.append(code_size)
+            table.clear()
+            code_size = min_code_size + 1
+            next_code = end_code + 1
+        prefix = index
+    codes += [prefix, end_code]
+    code_sizes += [code_size, code_size]
+    return pack_codes(codes, code_sizes)
+
+
+def pack_codes(codes, code_sizes):
+    """
+        Its job is to pack codes of different sizes into bytes, the lowest bit of each code first
+    :param codes: list of the codes
+    :param code_sizes: list of the number of bits of each code
+    :return: the packed bytes
+    """
+    codes, code_sizes = np.array(codes, dtype=np.int64), np.array(code_sizes, dtype=np.int64)
+    offsets = np.cumsum(code_sizes) - code_sizes
+    bits = np.zeros(int(offsets[-1] + code_sizes[-1]), dtype=np.uint8)
+    for bit in range(int(code_sizes.max())):
+        has_bit = code_sizes > bit
+        bits[offsets[has_bit] + bit] = codes[has_bit] >> bit & 1
+    return np.packbits(bits, bitorder="little").tobytes()
+
+
+class GifWriter:
+    def __init__(self, file_address, width, height, palette, delay=4):
+        """
+            Its job is to open an animated GIF file and write its header. Every frame after the first one only keeps
+            the rectangle which is changed since the frame before it, with its unchanged pixels transparent, so a frame
+            of a few changed cells is small.
+        :param file_address: address of the GIF file
+        :param width: width of the frames in pixels
+        :param height: height of the frames in pixels
+        :param palette: list of the (red, green, blue) colors of the frames, at most 255
+        :param delay: time of showing each frame in hundredths of a second
+        """
+        if len(palette) > 255:
+            raise Exception("A GIF palette cannot have more than 255 colors and the transparent one!")
+        self.width, self.height = width, height
+        self.delay = delay
+        self.transparent_index = len(palette)  # the index after the colors marks the unchanged pixels
+        self.min_code_size = max(2, math.ceil(math.log2(len(palette) + 1)))
+        self.previous_frame = None
+        self.file = open(file_address, "wb")
+        table_size = 1 << self.min_code_size
+        colors = bytearray(bytes(3 * table_size))
+        for i, (red, green, blue) in enumerate(palette):
+            colors[3 * i:3 * i + 3] = bytes((red, green, blue))
+        self.file.write(b"GIF89a" + struct.pack("<2H3B", width, height, 0xF0 | (self.min_code_size - 1), 0, 0))
+        self.file.write(colors)
+        # looping forever (NETSCAPE2.0 application extension)
+        self.file.write(b"\x21\xFF\x0BNETSCAPE2.0\x03\x01\x00\x00\x00")
+
+    def add_frame(self, frame, delay=None):
+        """
+            Its job is to write a frame
+        :param frame: numpy array of shape (height, width) of the color indices of the pixels
+        :param delay: time of showing the frame in hundredths of a second, self.delay if None
+        :return: None
+        """
+        top, left, bottom, right = 0, 0, self.height, self.width
+        image = frame
+        if self.previous_frame is not None:
+            changed = frame != self.previous_frame
+            rows, columns = np.flatnonzero(changed.any(axis=1)), np.flatnonzero(changed.any(axis=0))
+            if rows.size:
+                top, bottom, left, right = int(rows[0]), int(rows[-1]) + 1, int(columns[0]), int(columns[-1]) + 1
+            else:  # nothing is changed, one pixel is written again
+                bottom, right = 1, 1
+            image = np.where(changed[top:bottom, left:right], frame[top:bottom, left:right], self.transparent_index)
+        self.previous_frame = frame.copy()
+        delay = self.delay if delay is None else delay
+        # graphic control extension keeping the frame under the next one (disposal method 1) with a transparent color
+        self.file.write(struct.pack("<4BH2B", 0x21, 0xF9, 4, 0x05, delay, self.transparent_index, 0))
+        self.file.write(struct.pack("<B4HB", 0x2C, left, top, right - left, bottom - top, 0))
+        self.file.write(bytes((self.min_code_size,)))
+        data = lzw_encode(image.ravel().tolist(), self.min_code_size)
+        for start in range(0, len(data), 255):
+            block = data[start:start + 255]
+            self.file.write(bytes((len(block),)) + block)
+        self.file.write(b"\x00")
+
+    def close(self):
+        """
+            Its job is to write the end of the file and close it
+        :return: None
+        """
+        self.file.write(b"\x3B")
+        self.file.close()
+
+
+class FrameWriter:
+    def __init__(self, file_address, image_format, size, colors, delay):
+        """
+            Its job is to initialize a writer of the frames of an animation as an animated GIF or a sequence of PNG
+            files (file_address without its extension and then -00000.png, -00001.png, ...)
+        :param file_address: address of the GIF file or of the first PNG file
+        :param image_format: gif or png
+        :param size: (width, height) of the frames in pixels
+        :param colors: list of the pygame colors the frames are drawn with
+        :param delay: time of showing each frame in hundredths of a second
+        """
+        if image_format not in image_formats:
+            raise Exception(f"Unknown image format {image_format}!")
+        self.image_format = image_format
+        self.size = size
+        self.n_frames = 0
+        self.file_address = file_address
+        self.gif_writer = None
+        palette = sorted({(color.r, color.g, color.b) for color in colors})
+        self.palette = np.array(palette, dtype=np.int64)
+        self.palette_keys = None  # the colors as they are kept in the pixels of the surfaces, sorted
+        self.key_order = None  # index in the palette of each sorted key
+        if image_format == "gif":
+            self.gif_writer = GifWriter(file_address, size[0], size[1], palette, delay)
+
+    def indices_of(self, surface):
+        """
+            Its job is to convert the pixels of a surface to the indices of their colors in the palette, a color which
+            is not in the palette gets the closest one
+        :param surface: the pygame surface
+        :return: numpy array of shape (height, width) of the color indices
+        """
+        if self.palette_keys is None:
+            # the mapped colors are sorted to find the index of each pixel by a binary search
+            keys = np.array([surface.map_rgb(tuple(color)) for color in self.palette.tolist()], dtype=np.int64)
+            self.key_order = np.argsort(keys)
+            self.palette_keys = keys[self.key_order]
+        keys = pygame.surfarray.array2d(surface).astype(np.int64).T
+        positions = np.minimum(np.searchsorted(self.palette_keys, keys), len(self.palette_keys) - 1)
+        unknown = self.palette_keys[positions] != keys
+        indices = self.key_order[positions]
+        if unknown.any():
+            unknown_keys, inverse = np.unique(keys[unknown], return_inverse=True)
+            unknown_colors = np.array([tuple(surface.unmap_rgb(int(key)))[:3] for key in unknown_keys])
+            distances = ((unknown_colors[:, None, :] - self.palette[None, :, :]) ** 2).sum(axis=2)
+            indices[unknown] = distances.argmin(axis=1)[inverse]
+        return indices.astype(np.uint8)
+
+    def write(self, surface, delay=None):
+        """
+            Its job is to write a surface as the next frame
+        :param surface: the pygame surface
+        :param delay: time of showing the frame in hundredths of a second, the delay of the writer if None
+        :return: None
+        """
+        if surface.get_size() != self.size:
+            surface = pygame.transform.scale(surface, self.size)  # nearest pixels, so no new colors are made
+        if self.gif_writer is not None:
+            self.gif_writer.add_frame(self.indices_of(surface), delay)
+        else:
+            pygame.image.save(surface, f"{os.path.splitext(self.file_address)[0]}-{self.n_frames:05d}.png")
+        self.n_frames += 1
+
+    def close(self):
+        """
+            Its job is to finish the animation
+        :return: None
+        """
+        if self.gif_writer is not None:
+            self.gif_writer.close()
+
+
+def export_trace(trace, file_address, image_format="gif", every=None, max_size=640, fps=25):
+    """
+        Its job is to render a recorded run without a display, using the drawing of the user interface with the SDL
+        dummy video driver, and write its frames: the maze, then a frame after every `every` events and at last the
+        found path
+    :param trace: the Trace of the run
+    :param file_address: address of the GIF file or of the first PNG file
+    :param image_format: gif for an animated GIF or png for a sequence of PNG files
+    :param every: number of events between two frames, chosen to make about 100 frames if None
+    :param max_size: maximum width and height of the frames in pixels, bigger mazes are scaled down
+    :param fps: frames per second of the GIF
+    :return: number of the written frames
+    """
+    from user_interface import UI  # the user interface initializes pygame, so the driver is chosen first
+    if not pygame.display.get_init():
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+    maze = structures.Maze.build(trace.maze_data)
+    if maze is None:
+        raise Exception("The maze of the trace is not valid!")
+    # each cell gets as many pixels as fit in max_size, with a margin between the cells when there is room for it
+    pitch = max(1, min(8, max_size // max(maze.n_rows, maze.n_columns)))
+    margin = 1 if pitch >= 4 else 0
+    screen_size = (maze.n_columns * pitch, maze.n_rows * pitch)
+    ui = UI(rect_size=structures.Coords(pitch - margin, pitch - margin), margin=margin, screen_size=screen_size,
+            maze=maze)
+    scale = min(1.0, max_size / max(screen_size))
+    frame_size = (max(1, int(screen_size[0] * scale)), max(1, int(screen_size[1] * scale)))
+    if every is None:
+        every = max(1, math.ceil(len(trace.events) / 100))
+
+    delay = max(1, round(100 / fps))
+    frame_writer = FrameWriter(file_address, image_format, frame_size, ui.cell_colors(), delay)
+    ui.draw_all(with_buttons=False)
+    frame_writer.write(ui.screen)
+    n_events = 0
+    for cell, kind in trace.cells(maze):
+        if kind == event_trace.VISITED:
+            ui.draw_visited_cell(cell)
+        else:
+            ui.draw_checking_cell(cell)
+        n_events += 1
+        if n_events % every == 0:
+            frame_writer.write(ui.screen)
+            ui.dirty_rects = []  # nothing is shown on a display, the frames are written instead
+    path = trace.path(maze)
+    if path is not None:
+        ui.draw_path(path)
+    frame_writer.write(ui.screen, delay=300)  # the last frame is kept for three seconds
+    frame_writer.close()
+    return frame_writer.n_frames
@@ -0,0 +1,207 @@
+import argparse
+import csv
+import glob
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import structures
+import compact_structures
+import animation
+from main import solve, solve_traced, algorithms_list, heuristic_algorithms_list, heuristics_list, jobs_of, \
+    format_result, output_address, animation_address, set_moves
+from result_writer import output_formats, path_formats
+from solve_cache import SolveCache
+from validation import connectivities, corner_rules
+
+result_cache = None  # cache of the results of each worker process, the same maze in two files is solved once
+
+
+def init_worker(cache_size):
+    """
+        Its job is to prepare a worker process, making its result cache
+    :param cache_size: maximum number of the cached results, 0 for no cache
+    :return: None
+    """
+    global result_cache
+    result_cache = SolveCache(cache_size) if cache_size > 0 else None
+
+
+def test_files_of(pattern):
+    """
+        Its job is to find the test files of a directory or a glob pattern
+    :param pattern: a directory of tests or a glob pattern of test files
+    :return: sorted list of the addresses of the test files
+    """
+    if os.path.isdir(pattern):
+        return sorted(glob.glob(os.path.join(pattern, "*.json")) + glob.glob(os.path.join(pattern, "*.maze")))
+    return sorted(glob.glob(pattern))
+
+
+@lru_cache(maxsize=4)
+def load_maze(file_address, compact=False, connectivity=None, corner_rule=None):
+    """
+        Its job is to build the maze of a test file once for each worker process and reuse it for the next jobs
+    :param file_address: address of the test file
+    :param compact: build a CompactMaze instead of a Maze
+    :param connectivity: 4 or 8 to change the moves of the test, None to keep them
+    :param corner_rule: strict, cut or squeeze to change the corner rule of the test, None to keep it
+    :return: The built maze or None if the test data is not valid
+    """
+    if compact:
+        maze = compact_structures.CompactMaze.build(file_address=file_address)
+    else:
+        maze = structures.Maze.build(file_address=file_address)
+    return set_moves(maze, connectivity, corner_rule)
+
+
+def run_job(job):
+    """
+        Its job is to solve the maze of a test file with an algorithm and a heuristic in a worker process
+    :param job: a tuple of (file address, algorithm, heuristic function, compact, output format, path format,
+        image format of the animation or None for no animation, number of events between two frames of it,
+        connectivity, corner rule)
+    :return: the output of the run as one string, the summary row of the run and whether it is found in the cache, or
+        None if the test data is not valid
+    """
+    file_address, algo, h, compact, output_format, path_format, image_format, every, connectivity, corner_rule = job
+    maze = load_maze(file_address, compact, connectivity, corner_rule)
+    if maze is None:
+        return None
+    hits = result_cache.hits if result_cache is not None else 0
+    if image_format is None:
+        res = solve(maze, algo, h, cache=result_cache)
+    else:  # the run is recorded to be animated, so it is not looked up in the cache
+        res, trace = solve_traced(maze, algo, h)
+        animation.export_trace(trace, animation_address(file_address, algo, h, image_format), image_format, every)
+    path = res.get("path")
+    # an algorithm not using a heuristic runs once for each test and has an empty heuristic in the summary
+    summary_row = {"file": file_address, "algorithm": algo.__name__,
+                   "heuristic": h.__name__ if algo in heuristic_algorithms_list else "",
+                   "total_distance": res.get("total_distance"), "time": res.get("time"),
+                   "checked_cells_no": res.get("checked_cells_no"), "memory": res.get("memory"),
+                   "path_length": len(path) if path is not None else 0, "cached": res.get("cached", False)}
+    # the output is sent back to the main process as one string instead of many small ones
+    return "".join(format_result(algo, h, res, output_format, path_format)), summary_row, \
+        result_cache is not None and result_cache.hits > hits
+
+
+def run_batch(test_files, algorithms=None, heuristic_functions=None, n_workers=None, compact=False,
+              summary_file_address="./outputs/summary.csv", cache_size=128, output_format="text",
+              path_format="coords", image_format=None, every=None, connectivity=None, corner_rule=None):
+    """
+        Its job is to run every (test file, algorithm, heuristic) job over a pool of processes, writing the output of
+        each test to outputs directory like a single test run does, and one summary of all the runs
+    :param test_files: addresses of the test files
+    :param algorithms: the chosen algorithms, all of them by default
+    :param heuristic_functions: the chosen heuristic functions, all of them by default
+    :param n_workers: number of worker processes, number of CPUs by default
+    :param compact: build CompactMaze instead of Maze for the tests
+    :param summary_file_address: address of the summary file
+    :param cache_size: maximum number of the cached results of each worker process, 0 for no cache
+    :param output_format: text for the text report or jsonl for one JSON object per line
+    :param path_format: format of the paths in jsonl, coords or directions
+    :param image_format: gif or png to export an animation of every run to outputs/animations, None for no animation
+    :param every: number of events between two frames of the animations, about 100 frames for each run if None
+    :param connectivity: 4 or 8 to change the moves of the tests, None to keep the ones of each test
+    :param corner_rule: strict, cut or squeeze to change the corner rule of the tests, None to keep the ones of them
+    :return: the rows of the summary
+    """
+    algorithms = algorithms or algorithms_list
+    heuristic_functions = heuristic_functions or heuristics_list
+    runs = jobs_of(algorithms, heuristic_functions)
+    jobs = [(file_address, algo, h, compact, output_format, path_format, image_format, every, connectivity, corner_rule)
+            for file_address in test_files for algo, h in runs]
+    n_workers = n_workers or os.cpu_count() or 1
+    summary_rows = []
+    n_cache_hits = 0
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=init_worker,
+                             initargs=(cache_size,)) as pool:
+        # jobs of a test are next to each other, so a worker can mostly reuse the maze it has built
+        results = pool.map(run_job, jobs, chunksize=max(1, len(jobs) // (n_workers * 4)))
+        # the results come in the order of the jobs, each one is written as soon as it comes
+        for file_address in test_files:
+            output_file = None
+            for _ in runs:
+                file_result = next(results)
+                if file_result is None:
+                    continue
+                if output_file is None:
+                    output_file = open(output_address(file_address, output_format), "w")
+                output, summary_row, is_cache_hit = file_result
+                output_file.write(output)
+                summary_rows.append(summary_row)
+                n_cache_hits += is_cache_hit
+            if output_file is None:
+                print(f"The test data of {file_address} is not valid!")
+            else:
+                output_file.close()
+
+    if not os.path.isdir(os.path.dirname(summary_file_address) or "."):
+        os.mkdir(os.path.dirname(summary_file_address))
+    with open(summary_file_address, "w", newline="") as summary_file:
+        writer = csv.DictWriter(summary_file, fieldnames=["file", "algorithm", "heuristic", "total_distance", "time",
+                                                          "checked_cells_no", "memory", "path_length", "cached"])
+        writer.writeheader()
+        writer.writerows(summary_rows)
+    if n_cache_hits:
+        print(f"{n_cache_hits} of {len(summary_rows)} runs are found in the result cache.")
+    return summary_rows
+
+
+def main(argv):
+    """
+        Its job is to parse the arguments of batch mode and run it
+    :param argv: the command line arguments (without the program name)
+    :return: None
+    """
+    algorithms_by_name = {algo.__name__: algo for algo in algorithms_list}
+    heuristics_by_name = {h.__name__: h for h in heuristics_list}
+    parser = argparse.ArgumentParser(prog="main.py", description="Solve all the tests of a directory or a glob.")
+    parser.add_argument("tests", help="a directory of JSON or binary tests (like ./tests/) or a glob (like './tests/200-*.json')")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: CPUs)")
+    parser.add_argument("--algorithms", default=None,
+                        help="comma separated algorithms to run: " + ", ".join(algorithms_by_name))
+    parser.add_argument("--heuristics", default=None,
+                        help="comma separated heuristics to use: " + ", ".join(heuristics_by_name))
+    parser.add_argument("--compact", action="store_true", help="keep the mazes in flat arrays")
+    parser.add_argument("--summary", default="./outputs/summary.csv", help="address of the summary file")
+    parser.add_argument("--format", choices=output_formats, default="text",
+                        help="text report or one JSON object per result (jsonl)")
+    parser.add_argument("--path-format", choices=path_formats, default="coords",
+                        help="paths in jsonl as [row, column] lists or run-length direction strings")
+    parser.add_argument("--cache-size", type=int, default=128,
+                        help="number of the cached results of each worker, 0 for no cache")
+    parser.add_argument("--animate", choices=animation.image_formats, default=None,
+                        help="export an animation of every run to outputs/animations as a GIF or PNG frames")
+    parser.add_argument("--every", type=int, default=None,
+                        help="number of events between two frames of the animations (default: about 100 frames)")
+    parser.add_argument("--connectivity", type=int, choices=connectivities, default=None,
+                        help="4 straight moves or 8 with the diagonal ones (default: the one of each test or 4)")
+    parser.add_argument("--corner-rule", choices=corner_rules, default=None,
+                        help="diagonal moves around obstacles (default: the one of each test or strict)")
+    args = parser.parse_args(argv)
+
+    try:
+        algorithms = [algorithms_by_name[name] for name in args.algorithms.split(",")] if args.algorithms else None
+        heuristic_functions = [heuristics_by_name[name] for name in args.heuristics.split(",")] \
+            if args.heuristics else None
+    except KeyError as e:
+        parser.error(f"Unknown algorithm or heuristic {e}!")
+    if args.workers is not None and args.workers < 1:
+        parser.error("Number of workers must be at least 1!")
+    if args.cache_size < 0:
+        parser.error("Cache size cannot be negative!")
+    if args.animate is not None and args.compact:
+        parser.error("A compact maze cannot be animated!")
+    if args.every is not None and args.every < 1:
+        parser.error("Number of events between two frames must be at least 1!")
+    test_files = test_files_of(args.tests)
+    if not test_files:
+        parser.error("No test file is found!")
+    run_batch(test_files, algorithms, heuristic_functions, args.workers, args.compact, args.summary, args.cache_size,
+              args.format, args.path_format, args.animate, args.every, args.connectivity, args.corner_rule)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,206 @@
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import algorithms as search_algorithms
+import structures
+import compact_structures
+import test_generator
+from main import solve, algorithms_list, heuristics_list, jobs_of
+
+# default matrix of mazes, every size is built with every obstacle percentage and every seed
+default_sizes = [(50, 50), (100, 100), (200, 200)]
+default_obstacle_percents = [0, 10, 20, 30]
+default_seeds = [0]
+
+
+def build_maze_data(n_rows, n_columns, obstacle_percent, seed):
+    """
+        Its job is to build the data of a maze the way test_generator does, reproducibly from a seed
+    :param n_rows: number of rows
+    :param n_columns: number of columns
+    :param obstacle_percent: percentage of obstacles we want in the maze
+    :param seed: seed of the random generator
+    :return: a dictionary of data helps building the maze
+    """
+    return test_generator.test_data(*test_generator.generate_test(seed, 0, (n_rows, n_rows), (n_columns, n_columns),
+                                                                  obstacle_percent))
+
+
+def forget_kept_state(maze):
+    """
+        Its job is to drop what an algorithm keeps for a maze between its runs, so every run is measured from scratch
+        like the first one instead of reusing the search of the previous run
+    :param maze: the maze
+    :return: None
+    """
+    search_algorithms.planners.pop(maze, None)  # the D* Lite planners would repair the last search instead
+    search_algorithms.graphs.pop(maze, None)  # the abstract graph of HPA* would keep its built clusters and paths
+
+
+def time_stats(times):
+    """
+        Its job is to summarize the measured times of the repetitions of a run
+    :param times: list of the measured times
+    :return: a dictionary of min, median and mean of the times
+    """
+    return {"min": min(times), "median": statistics.median(times), "mean": statistics.mean(times)}
+
+
+def run_benchmark(sizes=None, obstacle_percents=None, seeds=None, algorithms=None, heuristic_functions=None,
+                  warmup=1, repeat=5, compact=False):
+    """
+        Its job is to run every algorithm and heuristic on every maze of the matrix and measure them
+    :param sizes: list of (n_rows, n_columns) of the mazes
+    :param obstacle_percents: list of obstacle percentages of the mazes
+    :param seeds: list of the seeds of the mazes
+    :param algorithms: the chosen algorithms, all of them by default
+    :param heuristic_functions: the chosen heuristic functions, all of them by default
+    :param warmup: number of runs before measuring
+    :param repeat: number of measured runs
+    :param compact: build CompactMaze instead of Maze
+    :return: a dictionary of the benchmark which can be dumped as JSON
+    """
+    sizes = sizes or default_sizes
+    obstacle_percents = obstacle_percents if obstacle_percents is not None else default_obstacle_percents
+    seeds = seeds if seeds is not None else default_seeds
+    runs = jobs_of(algorithms or algorithms_list, heuristic_functions or heuristics_list)
+    results = []
+    for n_rows, n_columns in sizes:
+        for obstacle_percent in obstacle_percents:
+            for seed in seeds:
+                maze_name = f"{n_rows}-{n_columns}-{obstacle_percent}p-s{seed}"
+                data = build_maze_data(n_rows, n_columns, obstacle_percent, seed)
+                if compact:
+                    maze = compact_structures.CompactMaze.build(data)
+                else:
+                    maze = structures.Maze.build(data)
+                for algo, h in runs:
+                    for _ in range(warmup):
+                        forget_kept_state(maze)
+                        solve(maze, algo, h)
+                    wall_times, cpu_times = [], []
+                    res = None
+                    for _ in range(repeat):
+                        forget_kept_state(maze)
+                        start_wall, start_cpu = time.perf_counter(), time.process_time()
+                        res = solve(maze, algo, h)
+                        wall_times.append(time.perf_counter() - start_wall)
+                        cpu_times.append(time.process_time() - start_cpu)
+                    path = res.get("path")
+                    total_distance = res.get("total_distance")
+                    results.append({
+                        "maze": maze_name,
+                        "algorithm": algo.__name__,
+                        "heuristic": h.__name__,
+                        "wall_time": time_stats(wall_times),
+                        "cpu_time": time_stats(cpu_times),
+                        "total_distance": None if total_distance == float("inf") else total_distance,
+                        "checked_cells_no": res.get("checked_cells_no"),
+                        "memory": res.get("memory"),
+                        "path_length": len(path) if path is not None else 0
+                    })
+                    print(f"{maze_name} {algo.__name__} {h.__name__}: "
+                          f"{results[-1]['wall_time']['median']:.6f}s", file=sys.stderr)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "compact": compact,
+            "warmup": warmup,
+            "repeat": repeat,
+            "sizes": sizes,
+            "obstacle_percents": obstacle_percents,
+            "seeds": seeds
+        },
+        "results": results
+    }
+
+
+def compare(old_benchmark, new_benchmark, threshold=10.0, metric="wall_time"):
+    """
+        Its job is to compare two benchmarks and find the runs which got slower than the threshold or whose search
+        behavior (checked cells, memory, path length) changed
+    :param old_benchmark: the dictionary of the old (base) benchmark
+    :param new_benchmark: the dictionary of the new benchmark
+    :param threshold: the allowed slowdown in percent
+    :param metric: the measured time to compare, wall_time or cpu_time
+    :return: a list of the regressions, each one a (key, description) pair
+    """
+    old_results = {(r["maze"], r["algorithm"], r["heuristic"]): r for r in old_benchmark["results"]}
+    regressions = []
+    for new_result in new_benchmark["results"]:
+        key = (new_result["maze"], new_result["algorithm"], new_result["heuristic"])
+        old_result = old_results.get(key)
+        if old_result is None:
+            continue
+        old_time, new_time = old_result[metric]["median"], new_result[metric]["median"]
+        if old_time > 0 and (new_time - old_time) / old_time * 100 > threshold:
+            regressions.append((key, f"{metric} {old_time:.6f}s -> {new_time:.6f}s "
+                                     f"(+{(new_time - old_time) / old_time * 100:.1f}%)"))
+        for field in ("checked_cells_no", "memory", "path_length"):
+            if new_result[field] > old_result[field]:
+                regressions.append((key, f"{field} {old_result[field]} -> {new_result[field]}"))
+    return regressions
+
+
+def main(argv):
+    """
+        Its job is to parse the arguments of the benchmark and run or compare benchmarks
+    :param argv: the command line arguments (without the program name)
+    :return: exit code, 1 if a comparison finds regressions and 0 otherwise
+    """
+    algorithms_by_name = {algo.__name__: algo for algo in algorithms_list}
+    heuristics_by_name = {h.__name__: h for h in heuristics_list}
+    parser = argparse.ArgumentParser(prog="benchmark.py", description="Benchmark the search algorithms.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="run the benchmark and write its results as JSON")
+    run_parser.add_argument("--output", default="benchmark.json", help="address of the results file")
+    run_parser.add_argument("--sizes", default=None, help="comma separated sizes like 50x50,200x100 (rows x columns)")
+    run_parser.add_argument("--obstacles", default=None, help="comma separated obstacle percentages like 0,10,30")
+    run_parser.add_argument("--seeds", default=None, help="comma separated seeds like 0,1,2")
+    run_parser.add_argument("--algorithms", default=None,
+                            help="comma separated algorithms to run: " + ", ".join(algorithms_by_name))
+    run_parser.add_argument("--heuristics", default=None,
+                            help="comma separated heuristics to use: " + ", ".join(heuristics_by_name))
+    run_parser.add_argument("--warmup", type=int, default=1, help="number of runs before measuring")
+    run_parser.add_argument("--repeat", type=int, default=5, help="number of measured runs")
+    run_parser.add_argument("--compact", action="store_true", help="keep the mazes in flat arrays")
+    compare_parser = subparsers.add_parser("compare", help="compare two results files and report regressions")
+    compare_parser.add_argument("old", help="address of the base results file")
+    compare_parser.add_argument("new", help="address of the new results file")
+    compare_parser.add_argument("--threshold", type=float, default=10.0, help="allowed slowdown in percent")
+    compare_parser.add_argument("--metric", choices=["wall_time", "cpu_time"], default="wall_time")
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        with open(args.old) as old_file, open(args.new) as new_file:
+            regressions = compare(json.load(old_file), json.load(new_file), args.threshold, args.metric)
+        for key, description in regressions:
+            print(f"REGRESSION {' '.join(key)}: {description}")
+        if not regressions:
+            print("No regression found.")
+        return 1 if regressions else 0
+
+    try:
+        sizes = [tuple(int(n) for n in size.split("x")) for size in args.sizes.split(",")] if args.sizes else None
+        obstacle_percents = [int(p) for p in args.obstacles.split(",")] if args.obstacles else None
+        seeds = [int(seed) for seed in args.seeds.split(",")] if args.seeds else None
+        algorithms = [algorithms_by_name[name] for name in args.algorithms.split(",")] if args.algorithms else None
+        heuristic_functions = [heuristics_by_name[name] for name in args.heuristics.split(",")] \
+            if args.heuristics else None
+    except (ValueError, KeyError) as e:
+        parser.error(f"Invalid argument {e}!")
+    if args.repeat < 1 or args.warmup < 0:
+        parser.error("Repeat must be at least 1 and warmup cannot be negative!")
+    benchmark = run_benchmark(sizes, obstacle_percents, seeds, algorithms, heuristic_functions, args.warmup,
+                              args.repeat, args.compact)
+    with open(args.output, "w") as output_file:
+        json.dump(benchmark, output_file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
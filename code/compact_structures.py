@@ -0,0 +1,273 @@
+import json
+import maze_format
+from structures import Coords, CellTypes, Revision, SearchData
+from validation import is_valid, max_cost, connectivities, corner_rules
+
+
+class CompactMaze(SearchData):
+
+    def __init__(self, n_rows_, n_columns_, source=None, target=None):
+        """
+            Its job is to initialize an array-backed maze in which every cell is an integer id (row * n_columns + column)
+            and every piece of data of the cells is kept in a flat typed array instead of a Cell object
+        :param n_rows_: number of rows in the maze
+        :param n_columns_: number of columns in the maze
+        :param source: id of the source cell of the maze
+        :param target: id of the target cell of the maze
+        """
+        self.n_rows = n_rows_
+        self.n_columns = n_columns_
+        self.n_cells = n_rows_ * n_columns_
+        self.types = bytearray(self.n_cells)  # type of each cell (CellTypes values), 1 byte per cell
+        self.costs = bytearray(b'\x01') * self.n_cells  # cost of each cell, 1 byte per cell
+        self.n_weighted_cells = 0  # number of cells which do not cost 1
+        self.connectivity = 4  # number of the moves from a cell, 8 for diagonal moves too
+        self.corner_rule = "strict"  # rule of the diagonal moves around obstacles
+        self.adjacency = None  # the neighbors of every cell, built on the first use
+        # search data of the cells in flat arrays, its stamps tell which of them are visited in the current run
+        SearchData.__init__(self, self.n_cells)
+        self.backward_search = None  # search data of the searches from the target, made on the first use
+        self.source = None
+        self.target = None
+        self.revision = Revision()  # number of changes of the obstacles, costs and target of the maze
+        if source is not None:
+            self.set_source(source)
+        if target is not None:
+            self.set_target(target)
+        self.n_checked_cells = 0  # number of checked cells in the algorithm will run on the maze
+        self.reset_distances()
+
+    def cell_id(self, coords: Coords):
+        """
+            Its job is to convert coordinates to the id of the cell
+        :param coords: coordinates of a cell
+        :return: the id of the cell having the given coordinates or None if it is out of the maze
+        """
+        if 0 <= coords.row < self.n_rows and 0 <= coords.column < self.n_columns:
+            return coords.row * self.n_columns + coords.column
+        return None
+
+    def get_cell(self, coords: Coords):
+        """
+            Its job is finding a cell in the maze based on its coordinates
+        :param coords: coordinates of a cell
+        :return: the id of the cell having the given coordinates
+        """
+        return self.cell_id(coords)
+
+    def get_coords(self, cell):
+        """
+            Its job is to convert the id of a cell to its coordinates
+        :param cell: id of a cell
+        :return: coordinates of the cell
+        """
+        return Coords(*divmod(cell, self.n_columns))
+
+    def set_source(self, cell):
+        """
+            Its job is to set a cell as the new source of the maze
+        :param cell: id of a cell in the maze
+        :return: None
+        """
+        if self.source is not None:
+            self.types[self.source] = CellTypes.Normal.value
+        is_changed = self.types[cell] in (CellTypes.Obstacle.value, CellTypes.Target.value)
+        self.source = cell
+        self.types[cell] = CellTypes.Source.value
+        if is_changed:
+            self.revision.change(cell)
+
+    def set_target(self, cell):
+        """
+            Its job is to set a cell as the new target of the maze
+        :param cell: id of a cell in the maze
+        :return: None
+        """
+        if self.target is not None:
+            self.types[self.target] = CellTypes.Normal.value
+            self.revision.change(self.target)
+        self.target = cell
+        self.types[cell] = CellTypes.Target.value
+        self.revision.change(cell)
+
+    def set_obstacle(self, cell):
+        """
+            Its job is to set a cell as a new obstacle
+        :param cell: id of a cell in the maze
+        :return: None
+        """
+        if self.types[cell] != CellTypes.Obstacle.value:
+            self.types[cell] = CellTypes.Obstacle.value
+            self.revision.change(cell)
+
+    def set_cost(self, cell, cost):
+        """
+            Its job is to set the cost of moving to a cell
+        :param cell: id of a cell in the maze
+        :param cost: the new cost, an integer from 1 to max_cost
+        :return: None
+        """
+        if not (isinstance(cost, int) and 1 <= cost <= max_cost):
+            raise Exception(f"Cost of a cell must be an integer from 1 to {max_cost}!")
+        if self.costs[cell] != cost:
+            self.n_weighted_cells += (cost != 1) - (self.costs[cell] != 1)
+            self.costs[cell] = cost
+            self.revision.change(cell)
+
+    def set_connectivity(self, connectivity, corner_rule="strict"):
+        """
+            Its job is to set the moves which can be made from a cell
+        :param connectivity: 4 for straight moves or 8 for straight and diagonal moves
+        :param corner_rule: rule of the diagonal moves around obstacles (strict, cut or squeeze)
+        :return: None
+        """
+        if connectivity not in connectivities:
+            raise Exception(f"Connectivity of a maze must be one of {connectivities}!")
+        if corner_rule not in corner_rules:
+            raise Exception(f"Corner rule of a maze must be one of {corner_rules}!")
+        if (connectivity, corner_rule) == (self.connectivity, self.corner_rule):
+            return
+        self.connectivity, self.corner_rule = connectivity, corner_rule
+        self.adjacency = None
+        self.revision.value += 1  # the layout of the maze is changed, as all of its moves are
+
+    def get_adjacency(self):
+        """
+            Its job is to give the adjacency of the maze, building it on the first use. It is patched by itself after
+            a cell is changed.
+        :return: the MoveMasks of the maze, which keep one byte for each cell
+        """
+        if self.adjacency is None:
+            from adjacency import MoveMasks  # the adjacency module imports this one
+            self.adjacency = MoveMasks(self)
+        return self.adjacency
+
+    def get_neighbors(self, cell):
+        """
+            Its job is to find valid neighbors of a given cell (neither out of maze cells nor obstacles)
+        :param cell: id of a cell of the maze
+        :return: a list of ids of valid neighbors in row-major order, the same order Maze.get_neighbors has
+        """
+        return list(self.get_adjacency().neighbors_of(cell))
+
+    def reset_distances(self):
+        """
+            Its job is to reset all distances and computed values to be ready for running again.
+            Starting a new generation makes the search data of all cells stale, so it does not visit the cells.
+        :return: None
+        """
+        self.new_generation()
+        self.n_checked_cells = 0
+
+    def cost_of(self, cell):
+        """
+            Its job is to give the cost of moving to a cell
+        :param cell: id of a cell
+        :return: the cost of the cell
+        """
+        return self.costs[cell]
+
+    def is_open(self, cell):
+        """
+            Its job is to check whether a cell is not an obstacle
+        :param cell: id of a cell
+        :return: True if the cell is not an obstacle and False otherwise
+        """
+        return self.types[cell] != CellTypes.Obstacle.value
+
+    def get_backward_search(self):
+        """
+            Its job is to give the search data of the searches from the target of the bidirectional algorithms, made
+            on the first use and kept with the maze like its own search data
+        :return: the SearchData of the backward searches
+        """
+        if self.backward_search is None:
+            self.backward_search = SearchData(self.n_cells)
+        return self.backward_search
+
+    def bytes_per_cell(self):
+        """
+            Its job is to report how many bytes the maze and the structures kept for it (the search data of the
+            backward searches, its adjacency, heuristic tables, component labels and D* Lite planners) use for each
+            of its cells. The abstract graph of HPA* only keeps the borders of its clusters, so it is not counted.
+        :return: number of bytes per cell
+        """
+        import algorithms, components, heuristic_tables  # the modules of the kept structures import this one
+        # types and costs are bytearrays, so each of them keeps 1 byte per cell
+        n_bytes = 2 * self.n_cells + self.search_bytes()
+        if self.backward_search is not None:
+            n_bytes += self.backward_search.search_bytes()
+        if self.adjacency is not None:
+            n_bytes += self.adjacency.n_bytes()
+        n_bytes += heuristic_tables.kept_table_bytes(self)
+        labels = components.components.get(self)
+        if labels is not None:
+            n_bytes += labels.n_bytes()
+        n_bytes += sum(planner.n_bytes() for planner in algorithms.planners.get(self, {}).values())
+        return n_bytes / self.n_cells
+
+    @staticmethod
+    def build(data=None, file_address=None):
+        """
+            Its job is to build an object of compact maze based on the given dictionary data or input file.
+        :param data: a dictionary of data helps building the maze
+        :param file_address: a file of data helps building the maze
+        :return: The built maze
+        """
+        if file_address is None:
+            if data is None:
+                raise Exception("At least one of data and file_address should be given!")
+        elif maze_format.is_binary(file_address):
+            return CompactMaze.build_binary(file_address)
+        else:
+            with open(file_address, 'r') as json_file:
+                data = json.load(json_file)
+        if not is_valid(data):
+            return None
+        n_rows, n_columns = data.get("n_rows"), data.get("n_columns")
+        maze = CompactMaze(n_rows, n_columns)
+        for r, c in data.get("obstacles"):
+            maze.set_obstacle(r * n_columns + c)
+        for r, c, cost in data.get("costs", []):
+            maze.set_cost(r * n_columns + c, cost)
+        source_row, source_column = data.get("source")
+        target_row, target_column = data.get("target")
+        maze.set_source(source_row * n_columns + source_column)
+        maze.set_target(target_row * n_columns + target_column)
+        maze.set_connectivity(data.get("connectivity", 4), data.get("corner_rule", "strict"))
+        return maze
+
+    @staticmethod
+    def build_binary(file_address):
+        """
+            Its job is to build an object of compact maze based on a binary maze file, unpacking its obstacle bitmap
+            and copying its costs at once.
+        :param file_address: address of the binary maze file
+        :return: The built maze
+        """
+        with maze_format.MazeFile(file_address) as maze_file:
+            if not is_valid(maze_file.header_data()):
+                return None
+            maze = CompactMaze(maze_file.n_rows, maze_file.n_columns)
+            maze.types = bytearray((maze_file.obstacle_grid() * CellTypes.Obstacle.value).tobytes())
+            if maze_file.costs is not None:
+                maze.costs = bytearray(maze_file.cost_grid().tobytes())
+                maze.n_weighted_cells = maze.n_cells - maze.costs.count(1)
+            maze.set_source(maze_file.source[0] * maze.n_columns + maze_file.source[1])
+            maze.set_target(maze_file.target[0] * maze.n_columns + maze_file.target[1])
+            maze.set_connectivity(maze_file.connectivity, maze_file.corner_rule)
+        return maze
+
+
+def calc_path(maze):
+    """
+        Its job is finding the path an algorithm found on a compact maze by tracking back from the target.
+    :param maze: the solved compact maze
+    :return: The found path in form of a list of coordinates
+    """
+    reversed_path = [maze.target]
+    last_cell = maze.target
+    while last_cell != maze.source:
+        last_cell = maze.previous_cell[last_cell]
+        reversed_path.append(last_cell)
+    return [maze.get_coords(cell) for cell in reversed(reversed_path)]
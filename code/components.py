@@ -0,0 +1,273 @@
+import weakref
+from array import array
+from collections import deque
+import numpy as np
+from adjacency import moves_of
+from compact_structures import CompactMaze
+
+# the components of each maze, kept between the runs
+components = weakref.WeakKeyDictionary()
+
+
+class Components:
+    def __init__(self, maze):
+        """
+            Its job is to initialize the labels of the connected components of the open cells of a maze, so whether a
+            cell can reach another one is answered without a search. The labels are kept as a union-find forest over
+            the cell ids: the root of the tree of a cell is its label. They are found at once with array operations
+            and kept up to date after cells are changed: an opened cell gets a new node joined to the components of its
+            neighbors, and closed cells only need a search when the open cells around them are not connected to each
+            other around them, which is the only way a component can be split.
+        :param maze: the maze (Maze or CompactMaze) of the labels
+        """
+        self.maze = weakref.proxy(maze)  # the labels do not keep the maze alive
+        self.n_rows, self.n_columns = maze.n_rows, maze.n_columns
+        self.connectivity, self.corner_rule = None, None  # moves of the maze the labels are found with
+        self.parent = None  # parent of each node in the forest, a root is its own parent
+        # node of each changed cell, the other cells are the nodes of their ids. A changed cell gets a new node, as its
+        # old one is left in the tree of the component it had before it is closed.
+        self.nodes = {}
+        self.changed_cells = []  # ids of the cells changed since the labels are brought up to date
+        self.n_builds = 0  # number of times the labels are found from scratch
+        maze.revision.watchers.add(self)
+
+    def cell_changed(self, cell):
+        """
+            Its job is to remember a changed cell of the maze to bring the labels up to date on the next query
+        :param cell: the changed cell (a Cell of a Maze or id of a cell of a CompactMaze)
+        :return: None
+        """
+        self.changed_cells.append(cell if isinstance(self.maze, CompactMaze) else cell.id)
+
+    def n_bytes(self):
+        """
+            Its job is to give the size of the labels
+        :return: the size in bytes, the nodes of the changed cells are not counted
+        """
+        return len(self.parent) * self.parent.itemsize if self.parent is not None else 0
+
+    def build(self):
+        """
+            Its job is to find the labels of all the cells from scratch. Every move of the adjacency table hooks the
+            root of the larger label under the smaller one and then the trees are flattened by pointer jumping, until
+            the ends of every move have the same root. It takes a few rounds, as the trees are merged in bulk.
+        :return: None
+        """
+        adjacency = self.maze.get_adjacency()
+        self.connectivity, self.corner_rule = self.maze.connectivity, self.maze.corner_rule
+        self.changed_cells.clear()
+        n_cells = self.n_rows * self.n_columns
+        first, second = adjacency.edges()
+        labels = np.arange(n_cells)
+        while True:
+            first_labels, second_labels = labels[first], labels[second]
+            is_split = first_labels != second_labels
+            if not is_split.any():
+                break
+            # the moves whose ends have the same root stay so, as the trees are only merged
+            first, second = first[is_split], second[is_split]
+            first_labels, second_labels = first_labels[is_split], second_labels[is_split]
+            np.minimum.at(labels, np.maximum(first_labels, second_labels), np.minimum(first_labels, second_labels))
+            while True:
+                jumped = labels[labels]
+                if np.array_equal(jumped, labels):
+                    break
+                labels = jumped
+        self.parent = array('i', labels.astype(np.int32).tobytes())
+        self.nodes = {}
+        self.n_builds += 1
+
+    def find(self, cell):
+        """
+            Its job is to find the root of the tree of a cell, halving the path to it on the way
+        :param cell: id of a cell
+        :return: the root node
+        """
+        parent, node = self.parent, self.nodes.get(cell, cell)
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(self, first, second):
+        """
+            Its job is to join the components of two cells
+        :param first: id of a cell
+        :param second: id of a cell
+        :return: None
+        """
+        first, second = self.find(first), self.find(second)
+        if first != second:
+            self.parent[max(first, second)] = min(first, second)
+
+    def around(self, cells, moves):
+        """
+            Its job is to find the open cells next to a group of cells
+        :param cells: ids of the cells
+        :param moves: the (row, column) steps to the cells next to a cell
+        :return: a set of ids of the open cells next to the cells, out of them
+        """
+        adjacency = self.maze.get_adjacency()
+        next_cells = set()
+        for cell in cells:
+            row, column = divmod(cell, self.n_columns)
+            for d_row, d_column in moves:
+                if 0 <= row + d_row < self.n_rows and 0 <= column + d_column < self.n_columns:
+                    next_cells.add((row + d_row) * self.n_columns + column + d_column)
+        return {cell for cell in next_cells - set(cells) if adjacency.is_open(cell)}
+
+    def ring_pieces(self, cells):
+        """
+            Its job is to split the open cells next to a group of closed cells to the pieces connected to each other by
+            the moves between the cells around the group. A path through the group or a diagonal move one of its cells
+            was a corner of goes between two of them, so no path is cut by closing the cells when there is one piece.
+        :param cells: ids of the closed cells, each of them next to another one of them
+        :return: a list of the pieces, each a list of ids of the open cells next to the group
+        """
+        adjacency = self.maze.get_adjacency()
+        ring, next_cells = self.around(cells, moves_of[8]), self.around(cells, moves_of[self.connectivity])
+        pieces = []
+        while next_cells:
+            start = next_cells.pop()
+            reached, queue = {start}, [start]
+            for ring_cell in queue:
+                for neighbor_cell in adjacency.neighbors_of(ring_cell):
+                    if neighbor_cell in ring and neighbor_cell not in reached:
+                        reached.add(neighbor_cell)
+                        queue.append(neighbor_cell)
+            pieces.append([start] + list(next_cells & reached))
+            next_cells -= reached
+        return pieces
+
+    def separate(self, pieces):
+        """
+            Its job is to find which pieces around closed cells are still connected through the rest of the maze,
+            joining their labels, and to give a new label to the component of the pieces cut off from the others. A
+            search is grown from every piece a cell at a time in turns, so the pieces meet or the search of an enclosed
+            group of them runs out soon. The pieces of all the closed cells are searched together, as a piece next to
+            two groups of them can be cut off from the rest of its component only by both of them.
+        :param pieces: the pieces of the open cells next to the closed cells
+        :return: True if the labels are brought up to date and False if the search gives up
+        """
+        adjacency = self.maze.get_adjacency()
+        owners = {}  # the piece each reached cell is reached from
+        joined = list(range(len(pieces)))  # the pieces are joined by a small union-find of their own
+        queues = [deque() for _ in pieces]
+        n_groups = len(pieces)
+
+        def find(piece):
+            while piece >= 0 and joined[piece] != piece:  # a separated group is left out with a negative root
+                piece = joined[piece]
+            return piece
+
+        def join(first, second):
+            nonlocal n_groups
+            first, second = find(first), find(second)
+            if first == second:
+                return False
+            joined[max(first, second)] = min(first, second)
+            n_groups -= 1
+            return True
+
+        for piece, piece_cells in enumerate(pieces):
+            for cell in piece_cells:
+                if cell in owners:  # the cell is next to two groups of closed cells
+                    join(owners[cell], piece)
+                else:
+                    owners[cell] = piece
+                    queues[piece].append(cell)
+        budget = self.n_rows * self.n_columns // 8  # searching more costs about as much as finding the labels again
+        while n_groups > 1:
+            for piece, queue in enumerate(queues):
+                group = find(piece)
+                if group < 0:
+                    continue
+                if not queue:
+                    if any(queues[other] for other in range(len(pieces)) if find(other) == group):
+                        continue
+                    # the cells reached from the group are a component of their own
+                    node = len(self.parent)
+                    self.parent.append(node)
+                    for cell, owner in owners.items():
+                        if find(owner) == group:
+                            self.nodes[cell] = node
+                    joined[group] = -1 - group
+                    n_groups -= 1
+                    if n_groups == 1:
+                        break
+                    continue
+                if budget == 0:
+                    return False
+                cell = queue.popleft()
+                budget -= 1
+                for neighbor_cell in adjacency.neighbors_of(cell):
+                    if neighbor_cell not in owners:
+                        owners[neighbor_cell] = piece
+                        queue.append(neighbor_cell)
+                    elif join(owners[neighbor_cell], piece):
+                        self.union(cell, neighbor_cell)
+        return True
+
+    def update(self):
+        """
+            Its job is to bring the labels up to date with the maze, after the adjacency table is patched. The cells
+            are checked with the maze as it is now, so the cells closed next to each other are checked together as
+            they can cut a path together without any of them cutting it alone. A possible split makes the labels found
+            again from scratch.
+        :return: None
+        """
+        if self.parent is None or (self.maze.connectivity, self.maze.corner_rule) != \
+                (self.connectivity, self.corner_rule):
+            self.build()
+            return
+        if not self.changed_cells:
+            return
+        adjacency = self.maze.get_adjacency()
+        closed_cells = {cell for cell in self.changed_cells if not adjacency.is_open(cell)}
+        pieces = []
+        while closed_cells:
+            group = [closed_cells.pop()]
+            for cell in group:
+                row, column = divmod(cell, self.n_columns)
+                for d_row, d_column in moves_of[8]:
+                    next_cell = (row + d_row) * self.n_columns + column + d_column
+                    if 0 <= row + d_row < self.n_rows and 0 <= column + d_column < self.n_columns and \
+                            next_cell in closed_cells:
+                        closed_cells.discard(next_cell)
+                        group.append(next_cell)
+            group_pieces = self.ring_pieces(group)
+            if len(group_pieces) > 1:  # a path through the group can be cut
+                pieces.extend(group_pieces)
+        if pieces and not self.separate(pieces):
+            self.build()
+            return
+        opened_cells = [cell for cell in set(self.changed_cells) if adjacency.is_open(cell)]
+        for cell in opened_cells:  # every opened cell gets its new node before any of them is joined
+            self.nodes[cell] = len(self.parent)
+            self.parent.append(len(self.parent))
+        for cell in opened_cells:
+            for neighbor_cell in adjacency.neighbors_of(cell):
+                self.union(cell, neighbor_cell)
+        self.changed_cells.clear()
+
+    def is_connected(self, first, second):
+        """
+            Its job is to check whether a cell can reach another one
+        :param first: id of an open cell
+        :param second: id of an open cell
+        :return: True if the cells are in the same component and False otherwise
+        """
+        self.update()
+        return self.find(first) == self.find(second)
+
+
+def components_of(maze):
+    """
+        Its job is to give the component labels of a maze, making them on the first use
+    :param maze: the maze (Maze or CompactMaze)
+    :return: the Components of the maze
+    """
+    maze_components = components.get(maze)
+    if maze_components is None:
+        maze_components = components[maze] = Components(maze)
+    return maze_components
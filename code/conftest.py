@@ -0,0 +1,2 @@
+# the modules of the code are imported by the tests from this directory, and test_generator.py is not a test module
+collect_ignore = ["test_generator.py"]
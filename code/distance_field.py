@@ -0,0 +1,103 @@
+import heapq
+from array import array
+from compact_structures import CompactMaze
+
+
+class DistanceField:
+    def __init__(self, maze):
+        """
+            Its job is to initialize the field of the distances from every cell of a maze to its target. The field is
+            computed by one reverse search from the target on the first query and computed again only when the
+            obstacles or the target of the maze are changed, so every query after it costs O(path length).
+        :param maze: the maze (Maze or CompactMaze) of the field
+        """
+        self.maze = maze
+        self.target = None  # id of the target the field is computed for
+        self.revision = None  # revision of the maze the field is computed for
+        self.distance = None  # distance from each cell id to the target, inf for the cells not reaching it
+        self.next_cell = None  # id of the next cell towards the target of each cell id, -1 for no next cell
+        self.n_builds = 0  # number of times the field is computed
+
+    def id_of(self, cell):
+        """
+            Its job is to convert a cell of the maze to its id (row * n_columns + column)
+        :param cell: a cell of a Maze or id of a cell of a CompactMaze
+        :return: id of the cell
+        """
+        if isinstance(self.maze, CompactMaze):
+            return cell
+        return cell.coords.row * self.maze.n_columns + cell.coords.column
+
+    def is_valid(self):
+        """
+            Its job is to check whether the field is computed for the current layout and target of the maze
+        :return: True if the field can be used and False otherwise
+        """
+        return self.distance is not None and self.revision == self.maze.revision.value and \
+            self.target == self.id_of(self.maze.target)
+
+    def build(self):
+        """
+            Its job is to compute the field by a Dijkstra search from the target over the reversed moves. Moving to a
+            cell costs the cost of that cell, so going from a neighbor to a cell costs the cell. The moves are the same
+            both ways for every connectivity and corner rule, so the neighbors of the adjacency table are used.
+        :return: None
+        """
+        maze = self.maze
+        if maze.target is None:
+            raise Exception("Maze is not complete! Target is not determined.")
+        n_cells = maze.n_rows * maze.n_columns
+        if isinstance(maze, CompactMaze):
+            costs = maze.costs
+        else:
+            costs = [cell.cost for cell in maze.cells]
+        neighbors_of = maze.get_adjacency().neighbors_of
+
+        target = self.id_of(maze.target)
+        distance = array('d', [float("inf")]) * n_cells
+        next_cell = array('i', [-1]) * n_cells
+        distance[target] = 0
+        frontier = [(0, target)]
+        while frontier:
+            cell_distance, cell = heapq.heappop(frontier)
+            if cell_distance != distance[cell]:  # stale entry of a cell which is improved
+                continue
+            neighbor_distance = cell_distance + costs[cell]
+            for neighbor_cell in neighbors_of(cell):
+                if neighbor_distance < distance[neighbor_cell]:
+                    distance[neighbor_cell] = neighbor_distance
+                    next_cell[neighbor_cell] = cell
+                    heapq.heappush(frontier, (neighbor_distance, neighbor_cell))
+
+        self.distance, self.next_cell = distance, next_cell
+        self.target, self.revision = target, maze.revision.value
+        self.n_builds += 1
+
+    def distance_from(self, source):
+        """
+            Its job is to give the distance from a cell to the target, computing the field if it is not valid
+        :param source: a cell of a Maze or id of a cell of a CompactMaze
+        :return: the distance, inf if the target cannot be reached
+        """
+        if not self.is_valid():
+            self.build()
+        return self.distance[self.id_of(source)]
+
+    def path_from(self, source):
+        """
+            Its job is to give the shortest path from a cell to the target by following the field, computing the field
+            if it is not valid
+        :param source: a cell of a Maze or id of a cell of a CompactMaze
+        :return: the path as a list of cells for a Maze or of coordinates for a CompactMaze, None if there is no path
+        """
+        if self.distance_from(source) == float("inf"):
+            return None
+        cell, target = self.id_of(source), self.target
+        path = [cell]
+        while cell != target:
+            cell = self.next_cell[cell]
+            path.append(cell)
+        if isinstance(self.maze, CompactMaze):
+            return [self.maze.get_coords(cell) for cell in path]
+        n_columns = self.maze.n_columns
+        return [self.maze.grid[cell // n_columns][cell % n_columns] for cell in path]
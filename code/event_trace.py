@@ -0,0 +1,148 @@
+import json
+import struct
+import sys
+from array import array
+from structures import CellTypes
+
+# A trace file is a header, the JSON of the maze and the result of the run and then the events, each one a little-endian
+# unsigned 32-bit number. The header is the magic, size of the JSON in bytes and number of the events.
+MAGIC = b"MZTR"
+HEADER = struct.Struct("<4s2I")
+# each event is the id of its cell (row * n_columns + column) shifted left once, the lowest bit is the kind of it
+CHECKING, VISITED = 0, 1
+
+
+class TraceRecorder:
+    def __init__(self, maze):
+        """
+            Its job is to initialize a recorder which stands in for the user interface while an algorithm runs without
+            drawing, keeping every cell it would draw as a compact event to be replayed later
+        :param maze: the maze (Maze) the algorithm runs on
+        """
+        self.n_columns = maze.n_columns
+        self.events = array('I')
+
+    def draw_checking_cell(self, cell):
+        """
+            Its job is to record a cell put in the queue of checking
+        :param cell: the given cell
+        :return: None
+        """
+        self.events.append((cell.coords.row * self.n_columns + cell.coords.column) << 1 | CHECKING)
+
+    def draw_visited_cell(self, cell):
+        """
+            Its job is to record a cell popped from the queue
+        :param cell: the given cell
+        :return: None
+        """
+        self.events.append((cell.coords.row * self.n_columns + cell.coords.column) << 1 | VISITED)
+
+
+def maze_data_of(maze):
+    """
+        Its job is to give the data of a maze in the format of the test files
+    :param maze: the maze (Maze)
+    :return: a dictionary of dimensions, source, target, obstacles, costs and moves of the maze
+    """
+    return {"n_rows": maze.n_rows, "n_columns": maze.n_columns,
+            "source": [maze.source.coords.row, maze.source.coords.column] if maze.source is not None else None,
+            "target": [maze.target.coords.row, maze.target.coords.column] if maze.target is not None else None,
+            "obstacles": [[cell.coords.row, cell.coords.column] for cell in maze.cell_list
+                          if cell.type == CellTypes.Obstacle.value],
+            "costs": [[cell.coords.row, cell.coords.column, cell.cost] for cell in maze.cell_list if cell.cost != 1],
+            "connectivity": maze.connectivity, "corner_rule": maze.corner_rule}
+
+
+class Trace:
+    def __init__(self, maze_data, result, events):
+        """
+            Its job is to initialize the trace of one run of an algorithm, which is enough to animate the run again
+            without solving the maze
+        :param maze_data: data of the maze in the format of the test files
+        :param result: result of the run, its path is a list of [row, column] or None
+        :param events: array of the events of the run in the order they happened
+        """
+        self.maze_data = maze_data
+        self.result = result
+        self.events = events
+
+    @staticmethod
+    def of_run(maze, result, recorder):
+        """
+            Its job is to make the trace of a run from its recorder
+        :param maze: the solved maze (Maze)
+        :param result: result of the run
+        :param recorder: the TraceRecorder the run is recorded by
+        :return: the trace
+        """
+        result = dict(result)
+        if result.get("path") is not None:
+            result["path"] = [[cell.coords.row, cell.coords.column] for cell in result["path"]]
+        return Trace(maze_data_of(maze), result, recorder.events)
+
+    def cells(self, maze):
+        """
+            Its job is to give the events of the trace with the cells of a maze
+        :param maze: the maze (Maze) the trace is replayed on
+        :return: a generator of (cell, kind of the event)
+        """
+        n_columns = maze.n_columns
+        for event in self.events:
+            row, column = divmod(event >> 1, n_columns)
+            yield maze.grid[row][column], event & 1
+
+    def path(self, maze):
+        """
+            Its job is to give the path of the trace with the cells of a maze
+        :param maze: the maze (Maze) the trace is replayed on
+        :return: list of the cells of the path or None if there is no path
+        """
+        if self.result.get("path") is None:
+            return None
+        return [maze.grid[row][column] for row, column in self.result["path"]]
+
+    def save(self, file_address):
+        """
+            Its job is to write the trace to a file
+        :param file_address: address of the trace file
+        :return: None
+        """
+        result = dict(self.result)
+        if result.get("total_distance") == float("inf"):
+            result["total_distance"] = None
+        header_data = json.dumps({"maze": self.maze_data, "result": result}, separators=(",", ":")).encode()
+        events = array('I', self.events)
+        if sys.byteorder == "big":
+            events.byteswap()
+        with open(file_address, "wb") as trace_file:
+            trace_file.write(HEADER.pack(MAGIC, len(header_data), len(events)))
+            trace_file.write(header_data)
+            trace_file.write(events.tobytes())
+
+    @staticmethod
+    def load(file_address):
+        """
+            Its job is to read a trace from a file
+        :param file_address: address of the trace file
+        :return: the trace
+        """
+        with open(file_address, "rb") as trace_file:
+            header = trace_file.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise Exception("The trace file is truncated!")
+            magic, header_data_size, n_events = HEADER.unpack(header)
+            if magic != MAGIC:
+                raise Exception("The file is not a trace file!")
+            header_data = trace_file.read(header_data_size)
+            events = array('I')
+            events.frombytes(trace_file.read(n_events * events.itemsize))
+        if len(header_data) < header_data_size or len(events) < n_events:
+            raise Exception("The trace file is truncated!")
+        if sys.byteorder == "big":
+            events.byteswap()
+        header_data = json.loads(header_data)
+        result = header_data["result"]
+        if result.get("total_distance") is None:
+            result["total_distance"] = float("inf")
+        return Trace(header_data["maze"], result, events)
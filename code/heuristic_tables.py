@@ -0,0 +1,129 @@
+import sys
+import weakref
+from array import array
+from collections import OrderedDict
+import numpy as np
+import heuristics
+from compact_structures import CompactMaze
+from structures import Cell, Coords
+
+# formula of each heuristic function over the arrays of the row and column distances to the goal, giving exactly the
+# values of the function: Manhattan and Chebyshev stay integers and Euclidean rounds like its function does
+formulas = {
+    heuristics.chebyshev_distance: lambda d_rows, d_columns: np.maximum(d_rows, d_columns),
+    heuristics.manhattan_distance: lambda d_rows, d_columns: d_rows + d_columns,
+    heuristics.euclidean_distance: lambda d_rows, d_columns: np.sqrt(d_columns ** 2 + d_rows ** 2),
+}
+# the most bytes of the kept tables of each maze, the least recently used ones are dropped over it but the last one is
+# always kept
+max_table_bytes = 64 * 2 ** 20
+chunk_cells = 2 ** 20  # number of the cells computed at once, so the temporary arrays stay small on large grids
+# the tables of each maze keyed by (id of the goal, heuristic function, connectivity), they do not depend on the
+# obstacles
+tables = weakref.WeakKeyDictionary()
+
+
+def integer_typecode(max_value):
+    """
+        Its job is to choose the smallest array typecode of unsigned integers which holds the values of a table
+    :param max_value: the largest value of the table
+    :return: the typecode
+    """
+    for typecode in ('B', 'H', 'I'):
+        if max_value < 2 ** (8 * array(typecode).itemsize):
+            return typecode
+    return 'Q'
+
+
+def table_bytes(table):
+    """
+        Its job is to give the approximate size of a heuristic table
+    :param table: the table, an array or a list of values
+    :return: the size in bytes
+    """
+    if isinstance(table, array):
+        return len(table) * table.itemsize
+    return sys.getsizeof(table) + (len(table) * sys.getsizeof(table[0]) if table else 0)
+
+
+def compute_heuristic_table(n_rows, n_columns, goal, h, connectivity=4):
+    """
+        Its job is to compute the heuristic values of all the cells of a grid against a goal at once. A diagonal move
+        costs as much as a straight one, so with 8 moves the values are capped by the Chebyshev distance and the
+        heuristic stays admissible.
+    :param n_rows: number of rows of the grid
+    :param n_columns: number of columns of the grid
+    :param goal: id of the goal cell (row * n_columns + column)
+    :param h: the heuristic function
+    :param connectivity: number of the moves from a cell, 4 or 8
+    :return: the values indexed by cell id, an array of the smallest unsigned integers which hold the values for
+        Manhattan and Chebyshev, of floats for the other known heuristics and a list for an unknown one
+    """
+    goal_row, goal_column = divmod(goal, n_columns)
+    formula = formulas.get(h)
+    if formula is None:  # a heuristic without a formula is evaluated cell by cell
+        cell_view, goal_view = Cell(Coords(0, 0)), Cell(Coords(goal_row, goal_column))
+        values = []
+        for cell in range(n_rows * n_columns):
+            cell_view.coords.row, cell_view.coords.column = divmod(cell, n_columns)
+            value = h(cell_view, goal_view)
+            if connectivity == 8:
+                value = min(value, heuristics.chebyshev_distance(cell_view, goal_view))
+            values.append(value)
+        return values
+    d_rows = np.abs(np.arange(n_rows, dtype=np.int64) - goal_row)[:, None]
+    d_columns = np.abs(np.arange(n_columns, dtype=np.int64) - goal_column)[None, :]
+    # the farthest cell is a corner, so the largest value is the one of the corner farthest from the goal
+    corner_value = formula(d_rows.max(initial=0), d_columns.max(initial=0))
+    if np.asarray(corner_value).dtype.kind == 'i':
+        table = array(integer_typecode(int(corner_value)), [0]) * (n_rows * n_columns)
+    else:
+        table = array('d', [0]) * (n_rows * n_columns)
+    values = np.frombuffer(table, dtype=table.typecode).reshape(n_rows, n_columns)
+    chunk_rows = max(1, chunk_cells // max(1, n_columns))
+    for start_row in range(0, n_rows, chunk_rows):
+        chunk_d_rows = d_rows[start_row:start_row + chunk_rows]
+        chunk_values = formula(chunk_d_rows, d_columns)
+        if connectivity == 8:
+            chunk_values = np.minimum(chunk_values, np.maximum(chunk_d_rows, d_columns))
+        values[start_row:start_row + chunk_rows] = chunk_values
+    del values  # the array cannot be changed while a NumPy view of it is alive
+    return table
+
+
+def heuristic_table(maze, h, goal=None):
+    """
+        Its job is to give the heuristic values of all the cells of a maze against a goal, so an algorithm reads
+        table[cell id] instead of calling the heuristic function. The tables are kept for each maze, goal and
+        heuristic function up to max_table_bytes for each maze.
+    :param maze: the maze (Maze or CompactMaze)
+    :param h: the heuristic function
+    :param goal: id of the goal cell, the target by default
+    :return: the values indexed by cell id
+    """
+    if goal is None:
+        if maze.target is None:
+            raise Exception("Maze is not complete to start! Target is not determined.")
+        goal = maze.target if isinstance(maze, CompactMaze) else maze.target.id
+    maze_tables = tables.get(maze)
+    if maze_tables is None:
+        maze_tables = tables[maze] = OrderedDict()
+    key = (goal, h, maze.connectivity)
+    table = maze_tables.get(key)
+    if table is not None:
+        maze_tables.move_to_end(key)
+        return table
+    table = maze_tables[key] = compute_heuristic_table(maze.n_rows, maze.n_columns, goal, h, maze.connectivity)
+    n_bytes = sum(map(table_bytes, maze_tables.values()))
+    while n_bytes > max_table_bytes and len(maze_tables) > 1:
+        n_bytes -= table_bytes(maze_tables.popitem(last=False)[1])
+    return table
+
+
+def kept_table_bytes(maze):
+    """
+        Its job is to give the size of the heuristic tables kept for a maze
+    :param maze: the maze (Maze or CompactMaze)
+    :return: the size in bytes
+    """
+    return sum(map(table_bytes, tables.get(maze, {}).values()))
@@ -1,3 +1,4 @@
+import math
 from enum import Enum
 
 
@@ -28,4 +29,5 @@ def euclidean_distance(cell, target):
     """
         Returns the Euclidean distance from the given cell to the given target
     """
-    return ((cell.coords.column - target.coords.column) ** 2 + (cell.coords.row - target.coords.row) ** 2) ** 0.5
+    return math.sqrt((cell.coords.column - target.coords.column) ** 2 + (cell.coords.row - target.coords.row) ** 2)
+
@@ -0,0 +1,408 @@
+import heapq
+import weakref
+import numpy as np
+from adjacency import can_cut
+from compact_structures import CompactMaze
+
+default_cluster_size = 16  # number of rows and columns of a cluster
+max_entrance_width = 6  # a wider entrance gets a transition at each of its ends instead of one in its middle
+
+
+def line_transitions(first, second, start, n_owned, cluster_size, connectivity, corner_rule, with_corners=True):
+    """
+        Its job is to find the transitions over a border line between the clusters, the moves which are kept in the
+        abstract graph. The cells which face each other across the line and are both open make entrances, runs of them
+        inside one pair of clusters, and every entrance gets one or two transitions. A cell of an entrance reaches any
+        other one of it through its own cluster, so the other moves over the entrance are not needed. With 8 moves the
+        diagonal moves over the line which are not inside an entrance are transitions too.
+    :param first: boolean array of the open cells before the line, from the position start along it
+    :param second: boolean array of the open cells after the line, from the same position
+    :param start: position along the line of the first cells of the arrays
+    :param n_owned: number of the positions whose transitions are found, the arrays can have one more position for
+        the diagonal moves
+    :param cluster_size: number of rows and columns of a cluster
+    :param connectivity: number of the moves from a cell, 4 or 8
+    :param corner_rule: rule of the diagonal moves around obstacles
+    :param with_corners: whether the diagonal moves over the corner of two clusters are found too
+    :return: list of (position of the cell before the line, position of the cell after it)
+    """
+    positions = np.arange(start, start + len(first))
+    is_break = positions % cluster_size == 0  # the first position of a cluster along the line
+    facing = first & second
+    straight = facing[:n_owned]
+    previous = np.concatenate(([False], straight[:-1]))
+    following = np.concatenate((straight[1:], [False]))
+    run_starts = np.flatnonzero(straight & (~previous | is_break[:n_owned]))
+    run_ends = np.flatnonzero(straight & (~following | np.concatenate((is_break[1:n_owned], [True]))))
+    is_wide = run_ends - run_starts + 1 >= max_entrance_width
+    chosen = np.concatenate((((run_starts + run_ends) // 2)[~is_wide], run_starts[is_wide], run_ends[is_wide]))
+    transitions = [(position, position) for position in (chosen + start).tolist()]
+    n_diagonals = min(n_owned, len(first) - 1)  # diagonal moves from the position to the next one
+    if connectivity == 8 and n_diagonals > 0:
+        crosses_break = is_break[1:n_diagonals + 1]
+        in_entrance = facing[:n_diagonals] & facing[1:n_diagonals + 1] & ~crosses_break
+        down = first[:n_diagonals] & second[1:n_diagonals + 1] & \
+            can_cut(corner_rule, second[:n_diagonals], first[1:n_diagonals + 1]) & ~in_entrance
+        up = first[1:n_diagonals + 1] & second[:n_diagonals] & \
+            can_cut(corner_rule, first[:n_diagonals], second[1:n_diagonals + 1]) & ~in_entrance
+        if not with_corners:
+            down &= ~crosses_break
+            up &= ~crosses_break
+        transitions += [(position, position + 1) for position in (np.flatnonzero(down) + start).tolist()]
+        transitions += [(position + 1, position) for position in (np.flatnonzero(up) + start).tolist()]
+    return transitions
+
+
+def local_distances(start, neighbors, costs=None):
+    """
+        Its job is to find the distances from a cell to all the cells of a small graph, by BFS when every cell costs 1
+        and by Dijkstra otherwise
+    :param start: index of the cell to start from
+    :param neighbors: list of the indices of the neighbors of each cell
+    :param costs: list of the cost of moving to each cell, None if they all cost 1
+    :return: list of the distance of each cell, inf for the cells which are not reached
+    """
+    distance = [float("inf")] * len(neighbors)
+    distance[start] = 0
+    if costs is None:
+        queue = [start]
+        for cell in queue:  # the queue grows while it is read
+            neighbor_distance = distance[cell] + 1
+            for neighbor_cell in neighbors[cell]:
+                if neighbor_distance < distance[neighbor_cell]:
+                    distance[neighbor_cell] = neighbor_distance
+                    queue.append(neighbor_cell)
+        return distance
+    frontier = [(0, start)]
+    while frontier:
+        cell_distance, cell = heapq.heappop(frontier)
+        if cell_distance != distance[cell]:  # stale entry of a cell which is improved
+            continue
+        for neighbor_cell in neighbors[cell]:
+            if cell_distance + costs[neighbor_cell] < distance[neighbor_cell]:
+                distance[neighbor_cell] = cell_distance + costs[neighbor_cell]
+                heapq.heappush(frontier, (distance[neighbor_cell], neighbor_cell))
+    return distance
+
+
+class AbstractGraph:
+    def __init__(self, maze, cluster_size=default_cluster_size):
+        """
+            Its job is to initialize the abstract graph of a maze for hierarchical pathfinding (HPA*). The maze is split
+            into square clusters, the transitions between the clusters are found once and the distances between the
+            transitions of a cluster are found on the first query which needs them. A query searches this small graph
+            and then refines its path inside the clusters, so it costs about the number of the clusters on the way
+            instead of the cells. The graph watches the maze and after a cell is changed only the border segments and
+            clusters around it are found again.
+        :param maze: the maze (Maze or CompactMaze) of the graph
+        :param cluster_size: number of rows and columns of a cluster
+        """
+        if cluster_size < 2:
+            raise Exception("Size of the clusters must be at least 2!")
+        self.maze = weakref.proxy(maze)  # the graph does not keep the maze alive
+        self.cluster_size = cluster_size
+        self.n_rows, self.n_columns = maze.n_rows, maze.n_columns
+        self.n_cluster_columns = (self.n_columns + cluster_size - 1) // cluster_size
+        self.connectivity, self.corner_rule = None, None  # moves of the maze the graph is built with
+        # transitions of each border segment, keyed by (1 for a vertical line or 0 for a horizontal one, the row or
+        # column after the line, index of the segment along the line), as (cell id, cell id) moves
+        self.segment_transitions = {}
+        self.transitions = {}  # ids of the cells of the other clusters each node can move to
+        self.cluster_nodes = {}  # ids of the nodes (ends of the transitions) of each cluster
+        self.intra_edges = {}  # [(node, distance)] from each node to the others of its cluster, for the found clusters
+        self.changed_cells = set()  # ids of the cells changed since the graph is brought up to date
+        self.n_searched_cells = 0  # number of the cells reached by the local searches since it is set to 0
+        maze.revision.watchers.add(self)
+
+    def cell_changed(self, cell):
+        """
+            Its job is to remember a changed cell of the maze to bring the graph up to date on the next query
+        :param cell: the changed cell (a Cell of a Maze or id of a cell of a CompactMaze)
+        :return: None
+        """
+        self.changed_cells.add(cell if isinstance(self.maze, CompactMaze) else cell.id)
+
+    def cluster_of(self, cell):
+        """
+            Its job is to find the cluster of a cell
+        :param cell: id of a cell
+        :return: id of the cluster (row of the cluster * number of the cluster columns + column of it)
+        """
+        row, column = divmod(cell, self.n_columns)
+        return row // self.cluster_size * self.n_cluster_columns + column // self.cluster_size
+
+    def cost_of(self, cell):
+        """
+            Its job is to give the cost of moving to a cell
+        :param cell: id of a cell
+        :return: cost of the cell
+        """
+        if isinstance(self.maze, CompactMaze):
+            return self.maze.costs[cell]
+        return self.maze.cells[cell].cost
+
+    def add_transition(self, first, second):
+        """
+            Its job is to put a transition in the graph, both ways
+        :param first: id of a cell
+        :param second: id of a cell of another cluster next to it
+        :return: None
+        """
+        for node, other_node in ((first, second), (second, first)):
+            if node not in self.transitions:
+                self.transitions[node] = set()
+                self.cluster_nodes.setdefault(self.cluster_of(node), set()).add(node)
+                self.intra_edges.pop(self.cluster_of(node), None)  # a new node of the cluster
+            self.transitions[node].add(other_node)
+
+    def remove_transition(self, first, second):
+        """
+            Its job is to take a transition out of the graph, with its ends which are not in another transition
+        :param first: id of a cell
+        :param second: id of a cell of another cluster next to it
+        :return: None
+        """
+        for node, other_node in ((first, second), (second, first)):
+            self.transitions[node].discard(other_node)
+            if not self.transitions[node]:
+                del self.transitions[node]
+                self.cluster_nodes[self.cluster_of(node)].discard(node)
+                self.intra_edges.pop(self.cluster_of(node), None)
+
+    def cell_ids_of(self, is_vertical, line, transitions):
+        """
+            Its job is to convert the transitions of a border line from positions along the line to cell ids
+        :param is_vertical: 1 for the line between two columns and 0 for the one between two rows
+        :param line: the row or column after the line
+        :param transitions: list of (position before the line, position after it)
+        :return: list of (cell id, cell id)
+        """
+        n_columns = self.n_columns
+        if is_vertical:
+            return [(first * n_columns + line - 1, second * n_columns + line) for first, second in transitions]
+        return [((line - 1) * n_columns + first, line * n_columns + second) for first, second in transitions]
+
+    def segment_of(self, is_vertical, line, position):
+        """
+            Its job is to give the key of the border segment a transition belongs to
+        :param is_vertical: 1 for the line between two columns and 0 for the one between two rows
+        :param line: the row or column after the line
+        :param position: the smaller position of the ends of the transition along the line
+        :return: key of the segment
+        """
+        return is_vertical, line, position // self.cluster_size
+
+    def build(self):
+        """
+            Its job is to find the transitions of all the border lines at once, with array operations over each line
+        :return: None
+        """
+        maze = self.maze
+        self.connectivity, self.corner_rule = maze.connectivity, maze.corner_rule
+        self.segment_transitions, self.transitions, self.cluster_nodes, self.intra_edges = {}, {}, {}, {}
+        self.changed_cells.clear()
+        is_open = maze.get_adjacency().open_grid()
+        for is_vertical, n_lines, line_length in ((1, self.n_columns, self.n_rows), (0, self.n_rows, self.n_columns)):
+            for line in range(self.cluster_size, n_lines, self.cluster_size):
+                before, after = (is_open[:, line - 1], is_open[:, line]) if is_vertical else \
+                    (is_open[line - 1], is_open[line])
+                transitions = line_transitions(before, after, 0, line_length, self.cluster_size, self.connectivity,
+                                               self.corner_rule, with_corners=bool(is_vertical))
+                for (first, second), move in zip(transitions, self.cell_ids_of(is_vertical, line, transitions)):
+                    segment = self.segment_of(is_vertical, line, min(first, second))
+                    self.segment_transitions.setdefault(segment, []).append(move)
+                    self.add_transition(*move)
+
+    def update_segment(self, segment):
+        """
+            Its job is to find the transitions of a border segment again
+        :param segment: key of the segment
+        :return: None
+        """
+        is_vertical, line, index = segment
+        for move in self.segment_transitions.pop(segment, []):
+            self.remove_transition(*move)
+        adjacency = self.maze.get_adjacency()
+        line_length = self.n_rows if is_vertical else self.n_columns
+        start = index * self.cluster_size
+        stop = min(start + self.cluster_size, line_length)
+        end = min(stop + 1, line_length)  # one more position for the diagonal moves to the next segment
+        # ids of the cells before the line, the ones after it are one column or row farther
+        if is_vertical:
+            cells, step = range(start * self.n_columns + line - 1, end * self.n_columns, self.n_columns), 1
+        else:
+            cells, step = range((line - 1) * self.n_columns + start, (line - 1) * self.n_columns + end), self.n_columns
+        before = np.array([adjacency.is_open(cell) for cell in cells], dtype=bool)
+        after = np.array([adjacency.is_open(cell + step) for cell in cells], dtype=bool)
+        transitions = line_transitions(before, after, start, stop - start, self.cluster_size, self.connectivity,
+                                       self.corner_rule, with_corners=bool(is_vertical))
+        moves = self.cell_ids_of(is_vertical, line, transitions)
+        if moves:
+            self.segment_transitions[segment] = moves
+        for move in moves:
+            self.add_transition(*move)
+
+    def update(self):
+        """
+            Its job is to bring the graph up to date with the maze: building it again after the moves of the maze are
+            changed, or finding the border segments and the clusters of the changed cells again
+        :return: None
+        """
+        if (self.maze.connectivity, self.maze.corner_rule) != (self.connectivity, self.corner_rule):
+            self.build()
+            return
+        segments = set()
+        size = self.cluster_size
+        for cell in self.changed_cells:
+            self.intra_edges.pop(self.cluster_of(cell), None)
+            row, column = divmod(cell, self.n_columns)
+            # a cell is an end of the moves over a line next to it or a corner of the diagonal ones
+            for line in (column, column + 1):
+                if line % size == 0 and 0 < line < self.n_columns:
+                    segments.update((1, line, position // size) for position in (row - 1, row) if position >= 0)
+            for line in (row, row + 1):
+                if line % size == 0 and 0 < line < self.n_rows:
+                    segments.update((0, line, position // size) for position in (column - 1, column) if position >= 0)
+        self.changed_cells.clear()
+        for segment in segments:
+            self.update_segment(segment)
+
+    def search(self, source, cluster, goal=None, is_reverse=False):
+        """
+            Its job is to do a Dijkstra search inside a cluster
+        :param source: id of the cell to start from
+        :param cluster: id of the cluster, the search does not leave it
+        :param goal: id of a cell to stop at, None to reach all the cells
+        :param is_reverse: find the distances from the cells to the source instead of from the source to them
+        :return: (distance of each reached cell id, previous cell id of each reached cell id)
+        """
+        size, n_columns = self.cluster_size, self.n_columns
+        top, left = cluster // self.n_cluster_columns * size, cluster % self.n_cluster_columns * size
+        bottom, right = min(top + size, self.n_rows), min(left + size, n_columns)
+        neighbors_of = self.maze.get_adjacency().neighbors_of
+        cost_of = self.cost_of
+        distance, previous = {source: 0}, {source: None}
+        frontier = [(0, source)]
+        while frontier:
+            cell_distance, cell = heapq.heappop(frontier)
+            if cell_distance != distance[cell]:  # stale entry of a cell which is improved
+                continue
+            if cell == goal:
+                break
+            self.n_searched_cells += 1
+            for neighbor_cell in neighbors_of(cell):
+                if not (top <= neighbor_cell // n_columns < bottom and left <= neighbor_cell % n_columns < right):
+                    continue
+                # going back from a neighbor to the cell costs the cell
+                neighbor_distance = cell_distance + (cost_of(cell) if is_reverse else cost_of(neighbor_cell))
+                if neighbor_distance < distance.get(neighbor_cell, float("inf")):
+                    distance[neighbor_cell] = neighbor_distance
+                    previous[neighbor_cell] = cell
+                    heapq.heappush(frontier, (neighbor_distance, neighbor_cell))
+        return distance, previous
+
+    def edges_of(self, cluster):
+        """
+            Its job is to give the distances between the nodes of a cluster, finding them on the first use. The cells of
+            the cluster get local indices with their neighbors inside it listed once, so the searches from its nodes do
+            not check the bounds of the cluster again, and a cluster whose cells all cost 1 is searched by BFS.
+        :param cluster: id of the cluster
+        :return: a dictionary of [(node, distance)] from each node of the cluster to the others it reaches inside it
+        """
+        edges = self.intra_edges.get(cluster)
+        if edges is not None:
+            return edges
+        edges = self.intra_edges[cluster] = {}
+        nodes = list(self.cluster_nodes.get(cluster, ()))
+        if len(nodes) < 2:
+            edges.update((node, []) for node in nodes)
+            return edges
+        size, n_columns = self.cluster_size, self.n_columns
+        top, left = cluster // self.n_cluster_columns * size, cluster % self.n_cluster_columns * size
+        cells = [row * n_columns + column for row in range(top, min(top + size, self.n_rows))
+                 for column in range(left, min(left + size, n_columns))]
+        index_of = {cell: index for index, cell in enumerate(cells)}
+        neighbors_of = self.maze.get_adjacency().neighbors_of
+        neighbors = [[index_of[neighbor_cell] for neighbor_cell in neighbors_of(cell) if neighbor_cell in index_of]
+                     for cell in cells]
+        costs = [self.cost_of(cell) for cell in cells]
+        is_unit = all(cost == 1 for cost in costs)
+        node_indices = [index_of[node] for node in nodes]
+        for node, start in zip(nodes, node_indices):
+            distance = local_distances(start, neighbors, None if is_unit else costs)
+            self.n_searched_cells += len(distance) - distance.count(float("inf"))
+            edges[node] = [(other_node, distance[index]) for other_node, index in zip(nodes, node_indices)
+                           if other_node != node and distance[index] != float("inf")]
+        return edges
+
+    def find_path(self, source, target, h_table, on_expand=None):
+        """
+            Its job is to find a path from a cell to another one: the source and the target are joined to the nodes of
+            their clusters, the abstract graph is searched by A* and each of its edges inside a cluster is refined by
+            a search of that cluster
+        :param source: id of the source cell
+        :param target: id of the target cell
+        :param h_table: the heuristic values of the cells against the target
+        :param on_expand: a function called with the id of every expanded node, like drawing it
+        :return: (list of the ids of the cells of the path or None if there is no path, its distance, number of the
+            reached nodes, maximum size of the frontier), the cells reached by the local searches are counted in
+            n_searched_cells
+        """
+        self.update()
+        self.n_searched_cells = 0
+        source_cluster, target_cluster = self.cluster_of(source), self.cluster_of(target)
+        from_source = self.search(source, source_cluster)[0]
+        to_target = self.search(target, target_cluster, is_reverse=True)[0]
+        passed_distance, previous = {source: 0}, {source: None}
+        frontier = [(h_table[source], 0, source)]
+        n_reached_nodes = memory = 1
+        while frontier:
+            _, node_distance, node = heapq.heappop(frontier)
+            if node_distance != passed_distance[node]:  # stale entry of a node which is improved
+                continue
+            if on_expand is not None:
+                on_expand(node)
+            if node == target:
+                break
+            if node == source:
+                edges = [(other_node, from_source[other_node]) for other_node in
+                         self.cluster_nodes.get(source_cluster, ()) if other_node in from_source and other_node != node]
+            else:
+                edges = list(self.edges_of(self.cluster_of(node)).get(node, ()))
+            edges += [(other_node, self.cost_of(other_node)) for other_node in self.transitions.get(node, ())]
+            if self.cluster_of(node) == target_cluster and node in to_target:
+                edges.append((target, to_target[node]))
+            for other_node, edge_distance in edges:
+                other_distance = node_distance + edge_distance
+                if other_distance < passed_distance.get(other_node, float("inf")):
+                    passed_distance[other_node] = other_distance
+                    previous[other_node] = node
+                    heapq.heappush(frontier, (other_distance + h_table[other_node], other_distance, other_node))
+                    n_reached_nodes += 1
+            memory = max(memory, len(frontier))
+        if target not in passed_distance:
+            return None, float("inf"), n_reached_nodes, memory
+        nodes = [target]
+        while previous[nodes[-1]] is not None:
+            nodes.append(previous[nodes[-1]])
+        nodes.reverse()
+        return self.refine(nodes), passed_distance[target], n_reached_nodes, memory
+
+    def refine(self, nodes):
+        """
+            Its job is to turn a path of the abstract graph into a path of cells
+        :param nodes: list of the ids of the nodes of the abstract path
+        :return: list of the ids of the cells of the path
+        """
+        path = [nodes[0]]
+        for node, next_node in zip(nodes, nodes[1:]):
+            cluster = self.cluster_of(node)
+            if cluster != self.cluster_of(next_node):  # a transition is one move
+                path.append(next_node)
+                continue
+            previous = self.search(node, cluster, goal=next_node)[1]
+            cells = [next_node]
+            while previous[cells[-1]] != node:
+                cells.append(previous[cells[-1]])
+            path += reversed(cells)
+        return path
@@ -0,0 +1,254 @@
+import heapq
+import weakref
+from array import array
+from adjacency import can_cut, moves_of
+from compact_structures import CompactMaze
+from heuristic_tables import compute_heuristic_table, table_bytes
+from structures import CellTypes
+
+
+class DStarLite:
+    def __init__(self, maze, h):
+        """
+            Its job is to initialize an incremental planner (D* Lite) of a maze. It searches from the target towards the
+            source and keeps its search between the runs, so after some cells of the maze are changed it only repairs
+            the part of the search the changed cells affect. Moving to a cell costs the cost of that cell and the moves
+            are the ones of the connectivity and corner rule of the maze.
+        :param maze: the maze (Maze or CompactMaze) of the planner
+        :param h: given heuristic function, it has to be consistent
+        """
+        self.maze = weakref.proxy(maze)  # the planner does not keep the maze alive
+        self.h = h
+        self.n_rows, self.n_columns = maze.n_rows, maze.n_columns
+        self.source = None  # id of the source of the last run
+        self.target = None  # id of the target the search is rooted at
+        self.key_modifier = 0  # sum of the heuristic distances the source is moved, so the old keys stay lower bounds
+        self.passed_distance = None  # g: distance from each cell id to the target found so far
+        self.lookahead_distance = None  # rhs: one step lookahead of g through the neighbors of each cell id
+        self.open_keys = {}  # key of each cell id which is in the frontier
+        self.frontier = []  # heap of (key, cell id), entries whose key is not in open_keys are stale
+        self.changed_cells = set()  # ids of the cells changed since the last run
+        self.open_cells = None  # 1 for each cell id which is not an obstacle, updated from the changed cells
+        self.costs = None  # cost of each cell id, updated from the changed cells
+        self.n_expanded_cells = 0  # number of cells expanded in the last run
+        self.memory = 0  # maximum size of the frontier in the last run
+        self.h_table = None  # heuristic value of each cell id against the source of the last run
+        self.connectivity, self.corner_rule = None, None  # moves of the maze the search is made with
+        self.moves = None  # (row, column) step of each move
+        maze.revision.watchers.add(self)
+
+    def cell_changed(self, cell):
+        """
+            Its job is to remember a changed cell of the maze to be repaired on the next run
+        :param cell: the changed cell (a Cell of a Maze or id of a cell of a CompactMaze)
+        :return: None
+        """
+        self.changed_cells.add(self.id_of(cell))
+
+    def n_bytes(self):
+        """
+            Its job is to give the size of the arrays the planner keeps for the cells
+        :return: the size in bytes, the frontier is not counted
+        """
+        arrays = [self.passed_distance, self.lookahead_distance, self.open_cells, self.costs]
+        return sum(len(cells) * cells.itemsize for cells in arrays if cells is not None) + \
+            (table_bytes(self.h_table) if self.h_table is not None else 0)
+
+    def id_of(self, cell):
+        """
+            Its job is to convert a cell of the maze to its id (row * n_columns + column)
+        :param cell: a cell of a Maze or id of a cell of a CompactMaze
+        :return: id of the cell
+        """
+        if isinstance(self.maze, CompactMaze):
+            return cell
+        return cell.coords.row * self.n_columns + cell.coords.column
+
+    def read_cell(self, cell):
+        """
+            Its job is to read whether a cell of the maze can be passed and its cost
+        :param cell: id of a cell
+        :return: (1 if the cell is not an obstacle and 0 otherwise, cost of the cell)
+        """
+        if isinstance(self.maze, CompactMaze):
+            return int(self.maze.types[cell] != CellTypes.Obstacle.value), self.maze.costs[cell]
+        maze_cell = self.maze.grid[cell // self.n_columns][cell % self.n_columns]
+        return int(maze_cell.type != CellTypes.Obstacle.value), maze_cell.cost
+
+    def neighbors_of(self, cell):
+        """
+            Its job is to find the neighbors of a cell inside the maze, obstacles included
+        :param cell: id of a cell
+        :return: list of ids of the neighbors in row-major order
+        """
+        n_columns = self.n_columns
+        row, column = divmod(cell, n_columns)
+        return [cell + d_row * n_columns + d_column for d_row, d_column in self.moves
+                if 0 <= row + d_row < self.n_rows and 0 <= column + d_column < n_columns]
+
+    def moves_from(self, cell):
+        """
+            Its job is to find the neighbors a cell can move to, by the cells which are known to be open
+        :param cell: id of a cell
+        :return: list of ids of the neighbors in row-major order
+        """
+        open_cells, n_columns = self.open_cells, self.n_columns
+        row = cell // n_columns
+        neighbors = []
+        for neighbor_cell in self.neighbors_of(cell):
+            if not open_cells[neighbor_cell]:
+                continue
+            d_row, d_column = neighbor_cell // n_columns - row, neighbor_cell % n_columns - cell % n_columns
+            if d_row and d_column and not can_cut(self.corner_rule, bool(open_cells[cell + d_column]),
+                                                  bool(open_cells[cell + d_row * n_columns])):
+                continue
+            neighbors.append(neighbor_cell)
+        return neighbors
+
+    def set_source(self, source):
+        """
+            Its job is to move the source of the planner and compute the heuristic values against it
+        :param source: id of the new source
+        :return: None
+        """
+        self.source = source
+        self.h_table = compute_heuristic_table(self.n_rows, self.n_columns, source, self.h, self.connectivity)
+
+    def key(self, cell):
+        """
+            Its job is to calculate the priority of a cell in the frontier
+        :param cell: id of a cell
+        :return: (estimated length of the path through the cell, distance of the cell to the target)
+        """
+        distance = min(self.passed_distance[cell], self.lookahead_distance[cell])
+        return distance + self.h_table[cell] + self.key_modifier, distance
+
+    def restart(self):
+        """
+            Its job is to throw away the search and start a new one from the target
+        :return: None
+        """
+        n_cells = self.n_rows * self.n_columns
+        if isinstance(self.maze, CompactMaze):
+            self.open_cells = bytearray(cell_type != CellTypes.Obstacle.value for cell_type in self.maze.types)
+            self.costs = array('d', list(self.maze.costs))
+        else:
+            self.open_cells = bytearray(cell.type != CellTypes.Obstacle.value for row in self.maze.grid for cell in row)
+            self.costs = array('d', (cell.cost for row in self.maze.grid for cell in row))
+        self.passed_distance = array('d', [float("inf")]) * n_cells
+        self.lookahead_distance = array('d', [float("inf")]) * n_cells
+        self.lookahead_distance[self.target] = 0
+        self.key_modifier = 0
+        self.open_keys = {self.target: self.key(self.target)}
+        self.frontier = [(self.open_keys[self.target], self.target)]
+
+    def update_cell(self, cell):
+        """
+            Its job is to calculate the lookahead distance of a cell again and put it in the frontier if it is not
+            consistent (its distance and lookahead distance differ) or take it out otherwise
+        :param cell: id of a cell
+        :return: None
+        """
+        if cell != self.target:
+            lookahead_distance = float("inf")
+            if self.open_cells[cell]:
+                costs, passed_distance = self.costs, self.passed_distance
+                for neighbor_cell in self.moves_from(cell):
+                    if costs[neighbor_cell] + passed_distance[neighbor_cell] < lookahead_distance:
+                        lookahead_distance = costs[neighbor_cell] + passed_distance[neighbor_cell]
+            self.lookahead_distance[cell] = lookahead_distance
+        if self.passed_distance[cell] != self.lookahead_distance[cell]:
+            self.open_keys[cell] = self.key(cell)
+            heapq.heappush(self.frontier, (self.open_keys[cell], cell))
+        else:
+            self.open_keys.pop(cell, None)
+
+    def top(self):
+        """
+            Its job is to drop the stale entries from the top of the frontier
+        :return: the (key, cell id) entry with the lowest key or None if the frontier is empty
+        """
+        while self.frontier and self.open_keys.get(self.frontier[0][1]) != self.frontier[0][0]:
+            heapq.heappop(self.frontier)
+        return self.frontier[0] if self.frontier else None
+
+    def compute(self, on_expand=None):
+        """
+            Its job is to expand the cells of the frontier until the distance of the source is final
+        :param on_expand: a function called with the id of every expanded cell, like drawing it
+        :return: None
+        """
+        source = self.source
+        self.memory = len(self.frontier)
+        while True:
+            entry = self.top()
+            if entry is None or (entry[0] >= self.key(source) and
+                                 self.lookahead_distance[source] == self.passed_distance[source]):
+                break
+            old_key, cell = entry
+            new_key = self.key(cell)
+            if old_key < new_key:  # the key is lowered by the moves of the source, it is put back with the right key
+                self.open_keys[cell] = new_key
+                heapq.heapreplace(self.frontier, (new_key, cell))
+                continue
+            heapq.heappop(self.frontier)
+            del self.open_keys[cell]
+            self.n_expanded_cells += 1
+            if self.passed_distance[cell] > self.lookahead_distance[cell]:  # the distance of the cell is improved
+                self.passed_distance[cell] = self.lookahead_distance[cell]
+            else:  # the distance of the cell got worse, it is calculated again from its neighbors
+                self.passed_distance[cell] = float("inf")
+                self.update_cell(cell)
+            for neighbor_cell in self.neighbors_of(cell):
+                self.update_cell(neighbor_cell)
+            self.memory = max(self.memory, len(self.open_keys))
+            if on_expand is not None:
+                on_expand(cell)
+
+    def plan(self, source, on_expand=None):
+        """
+            Its job is to find the distance from the source to the target, repairing the search of the last run when
+            the target and the moves of the maze are the same or starting a new search otherwise
+        :param source: a cell of a Maze or id of a cell of a CompactMaze
+        :param on_expand: a function called with the id of every expanded cell, like drawing it
+        :return: the distance from the source to the target, inf if it cannot be reached
+        """
+        if self.maze.target is None:
+            raise Exception("Maze is not complete to start! Target is not determined.")
+        source, target = self.id_of(source), self.id_of(self.maze.target)
+        self.n_expanded_cells = 0
+        if self.passed_distance is None or target != self.target or \
+                (self.maze.connectivity, self.maze.corner_rule) != (self.connectivity, self.corner_rule):
+            self.target = target
+            self.connectivity, self.corner_rule = self.maze.connectivity, self.maze.corner_rule
+            self.moves = moves_of[self.connectivity]
+            self.set_source(source)
+            self.restart()
+        else:
+            if source != self.source:
+                self.key_modifier += self.h_table[source]  # the heuristic is symmetric
+                self.set_source(source)
+            for cell in self.changed_cells:
+                self.open_cells[cell], self.costs[cell] = self.read_cell(cell)
+            for cell in self.changed_cells:
+                self.update_cell(cell)
+                for neighbor_cell in self.neighbors_of(cell):
+                    self.update_cell(neighbor_cell)
+        self.changed_cells.clear()
+        self.compute(on_expand)
+        return self.passed_distance[source]
+
+    def path(self):
+        """
+            Its job is to follow the search from the source to the target, always moving to the neighbor which is the
+            closest one to the target
+        :return: list of the ids of the cells of the path or None if there is no path
+        """
+        if self.passed_distance[self.source] == float("inf"):
+            return None
+        cell, path = self.source, [self.source]
+        while cell != self.target:
+            cell = min(self.moves_from(cell),
+                       key=lambda neighbor_cell: self.costs[neighbor_cell] + self.passed_distance[neighbor_cell])
+            path.append(cell)
+        return path
@@ -0,0 +1,57 @@
+def directions_of(d_row, d_column):
+    """
+        Its job is to give the directions worth trying from a jump point, based on the direction it is reached from
+        (4-connected movement, so a cell is reached in a straight line)
+    :param d_row: row direction the jump point is reached in (-1, 0 or 1), both 0 for the source
+    :param d_column: column direction the jump point is reached in (-1, 0 or 1), both 0 for the source
+    :return: list of (d_row, d_column) directions
+    """
+    if d_row == 0 and d_column == 0:
+        return [(-1, 0), (0, -1), (0, 1), (1, 0)]
+    if d_column != 0:  # reached horizontally
+        return [(-1, 0), (1, 0), (0, d_column)]
+    return [(0, -1), (0, 1), (d_row, 0)]  # reached vertically
+
+
+def jump(is_open, row, column, d_row, d_column, target):
+    """
+        Its job is to move from a cell in a direction until a jump point is found, the target or a cell having a forced
+        neighbor (a neighbor which can only be reached optimally through it)
+    :param is_open: a function of (row, column) which is True for the cells inside the maze which are not obstacles
+    :param row: row of the cell to start from
+    :param column: column of the cell to start from
+    :param d_row: row direction of moving (-1, 0 or 1)
+    :param d_column: column direction of moving (-1, 0 or 1)
+    :param target: (row, column) of the target
+    :return: (row, column) of the jump point or None if there is no jump point in that direction
+    """
+    while True:
+        row, column = row + d_row, column + d_column
+        if not is_open(row, column):
+            return None
+        if (row, column) == target:
+            return row, column
+        if d_column != 0:  # moving horizontally
+            if (is_open(row - 1, column) and not is_open(row - 1, column - d_column)) or \
+                    (is_open(row + 1, column) and not is_open(row + 1, column - d_column)):
+                return row, column
+        else:  # moving vertically
+            if (is_open(row, column - 1) and not is_open(row - d_row, column - 1)) or \
+                    (is_open(row, column + 1) and not is_open(row - d_row, column + 1)):
+                return row, column
+            # a vertical move stops where a horizontal move from the cell finds a jump point
+            if jump(is_open, row, column, 0, 1, target) is not None or \
+                    jump(is_open, row, column, 0, -1, target) is not None:
+                return row, column
+
+
+def direction(from_row, from_column, to_row, to_column):
+    """
+        Its job is to find the direction of moving from a cell to another one in the same row or column
+    :param from_row: row of the first cell
+    :param from_column: column of the first cell
+    :param to_row: row of the second cell
+    :param to_column: column of the second cell
+    :return: (d_row, d_column) direction
+    """
+    return (to_row > from_row) - (to_row < from_row), (to_column > from_column) - (to_column < from_column)
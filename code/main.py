@@ -1,45 +1,219 @@
+import argparse
+import contextlib
 import os
 import sys
+import time
 import heuristics
 import structures
+import compact_structures
+import maze_format
 import pygame
+import animation
 from user_interface import UI
-from algorithms import dfs, bfs, a_star, greedy_best_first_search, AlgorithmTypes
+from event_trace import TraceRecorder, Trace
+from components import components_of
+from profiler import Profiler
+from result_writer import ResultWriter, result_chunks, output_formats, path_formats
+from algorithms import dfs, bfs, a_star, greedy_best_first_search, wavefront_bfs, optimized_a_star, \
+    jump_point_search, bidirectional_bfs, bidirectional_a_star, d_star_lite, dijkstra, hierarchical_a_star, \
+    AlgorithmTypes
 from heuristics import chebyshev_distance, manhattan_distance, euclidean_distance, HeuristicTypes
+from validation import connectivities, corner_rules
 
-algorithms_list = [dfs, bfs, greedy_best_first_search, a_star]
+algorithms_list = [dfs, bfs, greedy_best_first_search, a_star, wavefront_bfs, optimized_a_star, jump_point_search,
+                   bidirectional_bfs, bidirectional_a_star, d_star_lite, dijkstra, hierarchical_a_star]
+# algorithms using a heuristic
+heuristic_algorithms_list = [greedy_best_first_search, a_star, optimized_a_star, jump_point_search,
+                             bidirectional_a_star, d_star_lite, hierarchical_a_star]
 heuristics_list = [chebyshev_distance, manhattan_distance, euclidean_distance]
 
 
-def solve(maze, algorithm, h=heuristics.manhattan_distance, ui=None):
+def unreachable_result(maze):
+    """
+        Its job is to answer without a search when the target cannot be reached, as the source and the target are in
+        different connected components of the maze
+    :param maze: the given maze, its distances reset
+    :return: the Not Reachable result of any algorithm, or None if the target can be reached and a search is needed
+    """
+    start_time = time.process_time()
+    if maze.source is None or maze.target is None:
+        return None
+    if isinstance(maze, compact_structures.CompactMaze):
+        source, target = maze.source, maze.target
+    else:
+        source, target = maze.source.id, maze.target.id
+    if components_of(maze).is_connected(source, target):
+        return None
+    return {"total_distance": float("inf"), "time": time.process_time() - start_time, "checked_cells_no": 0,
+            "memory": 0}
+
+
+def solve(maze, algorithm, h=heuristics.manhattan_distance, ui=None, cache=None, profiler=None):
     """
         Its job is to solve the maze using the given algorithm and data
     :param maze: the given maze
     :param algorithm: the chosen algorithm
     :param h: the selected heuristic function
     :param ui: the given user interface
-    :return: result of the algorithm in solving the maze
-    """
-    maze.reset_distances()
-    result = algorithm(maze, None, h, ui)
-    if result["total_distance"] != float("inf") and result["total_distance"] != -1:
-        path = structures.calc_path(maze)
-        result["path"] = path
-    return result
-
-
-# setting recursion for running dfs as a recursive function is required in python
-sys.setrecursionlimit(10**6)
-if len(sys.argv) < 2:
-    # default set-up of UI
-    data = {
-        "n_rows": 38,
-        "n_columns": 70,
-        "source": (10, 10),
-        "target": (20, 40),
-        "obstacles": []
-    }
+    :param cache: a SolveCache to look the result up in and keep it, it is not used while drawing on a user interface.
+        A cached result has its path but the search data of the cells is not filled, its time is the time of looking
+        it up and it is marked with cached: True.
+    :param profiler: a started Profiler to profile the run with, which is not profiled by default
+    :return: result of the algorithm in solving the maze, a target out of the component of the source is answered
+        without a search
+    """
+    search = algorithm
+    run = contextlib.nullcontext()
+    if profiler is not None:
+        search = profiler.timed(algorithm, "search")
+        run = profiler.run(algorithm.__name__, h.__name__ if algorithm in heuristic_algorithms_list else None)
+    with run:
+        key = None
+        if cache is not None and ui is None:
+            start_time = time.process_time()
+            key = cache.key_of(maze, algorithm, h)
+            result = cache.get(key, maze)
+            if result is not None:
+                result["time"] = time.process_time() - start_time
+                return result
+        maze.reset_distances()
+        result = unreachable_result(maze)
+        if result is None:
+            result = search(maze, None, h, ui)
+        if result["total_distance"] != float("inf") and result["total_distance"] != -1:
+            if isinstance(maze, compact_structures.CompactMaze):
+                path = compact_structures.calc_path(maze)
+            else:
+                path = structures.calc_path(maze)
+            result["path"] = path
+        if key is not None:
+            cache.put(key, maze, result)
+        return result
+
+
+def jobs_of(algorithms, heuristic_functions):
+    """
+        Its job is to list the runs of the given algorithms, each algorithm using a heuristic runs with every heuristic
+    :param algorithms: the chosen algorithms
+    :param heuristic_functions: the chosen heuristic functions
+    :return: a list of (algorithm, heuristic function) pairs in the order of the output
+    """
+    jobs = []
+    for algo in algorithms:
+        h_list = [heuristics_list[1]]
+        if algo in heuristic_algorithms_list:
+            h_list = heuristic_functions
+        for h in h_list:
+            jobs.append((algo, h))
+    return jobs
+
+
+def format_result(algo, h, res, output_format="text", path_format="coords"):
+    """
+        Its job is to turn the result of running an algorithm to the pieces of the output
+    :param algo: the algorithm
+    :param h: the heuristic function
+    :param res: result of the algorithm in solving the maze
+    :param output_format: text for the text report or jsonl for one JSON object per line
+    :param path_format: format of the paths in jsonl, coords or directions
+    :return: a list of the pieces of the output
+    """
+    return list(result_chunks(algo.__name__, h.__name__ if algo in heuristic_algorithms_list else None, res,
+                              output_format, path_format))
+
+
+def output_address(test_file_address, output_format="text"):
+    """
+        Its job is to give the address of the output file of a test in outputs directory
+    :param test_file_address: address of the test file
+    :param output_format: text or jsonl, which decides the extension of the output file
+    :return: address of the output file
+    """
+    if not os.path.isdir("./outputs/"):
+        os.mkdir("./outputs/")
+    extension = '.jsonl' if output_format == "jsonl" else '.txt'
+    return "./outputs/" + os.path.splitext(os.path.basename(test_file_address))[0] + extension
+
+
+def solve_traced(maze, algorithm, h=heuristics.manhattan_distance, profiler=None):
+    """
+        Its job is to solve the maze once without drawing, recording the cells the algorithm would draw, so the run
+        measures its own time and can be animated afterwards
+    :param maze: the given maze
+    :param algorithm: the chosen algorithm
+    :param h: the selected heuristic function
+    :param profiler: a started Profiler to profile the run with, which is not profiled by default
+    :return: result of the algorithm in solving the maze and the Trace of the run
+    """
+    recorder = TraceRecorder(maze)
+    result = solve(maze, algorithm, h, recorder, profiler=profiler)
+    return result, Trace.of_run(maze, result, recorder)
+
+
+def trace_address(algorithm, h):
+    """
+        Its job is to give the address of the trace file of a run in outputs/traces directory
+    :param algorithm: the algorithm of the run
+    :param h: the heuristic function of the run
+    :return: address of the trace file
+    """
+    if not os.path.isdir("./outputs/traces/"):
+        os.makedirs("./outputs/traces/")
+    return "./outputs/traces/" + algorithm.__name__ + \
+        ('-' + h.__name__ if algorithm in heuristic_algorithms_list else '') + '.trace'
+
+
+def animation_address(test_file_address, algorithm, h, image_format="gif"):
+    """
+        Its job is to give the address of the animation of a run of a test in outputs/animations directory
+    :param test_file_address: address of the test file
+    :param algorithm: the algorithm of the run
+    :param h: the heuristic function of the run
+    :param image_format: gif for an animated GIF or png for a sequence of PNG files
+    :return: address of the GIF file or of the first PNG file
+    """
+    os.makedirs("./outputs/animations/", exist_ok=True)  # the workers of a batch may make it at the same time
+    return "./outputs/animations/" + os.path.splitext(os.path.basename(test_file_address))[0] + '-' + \
+        algorithm.__name__ + ('-' + h.__name__ if algorithm in heuristic_algorithms_list else '') + '.' + image_format
+
+
+def profile_address(test_file_address, extension="json"):
+    """
+        Its job is to give the address of the profile file of a test in outputs/profiles directory
+    :param test_file_address: address of the test file
+    :param extension: json for the summary of the profile or trace.json for its Chrome trace-event file
+    :return: address of the profile file
+    """
+    os.makedirs("./outputs/profiles/", exist_ok=True)
+    return "./outputs/profiles/" + os.path.splitext(os.path.basename(test_file_address))[0] + '.' + extension
+
+
+def set_moves(maze, connectivity=None, corner_rule=None):
+    """
+        Its job is to change the moves of a maze to the ones given in the command line, keeping the ones of its test
+        for what is not given
+    :param maze: the maze (Maze or CompactMaze)
+    :param connectivity: 4, 8 or None
+    :param corner_rule: strict, cut, squeeze or None
+    :return: the maze
+    """
+    if maze is not None and (connectivity is not None or corner_rule is not None):
+        maze.set_connectivity(connectivity or maze.connectivity, corner_rule or maze.corner_rule)
+    return maze
+
+
+def run_gui(data, trace=None):
+    """
+        Its job is to run the user interface on a maze. Every run is solved once without drawing and then its trace is
+        animated at the chosen speed. S saves the trace of the last run, R replays it and up and down change the speed.
+    :param data: a dictionary of data of the maze
+    :param trace: a Trace to be replayed on the maze at the start
+    :return: None
+    """
     maze = structures.Maze.build(data)
+    if maze is None:
+        print("The maze data is not valid!")
+        exit(0)
     ui = UI(maze=maze)
     mouse_button_down = False
     erase_mode = False
@@ -51,6 +225,9 @@ if len(sys.argv) < 2:
     ui.fill_dfs_algo_rb()
     ui.fill_source_mode_rb()
     ui.fill_manhattan_heu_rb()
+    last_run = None  # (algorithm, heuristic function) of the last run
+    if trace is not None:
+        ui.show_trace(trace)
 
     while True:
         for event in pygame.event.get():
@@ -65,11 +242,9 @@ if len(sys.argv) < 2:
                     if c >= ui.maze.n_columns or r >= ui.maze.n_rows:  # it means no cell is clicked and maybe a buttion is clicked
                         draw_mode, algorithm_mode, heuristic, erase_mode, is_run = ui.click_button(pcoords, draw_mode, algorithm_mode, heuristic, erase_mode)
                         if is_run:
-                            ui.clean_display()
-                            res = solve(ui.maze, algorithms_list[algorithm_mode], heuristics_list[heuristic], ui)
-                            res2 = solve(ui.maze, algorithms_list[algorithm_mode], heuristics_list[heuristic])
-                            t = res2.get("time")
-                            ui.draw_result(res, t)
+                            last_run = (algorithms_list[algorithm_mode], heuristics_list[heuristic])
+                            trace = solve_traced(ui.maze, *last_run)[1]
+                            ui.show_trace(trace)
                     else:
                         mouse_button_down = True
                         if erase_mode:
@@ -81,11 +256,18 @@ if len(sys.argv) < 2:
                     mouse_button_down = False
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_RETURN:
-                    ui.clean_display()
-                    res = solve(ui.maze, algorithms_list[algorithm_mode], heuristics_list[heuristic], ui)
-                    res2 = solve(ui.maze, algorithms_list[algorithm_mode], heuristics_list[heuristic])
-                    t = res2.get("time")
-                    ui.draw_result(res, t)
+                    last_run = (algorithms_list[algorithm_mode], heuristics_list[heuristic])
+                    trace = solve_traced(ui.maze, *last_run)[1]
+                    ui.show_trace(trace)
+                elif event.key == pygame.K_r and trace is not None:  # replaying without solving again
+                    ui.show_trace(trace)
+                elif event.key == pygame.K_s and trace is not None and last_run is not None:
+                    trace.save(trace_address(*last_run))
+                    print(f"The trace is saved in {trace_address(*last_run)}")
+                elif event.key in (pygame.K_UP, pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                    ui.change_speed(1)
+                elif event.key in (pygame.K_DOWN, pygame.K_MINUS, pygame.K_KP_MINUS):
+                    ui.change_speed(-1)
             elif event.type == pygame.MOUSEMOTION:  # for smoothly putting and removing obstacles
                 p = pygame.mouse.get_pos()
                 pcoords = structures.Coords(column=p[0], row=p[1])
@@ -94,40 +276,87 @@ if len(sys.argv) < 2:
                         ui.modify_cell(pcoords, structures.CellTypes.Normal.value)
                     else:
                         ui.modify_cell(pcoords, draw_mode)
-        pygame.display.flip()
-
-elif len(sys.argv) != 2:
-    print(
-        "Missing or additional arguments! Please run again and if you want to run program on a test provide its relative address.")
-    exit(0)
-else:
-    maze = structures.Maze.build(file_address=sys.argv[1])
-    if maze is None:
-        print("The test data is not valid!")
-        exit(0)
+        # the animated run goes on a frame at a time, so the events are handled while it is shown
+        ui.play_frame()
+        ui.present()
 
-    output_lines = []
-    for algo in algorithms_list:
-        h_list = [heuristics_list[1]]
-        if algo in [greedy_best_first_search, a_star]:
-            h_list = heuristics_list
-        for h in h_list:
-            res = solve(maze, algo, h)
-            output_lines.append(algo.__name__ + (' ' + h.__name__ if algo in [greedy_best_first_search, a_star] else '') + ' -> ' + 'Result:\n')
-            for key in res:
-                if key == "total_distance":
-                    if res.get(key) == float("inf"):
-                        output_lines.append(f'{key}: Not Reachable\n')
-                    else:
-                        output_lines.append(f'{key}: {int(res.get(key))}\n')
-                elif key == "time":
-                    output_lines.append(f'{key}: {round(res.get(key), 10)}\n')
-                else:
-                    output_lines.append(f'{key}: {res.get(key)}\n')
-            output_lines.append('\n')
-    if not os.path.isdir("./outputs/"):
-        os.mkdir("./outputs/")
-    output_file_name = sys.argv[1][8:-4] + 'txt'
-    with open("./outputs/" + output_file_name, "w") as output_file:
-        for line in output_lines:
-            output_file.write(line)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        # default set-up of UI
+        data = {
+            "n_rows": 38,
+            "n_columns": 70,
+            "source": (10, 10),
+            "target": (20, 40),
+            "obstacles": []
+        }
+        run_gui(data)
+    elif sys.argv[1] == "--replay":
+        # a saved trace is replayed on its own maze without solving it
+        if len(sys.argv) != 3:
+            raise Exception("Missing or additional arguments! Please provide the address of a trace file to replay.")
+        saved_trace = Trace.load(sys.argv[2])
+        run_gui(saved_trace.maze_data, saved_trace)
+    elif os.path.isdir(sys.argv[1]) or any(ch in sys.argv[1] for ch in "*?["):
+        # a directory or a glob of tests runs in batch mode over a pool of processes
+        import batch
+        batch.main(sys.argv[1:])
+    else:
+        parser = argparse.ArgumentParser(prog="main.py", description="Solve a test with all the algorithms.")
+        parser.add_argument("test", help="relative address of a JSON or binary test")
+        # --compact keeps the maze in flat arrays which is needed for very large mazes
+        parser.add_argument("--compact", action="store_true", help="keep the maze in flat arrays")
+        parser.add_argument("--format", choices=output_formats, default="text",
+                            help="text report or one JSON object per result (jsonl)")
+        parser.add_argument("--path-format", choices=path_formats, default="coords",
+                            help="paths in jsonl as [row, column] lists or run-length direction strings")
+        parser.add_argument("--animate", choices=animation.image_formats, default=None,
+                            help="export an animation of every run to outputs/animations as a GIF or PNG frames")
+        parser.add_argument("--every", type=int, default=None,
+                            help="number of events between two frames of the animations (default: about 100 frames)")
+        parser.add_argument("--connectivity", type=int, choices=connectivities, default=None,
+                            help="4 straight moves or 8 with the diagonal ones (default: the one of the test or 4)")
+        parser.add_argument("--corner-rule", choices=corner_rules, default=None,
+                            help="diagonal moves around obstacles (default: the one of the test or strict)")
+        parser.add_argument("--profile", action="store_true",
+                            help="profile the runs to outputs/profiles as JSON and as a Chrome trace-event file")
+        parser.add_argument("--no-memory", action="store_true",
+                            help="do not trace the allocations while profiling, which slows the runs down several times")
+        args = parser.parse_args()
+        if args.animate is not None and args.compact:
+            parser.error("A compact maze cannot be animated!")
+        if args.every is not None and args.every < 1:
+            parser.error("Number of events between two frames must be at least 1!")
+        if args.no_memory and not args.profile:
+            parser.error("--no-memory is only used with --profile!")
+        # building the maze is profiled too, so the profiler is started first
+        profiler = Profiler(trace_memory=not args.no_memory).start() if args.profile else None
+        # a binary test can be too large for a Cell object of each cell, so it is kept in flat arrays unless it is
+        # animated
+        if args.compact or (args.animate is None and maze_format.is_binary(args.test)):
+            maze = compact_structures.CompactMaze.build(file_address=args.test)
+        else:
+            maze = structures.Maze.build(file_address=args.test)
+        set_moves(maze, args.connectivity, args.corner_rule)
+        if maze is None:
+            print("The test data is not valid!")
+            exit(0)
+
+        # each result is written as soon as it is found, so the whole report is never kept in memory. Every
+        # (algorithm, heuristic) pair of one maze is solved once, so a SolveCache would never be hit here and it is
+        # only used by batch runs, where the same maze can be in several files
+        with open(output_address(args.test, args.format), "w") as output_file:
+            writer = ResultWriter(output_file, args.format, args.path_format)
+            for algo, h in jobs_of(algorithms_list, heuristics_list):
+                if args.animate is None:
+                    res = solve(maze, algo, h, profiler=profiler)
+                else:  # the run is recorded and rendered without a display
+                    res, trace = solve_traced(maze, algo, h, profiler)
+                    animation.export_trace(trace, animation_address(args.test, algo, h, args.animate), args.animate,
+                                           args.every)
+                writer.write(algo.__name__, h.__name__ if algo in heuristic_algorithms_list else None, res)
+        if profiler is not None:
+            profiler.stop()
+            profiler.save(profile_address(args.test))
+            profiler.save_chrome_trace(profile_address(args.test, "trace.json"))
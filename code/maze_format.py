@@ -0,0 +1,226 @@
+import json
+import mmap
+import struct
+import sys
+import numpy as np
+from validation import is_valid, max_cost, corner_rules
+
+# A binary maze file is a header and then the obstacle bitmap of the cells in row-major order, one bit per cell
+# (bit i % 8 of byte i // 8 is cell i, 1 means obstacle). The header is the magic, number of rows, number of columns,
+# source row, source column, target row and target column as little-endian unsigned 32-bit numbers, and then the
+# connectivity (4 or 8) and the index of the corner rule in validation.corner_rules as one byte each. A maze with
+# weighted cells has the costs of its cells after the bitmap, one byte per cell in row-major order.
+MAGIC = b"MAZE"
+HEADER = struct.Struct("<4s6I2B")
+
+
+def is_binary(file_address):
+    """
+        Its job is to check whether a file is a binary maze file by its magic
+    :param file_address: address of the file
+    :return: True if the file is a binary maze file and False otherwise
+    """
+    with open(file_address, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+class MazeFile:
+    def __init__(self, file_address):
+        """
+            Its job is to open a binary maze file as a memory map, so only the header is read and the obstacle bitmap
+            is used from the map without parsing
+        :param file_address: address of the binary maze file
+        """
+        with open(file_address, "rb") as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.map) < HEADER.size:
+            self.map.close()
+            raise Exception("The binary maze file is truncated!")
+        magic, self.n_rows, self.n_columns, source_row, source_column, target_row, target_column, \
+            self.connectivity, corner_rule = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            self.map.close()
+            raise Exception("The file is not a binary maze file!")
+        if corner_rule >= len(corner_rules):
+            self.map.close()
+            raise Exception("The corner rule of the binary maze file is not known!")
+        self.corner_rule = corner_rules[corner_rule]
+        n_cells = self.n_rows * self.n_columns
+        bitmap_end = HEADER.size + (n_cells + 7) // 8
+        if len(self.map) < bitmap_end:
+            self.map.close()
+            raise Exception("The binary maze file is truncated!")
+        self.source = (source_row, source_column)
+        self.target = (target_row, target_column)
+        self.bitmap = memoryview(self.map)[HEADER.size:bitmap_end]
+        self.costs = None  # the costs of the cells, None if all of them cost 1
+        if len(self.map) > bitmap_end:
+            if len(self.map) < bitmap_end + n_cells:
+                self.bitmap.release()
+                self.map.close()
+                raise Exception("The binary maze file is truncated!")
+            self.costs = memoryview(self.map)[bitmap_end:bitmap_end + n_cells]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+            Its job is to release the memory map of the file
+        :return: None
+        """
+        self.bitmap.release()
+        if self.costs is not None:
+            self.costs.release()
+        self.map.close()
+
+    def is_obstacle(self, row, column):
+        """
+            Its job is to check whether a cell is an obstacle
+        :param row: row of the cell
+        :param column: column of the cell
+        :return: True if the cell is an obstacle and False otherwise
+        """
+        cell = row * self.n_columns + column
+        return bool(self.bitmap[cell >> 3] >> (cell & 7) & 1)
+
+    def obstacle_grid(self):
+        """
+            Its job is to unpack the obstacle bitmap
+        :return: a numpy array of shape (n_rows, n_columns) which is 1 for obstacles and 0 for other cells
+        """
+        bits = np.unpackbits(np.frombuffer(self.bitmap, dtype=np.uint8), count=self.n_rows * self.n_columns,
+                             bitorder="little")
+        return bits.reshape(self.n_rows, self.n_columns)
+
+    def cost_grid(self):
+        """
+            Its job is to give the costs of the cells
+        :return: a numpy array of shape (n_rows, n_columns) of the costs, all 1 if the file has no costs
+        """
+        if self.costs is None:
+            return np.ones((self.n_rows, self.n_columns), dtype=np.uint8)
+        costs = np.frombuffer(self.costs, dtype=np.uint8).reshape(self.n_rows, self.n_columns)
+        if not costs.all():
+            raise Exception(f"Costs must be from 1 to {max_cost}!")
+        return costs
+
+    def header_data(self):
+        """
+            Its job is to give the header in the form of the data of a JSON test without the obstacles
+        :return: a dictionary of data with an empty list of obstacles, the moves are only in it if they are not the
+            default ones like in a JSON test
+        """
+        data = {"n_rows": self.n_rows, "n_columns": self.n_columns, "source": list(self.source),
+                "target": list(self.target), "obstacles": []}
+        if self.connectivity != 4:
+            data["connectivity"] = self.connectivity
+        if self.corner_rule != "strict":
+            data["corner_rule"] = self.corner_rule
+        return data
+
+
+def write_binary(data, file_address):
+    """
+        Its job is to write the data of a maze to a binary maze file
+    :param data: a dictionary of data of the maze, in the form of a JSON test
+    :param file_address: address of the binary maze file
+    :return: None
+    """
+    if not is_valid(data):
+        raise Exception("The test data is not valid!")
+    n_rows, n_columns = data.get("n_rows"), data.get("n_columns")
+    obstacles = np.asarray(data.get("obstacles"), dtype=np.int64).reshape(-1, 2)
+    costs = None
+    if data.get("costs"):
+        cell_costs = np.asarray(data.get("costs"), dtype=np.int64).reshape(-1, 3)
+        costs = np.ones(n_rows * n_columns, dtype=np.uint8)
+        costs[cell_costs[:, 0] * n_columns + cell_costs[:, 1]] = cell_costs[:, 2]
+    write_obstacle_ids(file_address, n_rows, n_columns, data.get("source"), data.get("target"),
+                       obstacles[:, 0] * n_columns + obstacles[:, 1], costs, data.get("connectivity", 4),
+                       data.get("corner_rule", "strict"))
+
+
+def write_obstacle_ids(file_address, n_rows, n_columns, source, target, obstacles, costs=None, connectivity=4,
+                       corner_rule="strict"):
+    """
+        Its job is to write a maze to a binary maze file from the ids of its obstacles (row * n_columns + column)
+    :param file_address: address of the binary maze file
+    :param n_rows: number of rows
+    :param n_columns: number of columns
+    :param source: (row, column) of the source
+    :param target: (row, column) of the target
+    :param obstacles: array of the ids of the obstacle cells
+    :param costs: array of the costs of the cells by id, None if all of them cost 1
+    :param connectivity: 4 for straight moves or 8 for straight and diagonal moves
+    :param corner_rule: rule of the diagonal moves around obstacles (strict, cut or squeeze)
+    :return: None
+    """
+    bits = np.zeros(n_rows * n_columns, dtype=np.uint8)
+    bits[obstacles] = 1
+    with open(file_address, "wb") as file:
+        file.write(HEADER.pack(MAGIC, n_rows, n_columns, *source, *target, connectivity,
+                               corner_rules.index(corner_rule)))
+        file.write(np.packbits(bits, bitorder="little").tobytes())
+        if costs is not None and (costs != 1).any():
+            file.write(np.asarray(costs, dtype=np.uint8).tobytes())
+
+
+def read_data(file_address):
+    """
+        Its job is to read a binary maze file in the form of the data of a JSON test
+    :param file_address: address of the binary maze file
+    :return: a dictionary of data of the maze
+    """
+    with MazeFile(file_address) as maze_file:
+        data = maze_file.header_data()
+        data["obstacles"] = np.argwhere(maze_file.obstacle_grid()).tolist()
+        if maze_file.costs is not None:
+            data["costs"] = cost_list(maze_file.cost_grid())
+    return data
+
+
+def cost_list(cost_grid):
+    """
+        Its job is to list the costs of the cells which do not cost 1, in the form of the costs of a JSON test
+    :param cost_grid: a numpy array of shape (n_rows, n_columns) of the costs
+    :return: a list of [row, column, cost]
+    """
+    weighted_cells = np.argwhere(cost_grid != 1)
+    return np.column_stack((weighted_cells, cost_grid[cost_grid != 1])).tolist()
+
+
+def json_to_binary(json_file_address, binary_file_address):
+    """
+        Its job is to convert a JSON test to a binary maze file
+    :param json_file_address: address of the JSON test
+    :param binary_file_address: address of the binary maze file
+    :return: None
+    """
+    with open(json_file_address, "r") as json_file:
+        write_binary(json.load(json_file), binary_file_address)
+
+
+def binary_to_json(binary_file_address, json_file_address):
+    """
+        Its job is to convert a binary maze file to a JSON test
+    :param binary_file_address: address of the binary maze file
+    :param json_file_address: address of the JSON test
+    :return: None
+    """
+    with open(json_file_address, "w") as json_file:
+        json_file.write(json.dumps(read_data(binary_file_address)))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] not in ("to-binary", "to-json"):
+        print("Usage: python maze_format.py to-binary <test>.json <test>.maze\n"
+              "       python maze_format.py to-json <test>.maze <test>.json")
+        exit(0)
+    if sys.argv[1] == "to-binary":
+        json_to_binary(sys.argv[2], sys.argv[3])
+    else:
+        binary_to_json(sys.argv[2], sys.argv[3])
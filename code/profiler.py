@@ -0,0 +1,230 @@
+import functools
+import heapq
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+import adjacency
+import algorithms
+import compact_structures
+import components
+import incremental
+import result_writer
+import structures
+
+# phases of solving a maze, in the order they are reported
+phases = ["build", "reset", "components", "search", "neighbors", "heuristic", "heap", "path", "output"]
+# phases each call of which is an event of the Chrome trace, the calls of the others are too many and only summed up
+traced_phases = {"build", "reset", "components", "search", "path", "output"}
+
+
+def instrumented_functions():
+    """
+        Its job is to list the functions timed while profiling, each one where it is looked up when it is called
+    :return: a list of (owner, name of the function in it, phase)
+    """
+    return [(structures.Maze, "build", "build"), (compact_structures.CompactMaze, "build", "build"),
+            (structures.Maze, "reset_distances", "reset"), (compact_structures.CompactMaze, "reset_distances", "reset"),
+            (components.Components, "is_connected", "components"),
+            (adjacency.Adjacency, "build", "neighbors"), (adjacency.Adjacency, "neighbors_of", "neighbors"),
+            (adjacency.MoveMasks, "build", "neighbors"), (adjacency.MoveMasks, "neighbors_of", "neighbors"),
+            (algorithms, "heuristic_table", "heuristic"),
+            (incremental, "compute_heuristic_table", "heuristic"),
+            (heapq, "heappush", "heap"), (heapq, "heappop", "heap"), (heapq, "heapify", "heap"),
+            (heapq, "heapreplace", "heap"),
+            (structures, "calc_path", "path"), (compact_structures, "calc_path", "path"),
+            (algorithms, "fill_jump_path", "path"), (algorithms, "fill_planned_path", "path"),
+            (result_writer.ResultWriter, "write", "output")]
+
+
+class Profiler:
+    def __init__(self, trace_memory=True):
+        """
+            Its job is to initialize a profiler of solving mazes. While it is started, the functions of every phase are
+            replaced by timed ones and the allocations are traced, so solving is not slowed down when it is not used.
+            The time of a phase is only its own: the time of the phases called in it is taken away from it. A part of
+            the cost of measuring a call is counted in the time of its caller, so the phases of many short calls, like
+            the neighbors and the heap ones, are slowed down more than the others.
+        :param trace_memory: whether the allocations are traced with tracemalloc to find the peak of allocated bytes.
+            It makes the code which allocates many objects several times slower, so the times are closer to the ones of
+            an unprofiled run without it.
+        """
+        self.trace_memory = trace_memory
+        self.times = dict.fromkeys(phases, 0)  # own time of each phase in nanoseconds
+        self.calls = dict.fromkeys(phases, 0)  # number of calls of each phase
+        self.stack = []  # [phase, start time, time of the phases called in it] of the running calls
+        self.events = []  # (name, category, start time, duration, arguments) of the events of the Chrome trace
+        self.runs = []  # summary of each run of an algorithm
+        self.originals = []  # (owner, name, original attribute) of the replaced functions
+        self.start_time, self.end_time = None, None
+        self.peak_bytes = 0 if trace_memory else None  # the most bytes allocated at once while profiling
+        self.started_tracing = False  # whether tracemalloc is started by the profiler, so it is stopped by it too
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        """
+            Its job is to start profiling: the functions of the phases are replaced and the allocations are traced
+        :return: the profiler
+        """
+        if self.originals:
+            raise Exception("Profiler is already started!")
+        for owner, name, phase in instrumented_functions():
+            original = vars(owner)[name]
+            if isinstance(original, staticmethod):
+                replacement = staticmethod(self.timed(original.__func__, phase))
+            else:
+                replacement = self.timed(original, phase)
+            self.originals.append((owner, name, original))
+            setattr(owner, name, replacement)
+        self.started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start()
+        self.start_time = time.perf_counter_ns()
+        return self
+
+    def stop(self):
+        """
+            Its job is to stop profiling and to put the original functions back
+        :return: None
+        """
+        self.end_time = time.perf_counter_ns()
+        self.traced_memory()
+        if self.started_tracing:
+            tracemalloc.stop()
+        for owner, name, original in reversed(self.originals):
+            setattr(owner, name, original)
+        self.originals = []
+
+    def traced_memory(self):
+        """
+            Its job is to read the allocated bytes and to keep the peak of them while profiling
+        :return: the bytes allocated now and the most bytes allocated at once since the peak is reset, or None for both
+            if the allocations are not traced
+        """
+        if not self.trace_memory:
+            return None, None
+        current_bytes, peak_bytes = tracemalloc.get_traced_memory()
+        self.peak_bytes = max(self.peak_bytes, peak_bytes)
+        return current_bytes, peak_bytes
+
+    def enter(self, phase):
+        """
+            Its job is to start timing a call of a phase
+        :param phase: the phase
+        :return: None
+        """
+        self.stack.append([phase, time.perf_counter_ns(), 0])
+
+    def leave(self, name, args=None):
+        """
+            Its job is to finish timing the last started call
+        :param name: name of the call in the Chrome trace
+        :param args: arguments of the event of the call in the Chrome trace
+        :return: None
+        """
+        end_time = time.perf_counter_ns()
+        phase, start_time, inner_time = self.stack.pop()
+        duration = end_time - start_time
+        self.times[phase] += duration - inner_time
+        self.calls[phase] += 1
+        if self.stack:
+            self.stack[-1][2] += duration
+        if phase in traced_phases:
+            self.events.append((name, phase, start_time, duration, args))
+
+    def timed(self, function, phase):
+        """
+            Its job is to make a function whose calls are timed as a phase
+        :param function: the function
+        :param phase: the phase of its calls
+        :return: the timed function, with the name of the given one
+        """
+        @functools.wraps(function)
+        def timed_function(*args, **kwargs):
+            self.enter(phase)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.leave(function.__name__)
+        return timed_function
+
+    @contextmanager
+    def run(self, algorithm_name, heuristic_name=None):
+        """
+            Its job is to profile a run of an algorithm, finding its own peak of allocated bytes and time of each phase
+        :param algorithm_name: name of the algorithm
+        :param heuristic_name: name of the heuristic function, None if the algorithm does not use one
+        :return: a context manager around the run
+        """
+        if self.trace_memory:
+            self.traced_memory()
+            tracemalloc.reset_peak()
+        times, calls = dict(self.times), dict(self.calls)
+        start_time = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end_time = time.perf_counter_ns()
+            current_bytes, peak_bytes = self.traced_memory()
+            run_phases = {phase: {"time": (self.times[phase] - times[phase]) / 1e9,
+                                  "calls": self.calls[phase] - calls[phase]} for phase in phases}
+            self.runs.append({"algorithm": algorithm_name, "heuristic": heuristic_name,
+                              "time": (end_time - start_time) / 1e9, "peak_bytes": peak_bytes, "phases": run_phases})
+            name = algorithm_name + (' ' + heuristic_name if heuristic_name is not None else '')
+            self.events.append((name, "run", start_time, end_time - start_time,
+                                {"peak_bytes": peak_bytes, "current_bytes": current_bytes, **run_phases}))
+
+    def report(self):
+        """
+            Its job is to summarize the profile
+        :return: a dictionary of the profile which can be dumped as JSON, times are in seconds
+        """
+        end_time = self.end_time if self.end_time is not None else time.perf_counter_ns()
+        return {"time": (end_time - self.start_time) / 1e9, "peak_bytes": self.peak_bytes,
+                "phases": {phase: {"time": self.times[phase] / 1e9, "calls": self.calls[phase]} for phase in phases},
+                "runs": self.runs}
+
+    def chrome_trace(self):
+        """
+            Its job is to give the events of the profile in the Chrome trace-event format, which chrome://tracing and
+            Perfetto open. The runs and the calls of the traced phases are complete events on one thread and the
+            allocated bytes after each run are a counter.
+        :return: a dictionary of the trace which can be dumped as JSON
+        """
+        pid = os.getpid()
+        trace_events = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": "main.py"}}]
+        for name, category, start_time, duration, args in sorted(self.events, key=lambda event: event[2]):
+            event = {"name": name, "cat": category, "ph": "X", "ts": (start_time - self.start_time) / 1000,
+                     "dur": duration / 1000, "pid": pid, "tid": 0}
+            if args is not None:
+                event["args"] = args
+            trace_events.append(event)
+            if category == "run" and args["peak_bytes"] is not None:
+                trace_events.append({"name": "memory", "ph": "C", "ts": event["ts"] + event["dur"], "pid": pid,
+                                     "tid": 0, "args": {"peak_bytes": args["peak_bytes"],
+                                                        "current_bytes": args["current_bytes"]}})
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def save(self, file_address):
+        """
+            Its job is to save the summary of the profile as JSON
+        :param file_address: address of the file
+        :return: None
+        """
+        with open(file_address, "w") as profile_file:
+            json.dump(self.report(), profile_file, indent=2)
+
+    def save_chrome_trace(self, file_address):
+        """
+            Its job is to save the events of the profile as a Chrome trace-event file
+        :param file_address: address of the file
+        :return: None
+        """
+        with open(file_address, "w") as trace_file:
+            json.dump(self.chrome_trace(), trace_file)
@@ -0,0 +1,135 @@
+import json
+
+output_formats = ["text", "jsonl"]
+path_formats = ["coords", "directions"]
+# letter of each (row, column) step in the run-length direction strings of the paths
+direction_letters = {(-1, 0): "U", (0, -1): "L", (0, 1): "R", (1, 0): "D",
+                     (-1, -1): "UL", (-1, 1): "UR", (1, -1): "DL", (1, 1): "DR"}
+
+
+def coords_of(path_cell):
+    """
+        Its job is to give the [row, column] of a cell of a path
+    :param path_cell: a Cell of a Maze path or Coords of a CompactMaze path
+    :return: [row, column] of the cell
+    """
+    coords = getattr(path_cell, "coords", path_cell)
+    return [coords.row, coords.column]
+
+
+def run_length_directions(path):
+    """
+        Its job is to write the moves of a path as a run-length direction string, like "3R2D" for three moves right
+        and then two moves down
+    :param path: list of the cells of the path
+    :return: the direction string, empty for a path of one cell
+    """
+    runs = []
+    previous_coords = None
+    for path_cell in path:
+        coords = coords_of(path_cell)
+        if previous_coords is not None:
+            letter = direction_letters[(coords[0] - previous_coords[0], coords[1] - previous_coords[1])]
+            if runs and runs[-1][1] == letter:
+                runs[-1][0] += 1
+            else:
+                runs.append([1, letter])
+        previous_coords = coords
+    return "".join(f"{count}{letter}" for count, letter in runs)
+
+
+def text_chunks(algorithm_name, heuristic_name, res):
+    """
+        Its job is to give the text of a result piece by piece, so a long path is never kept as one string
+    :param algorithm_name: name of the algorithm
+    :param heuristic_name: name of the heuristic function or None if the algorithm does not use one
+    :param res: result of the algorithm in solving the maze
+    :return: a generator of the pieces of the text
+    """
+    yield algorithm_name + (' ' + heuristic_name if heuristic_name is not None else '') + ' -> ' + 'Result:\n'
+    for key in res:
+        if key == "total_distance":
+            if res.get(key) == float("inf"):
+                yield f'{key}: Not Reachable\n'
+            else:
+                yield f'{key}: {int(res.get(key))}\n'
+        elif key == "time":
+            yield f'{key}: {round(res.get(key), 10)}\n'
+        elif key == "path":
+            yield f'{key}: ['
+            for i, path_cell in enumerate(res.get(key)):
+                yield (', ' if i else '') + repr(path_cell)
+            yield ']\n'
+        else:
+            yield f'{key}: {res.get(key)}\n'
+    yield '\n'
+
+
+def json_line(algorithm_name, heuristic_name, res, path_format="coords"):
+    """
+        Its job is to give a result as one line of JSON
+    :param algorithm_name: name of the algorithm
+    :param heuristic_name: name of the heuristic function or None if the algorithm does not use one
+    :param res: result of the algorithm in solving the maze
+    :param path_format: coords for a list of [row, column] or directions for a run-length direction string
+    :return: the line
+    """
+    record = {"algorithm": algorithm_name, "heuristic": heuristic_name}
+    for key, value in res.items():
+        if key == "total_distance":
+            record[key] = None if value == float("inf") else int(value)
+        elif key != "path":
+            record[key] = value
+    path = res.get("path")
+    if path is None:
+        record["path"] = None
+    elif path_format == "directions":
+        record["path_start"] = coords_of(path[0])
+        record["path"] = run_length_directions(path)
+    else:
+        record["path"] = [coords_of(path_cell) for path_cell in path]
+    return json.dumps(record, separators=(",", ":")) + "\n"
+
+
+def result_chunks(algorithm_name, heuristic_name, res, output_format="text", path_format="coords"):
+    """
+        Its job is to give the output of a result piece by piece in the given format
+    :param algorithm_name: name of the algorithm
+    :param heuristic_name: name of the heuristic function or None if the algorithm does not use one
+    :param res: result of the algorithm in solving the maze
+    :param output_format: text for the text report or jsonl for one JSON object per line
+    :param path_format: format of the paths in jsonl, coords or directions
+    :return: an iterable of the pieces of the output
+    """
+    if output_format == "jsonl":
+        return [json_line(algorithm_name, heuristic_name, res, path_format)]
+    return text_chunks(algorithm_name, heuristic_name, res)
+
+
+class ResultWriter:
+    def __init__(self, output_file, output_format="text", path_format="coords"):
+        """
+            Its job is to initialize a writer which writes every result to the output file as soon as it is given
+        :param output_file: the opened output file
+        :param output_format: text for the text report or jsonl for one JSON object per line
+        :param path_format: format of the paths in jsonl, coords or directions
+        """
+        if output_format not in output_formats:
+            raise Exception(f"Unknown output format {output_format}!")
+        if path_format not in path_formats:
+            raise Exception(f"Unknown path format {path_format}!")
+        self.output_file = output_file
+        self.output_format = output_format
+        self.path_format = path_format
+
+    def write(self, algorithm_name, heuristic_name, res):
+        """
+            Its job is to write a result to the output file
+        :param algorithm_name: name of the algorithm
+        :param heuristic_name: name of the heuristic function or None if the algorithm does not use one
+        :param res: result of the algorithm in solving the maze
+        :return: None
+        """
+        for chunk in result_chunks(algorithm_name, heuristic_name, res, self.output_format, self.path_format):
+            self.output_file.write(chunk)
+        self.output_file.flush()
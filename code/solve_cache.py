@@ -0,0 +1,178 @@
+import hashlib
+import sys
+import weakref
+from collections import OrderedDict
+from compact_structures import CompactMaze
+from structures import CellTypes
+
+# the byte of each cell type in the hashed obstacles of a compact maze, 1 for an obstacle and 0 for the others
+obstacle_flags = bytes(cell_type == CellTypes.Obstacle.value for cell_type in range(256))
+
+
+class SolveCache:
+    def __init__(self, max_entries=128, max_bytes=None):
+        """
+            Its job is to initialize an LRU cache of the results of solving mazes, keyed by a hash of the contents of
+            the maze (dimensions, obstacles, costs, source and target), the algorithm and the heuristic
+        :param max_entries: maximum number of the kept results
+        :param max_bytes: maximum approximate size of the kept results in bytes, no limit if None
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.results = OrderedDict()  # key -> (result without path, search data of the path cells, size in bytes)
+        self.n_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        # the hash of the layout of each maze is kept with the revision it is computed for, so it is hashed only once
+        # after every change
+        self.layout_digests = weakref.WeakKeyDictionary()
+
+    def layout_digest(self, maze):
+        """
+            Its job is to hash the dimensions, moves, obstacles and costs of a maze, which is done again only after the
+            layout of the maze is changed
+        :param maze: the maze (Maze or CompactMaze)
+        :return: the digest of the layout
+        """
+        revision, digest = self.layout_digests.get(maze, (None, None))
+        if revision == maze.revision.value:
+            return digest
+        # the obstacles are hashed as one byte of 1 or 0 and the costs as one byte of each cell, so a Maze and a
+        # CompactMaze of the same layout have the same digest
+        if isinstance(maze, CompactMaze):
+            obstacles, costs = maze.types.translate(obstacle_flags), maze.costs
+        else:
+            obstacles = bytes(cell.type == CellTypes.Obstacle.value for row in maze.grid for cell in row)
+            costs = bytes(cell.cost for row in maze.grid for cell in row)
+        layout_hash = hashlib.blake2b(digest_size=16)
+        layout_hash.update(f"{maze.n_rows}x{maze.n_columns}:{maze.connectivity}:{maze.corner_rule}".encode())
+        layout_hash.update(obstacles)
+        layout_hash.update(costs)
+        digest = layout_hash.digest()
+        self.layout_digests[maze] = (maze.revision.value, digest)
+        return digest
+
+    @staticmethod
+    def coords_of(maze, cell):
+        """
+            Its job is to give the (row, column) of a cell of a maze
+        :param maze: the maze (Maze or CompactMaze)
+        :param cell: a cell of a Maze or id of a cell of a CompactMaze
+        :return: (row, column) of the cell
+        """
+        if isinstance(maze, CompactMaze):
+            return divmod(cell, maze.n_columns)
+        return cell.coords.row, cell.coords.column
+
+    def key_of(self, maze, algorithm, h):
+        """
+            Its job is to make the key of solving a maze with an algorithm and a heuristic
+        :param maze: the maze (Maze or CompactMaze)
+        :param algorithm: the algorithm
+        :param h: the heuristic function
+        :return: the key
+        """
+        if maze.source is None or maze.target is None:
+            raise Exception("Maze is not complete to start! Source or target is not determined.")
+        return (self.layout_digest(maze), self.coords_of(maze, maze.source), self.coords_of(maze, maze.target),
+                algorithm, h)
+
+    def get(self, key, maze):
+        """
+            Its job is to find the cached result of a key. The search data of the cells of the path is restored in
+            the given maze, so the path can be tracked back from the target as if the maze is solved.
+        :param key: the key of the result
+        :param maze: the maze (Maze or CompactMaze) the result is asked for
+        :return: a new result dictionary marked with cached: True, or None if the key is not cached
+        """
+        entry = self.results.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.results.move_to_end(key)
+        result, path = dict(entry[0]), entry[1]
+        maze.reset_distances()
+        maze.n_checked_cells = result.get("checked_cells_no", 0)
+        result["cached"] = True
+        if path is not None:
+            if isinstance(maze, CompactMaze):
+                result["path"] = restore_compact_path(maze, path)
+            else:
+                result["path"] = restore_path(maze, path)
+        return result
+
+    def put(self, key, maze, result):
+        """
+            Its job is to keep the result of a key, evicting the least recently used results over the limits
+        :param key: the key of the result
+        :param maze: the solved maze (Maze or CompactMaze)
+        :param result: the result of solving the maze
+        :return: None
+        """
+        result = dict(result)
+        path = result.pop("path", None)
+        if path is not None:
+            # each cell of the path is kept as (row, column, passed distance, ongoing distance, total distance)
+            if isinstance(maze, CompactMaze):
+                path = tuple((coords.row, coords.column, maze.passed_distance_of(maze.cell_id(coords)), float("inf"),
+                              maze.total_distance_of(maze.cell_id(coords))) for coords in path)
+            else:
+                path = tuple((cell.coords.row, cell.coords.column, cell.passed_distance, cell.ongoing_distance,
+                              cell.total_distance) for cell in path)
+        size = sys.getsizeof(result) + (sys.getsizeof(path) + sum(map(sys.getsizeof, path)) if path else 0)
+        if key in self.results:
+            self.n_bytes -= self.results.pop(key)[2]
+        self.results[key] = (result, path, size)
+        self.n_bytes += size
+        while len(self.results) > self.max_entries or \
+                (self.max_bytes is not None and self.n_bytes > self.max_bytes and len(self.results) > 1):
+            self.n_bytes -= self.results.popitem(last=False)[1][2]
+
+    def info(self):
+        """
+            Its job is to report the counters of the cache
+        :return: a dictionary of hits, misses, number of kept results and their approximate size in bytes
+        """
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.results), "bytes": self.n_bytes}
+
+    def clear(self):
+        """
+            Its job is to remove all the kept results and reset the counters
+        :return: None
+        """
+        self.results.clear()
+        self.n_bytes = self.hits = self.misses = 0
+
+
+def restore_path(maze, path):
+    """
+        Its job is to put the kept search data of the cells of a path back in a maze
+    :param maze: the maze
+    :param path: tuple of (row, column, passed distance, ongoing distance, total distance) of the cells of the path
+    :return: the path as a list of cells
+    """
+    cells = []
+    for row, column, passed_distance, ongoing_distance, total_distance in path:
+        cell = maze.grid[row][column]
+        cell.passed_distance, cell.ongoing_distance, cell.total_distance = \
+            passed_distance, ongoing_distance, total_distance
+        cell.previous_cell = cells[-1] if cells else None
+        cells.append(cell)
+    return cells
+
+
+def restore_compact_path(maze, path):
+    """
+        Its job is to put the kept search data of the cells of a path back in a compact maze
+    :param maze: the compact maze
+    :param path: tuple of (row, column, passed distance, ongoing distance, total distance) of the cells of the path
+    :return: the path as a list of coordinates
+    """
+    coords_list, previous_cell = [], -1
+    for row, column, passed_distance, _, total_distance in path:
+        cell = row * maze.n_columns + column
+        maze.set_search_data(cell, passed_distance, total_distance, previous_cell)
+        coords_list.append(maze.get_coords(cell))
+        previous_cell = cell
+    return coords_list
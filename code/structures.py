@@ -1,6 +1,9 @@
+from array import array
 from enum import Enum
 import json
-from validation import is_valid
+import weakref
+import maze_format
+from validation import is_valid, max_cost, connectivities, corner_rules
 
 
 class Coords:
@@ -49,22 +52,217 @@ class CellTypes(Enum):
     Obstacle = 3
 
 
+class Generation:
+    def __init__(self):
+        """
+            Its job is to initialize the stamp of the current search run, shared by a maze and all of its cells. It
+            grows by 2 for each run, so the next value marks the closed cells of the run.
+        """
+        self.value = 0
+
+
+class Revision:
+    def __init__(self):
+        """
+            Its job is to initialize the number of changes of the layout (obstacles, costs and target) of a maze, shared
+            by a maze and all of its cells, so anything computed from the layout can tell whether it is still valid
+        """
+        self.value = 0
+        self.watchers = weakref.WeakSet()  # objects told about every changed cell, like incremental planners
+
+    def change(self, cell):
+        """
+            Its job is to count a change of the layout and tell the watchers which cell is changed
+        :param cell: the changed cell (a Cell of a Maze or id of a cell of a CompactMaze)
+        :return: None
+        """
+        self.value += 1
+        for watcher in self.watchers:
+            watcher.cell_changed(cell)
+
+
+
+class SearchData:
+    def __init__(self, n_cells):
+        """
+            Its job is to initialize the search data of the cells of a maze by id in flat typed arrays. The search data
+            of a cell is only valid while its stamp is the current generation (the cell is open) or one more (the cell
+            is closed), otherwise it is unvisited, so the arrays are made once and a new run does not fill them again.
+        :param n_cells: number of cells of the maze
+        """
+        self.passed_distance = array('d', [float("inf")]) * n_cells  # Distance from source to each cell
+        # Total distance of each cell, can be related to the passed one and the heuristic
+        self.total_distance = array('d', [float("inf")]) * n_cells
+        self.previous_cell = array('i', [-1]) * n_cells  # id of the parent of each cell, -1 for no parent
+        self.stamps = array('I', [0]) * n_cells  # generation of the search data of each cell
+        self.generation = 0  # stamp of the current search run, it grows by 2 so the next value marks closed cells
+
+    def new_generation(self):
+        """
+            Its job is to start a new search run, which makes the search data of all cells stale
+        :return: None
+        """
+        self.generation += 2
+        if self.generation + 1 > 0xFFFFFFFF:  # the stamps would overflow, so they are cleared once in 2 ** 31 runs
+            self.stamps = array('I', [0]) * len(self.stamps)
+            self.generation = 2
+
+    def is_visited(self, cell):
+        """
+            Its job is to check whether a cell has search data in the current search run
+        :param cell: id of a cell
+        :return: True if the cell is visited in the current run and False otherwise
+        """
+        return self.stamps[cell] >= self.generation
+
+    def is_closed(self, cell):
+        """
+            Its job is to check whether a cell is closed in the current search run, so it is not expanded again unless
+            its search data is improved
+        :param cell: id of a cell
+        :return: True if the cell is closed in the current run and False otherwise
+        """
+        return self.stamps[cell] == self.generation + 1
+
+    def close(self, cell):
+        """
+            Its job is to close a visited cell in the current search run, putting its search data again opens it
+        :param cell: id of a visited cell
+        :return: None
+        """
+        self.stamps[cell] = self.generation + 1
+
+    def passed_distance_of(self, cell):
+        """
+            Its job is to give the distance from source to a cell in the current search run
+        :param cell: id of a cell
+        :return: the distance, inf if the cell is not visited in the current run
+        """
+        return self.passed_distance[cell] if self.stamps[cell] >= self.generation else float("inf")
+
+    def total_distance_of(self, cell):
+        """
+            Its job is to give the total distance of a cell in the current search run
+        :param cell: id of a cell
+        :return: the distance, inf if the cell is not visited in the current run
+        """
+        return self.total_distance[cell] if self.stamps[cell] >= self.generation else float("inf")
+
+    def previous_cell_of(self, cell):
+        """
+            Its job is to give the parent of a cell in the current search run
+        :param cell: id of a cell
+        :return: id of the parent, -1 if the cell has no parent or is not visited in the current run
+        """
+        return self.previous_cell[cell] if self.stamps[cell] >= self.generation else -1
+
+    def set_search_data(self, cell, passed_distance, total_distance, previous_cell, ongoing_distance=float("inf")):
+        """
+            Its job is to put the search data of a cell in the current search run, the cell is open after it
+        :param cell: id of a cell
+        :param passed_distance: distance from source to the cell
+        :param total_distance: total distance of the cell
+        :param previous_cell: id of the parent of the cell, -1 for no parent
+        :param ongoing_distance: estimated distance from the cell to the target, which is not kept in the arrays
+        :return: None
+        """
+        self.passed_distance[cell], self.total_distance[cell] = passed_distance, total_distance
+        self.previous_cell[cell] = previous_cell
+        self.stamps[cell] = self.generation
+
+    def search_bytes(self):
+        """
+            Its job is to give the size of the search data
+        :return: the size in bytes
+        """
+        return sum(len(values) * values.itemsize
+                   for values in (self.passed_distance, self.total_distance, self.previous_cell, self.stamps))
+
+
 class Cell:
-    def __init__(self, coords, cost=1, cell_type=CellTypes.Normal.value):
+    def __init__(self, coords, cost=1, cell_type=CellTypes.Normal.value, generation=None, revision=None):
         """
             Its job is to initialize the object cell with the given or default values
         :param coords: coordinates of the cell
-        :param cost: cost of the cell
+        :param cost: cost of moving to the cell, an integer from 1 to max_cost
         :param cell_type: Type of the cell
+        :param generation: the search run counter of the maze the cell belongs to
+        :param revision: the layout change counter of the maze the cell belongs to
         """
         self.coords = coords
-        self.passed_distance = float("inf")  # Distance from source to the cell
-        self.ongoing_distance = float("inf")  # Estimated distance from the cell to the target
-        self.total_distance = float("inf")  # Total distance can be related to the two others or not
-        self.previous_cell = None  # Parent of the cell
+        self.id = None  # row-major index of the cell in its maze (row * n_columns + column), set by the maze
+        self.revision = revision if revision is not None else Revision()
+        # search data of the cell is only valid while its stamp is the current generation (the cell is open) or one
+        # more (the cell is closed), otherwise it is unvisited
+        self.generation = generation if generation is not None else Generation()
+        self.stamp = self.generation.value
+        self._passed_distance = float("inf")  # Distance from source to the cell
+        self._ongoing_distance = float("inf")  # Estimated distance from the cell to the target
+        self._total_distance = float("inf")  # Total distance can be related to the two others or not
+        self._previous_cell = None  # Parent of the cell
         self.type = cell_type  
         self.cost = cost
 
+    def refresh(self):
+        """
+            Its job is to clear the search data of the cell if it belongs to a previous search run
+        :return: None
+        """
+        if self.stamp < self.generation.value:
+            self._passed_distance = float("inf")
+            self._ongoing_distance = float("inf")
+            self._total_distance = float("inf")
+            self._previous_cell = None
+            self.stamp = self.generation.value
+
+    @property
+    def passed_distance(self):
+        """
+            Distance from source to the cell in the current search run (inf if the cell is not visited in it)
+        """
+        return self._passed_distance if self.stamp >= self.generation.value else float("inf")
+
+    @passed_distance.setter
+    def passed_distance(self, value):
+        self.refresh()
+        self._passed_distance = value
+
+    @property
+    def ongoing_distance(self):
+        """
+            Estimated distance from the cell to the target in the current search run (inf if the cell is not visited in it)
+        """
+        return self._ongoing_distance if self.stamp >= self.generation.value else float("inf")
+
+    @ongoing_distance.setter
+    def ongoing_distance(self, value):
+        self.refresh()
+        self._ongoing_distance = value
+
+    @property
+    def total_distance(self):
+        """
+            Total distance of the cell in the current search run (inf if the cell is not visited in it)
+        """
+        return self._total_distance if self.stamp >= self.generation.value else float("inf")
+
+    @total_distance.setter
+    def total_distance(self, value):
+        self.refresh()
+        self._total_distance = value
+
+    @property
+    def previous_cell(self):
+        """
+            Parent of the cell in the current search run (None if the cell is not visited in it)
+        """
+        return self._previous_cell if self.stamp >= self.generation.value else None
+
+    @previous_cell.setter
+    def previous_cell(self, value):
+        self.refresh()
+        self._previous_cell = value
+
     def __repr__(self):
         """
             Its job is representing the cell when it calls to be a str or we want to print it.
@@ -86,7 +284,11 @@ class Cell:
         :param new_type: The new type we want to assign
         :return: None
         """
+        obstacle, target = CellTypes.Obstacle.value, CellTypes.Target.value
+        is_changed = (self.type == obstacle) != (new_type == obstacle) or (self.type == target) != (new_type == target)
         self.type = new_type
+        if is_changed:
+            self.revision.change(self)  # the layout of the maze is changed
 
     def reset(self):
         """
@@ -116,8 +318,35 @@ class Maze:
         self.source = source
         self.target = target
         self.cell_list = cell_list
+        self.generation = Generation()  # stamp of the current search run, stale search data of cells is ignored
+        self.revision = Revision()  # number of changes of the obstacles, costs and target of the maze
+        self.grid = None  # row-major 2D index of the cells for constant time lookup
+        self.cells = None  # the cells by id (row * n_columns + column)
+        self.n_weighted_cells = 0  # number of cells which do not cost 1
+        self.connectivity = 4  # number of the moves from a cell, 8 for diagonal moves too
+        self.corner_rule = "strict"  # rule of the diagonal moves around obstacles
+        self.adjacency = None  # the neighbors of every cell, built on the first use
+        self.backward_search = None  # search data of the searches from the target, made on the first use
+        if cell_list is not None:
+            self.build_grid()
         self.n_checked_cells = 0  # number of checked cells in the algorithm will run on the maze
 
+    def build_grid(self):
+        """
+            Its job is to index the cells of the maze in a row-major 2D list, so grid[row][column] is the cell
+        :return: None
+        """
+        self.grid = [[None] * self.n_columns for _ in range(self.n_rows)]
+        for cell in self.cell_list:
+            self.grid[cell.coords.row][cell.coords.column] = cell
+            cell.id = cell.coords.row * self.n_columns + cell.coords.column
+            cell.generation = self.generation
+            cell.revision = self.revision
+        self.cells = [cell for row in self.grid for cell in row]
+        self.adjacency = None
+        self.backward_search = None
+        self.n_weighted_cells = sum(cell.cost != 1 for cell in self.cell_list)
+
     def set_source(self, cell):
         """
             Its job is to set a cell as the new source of the maze
@@ -151,49 +380,172 @@ class Maze:
         cell.reset()
         cell.change_type(CellTypes.Obstacle.value)
 
+    def set_cost(self, cell, cost):
+        """
+            Its job is to set the cost of moving to a cell
+        :param cell: a cell in the maze
+        :param cost: the new cost, an integer from 1 to max_cost
+        :return: None
+        """
+        if not (isinstance(cost, int) and 1 <= cost <= max_cost):
+            raise Exception(f"Cost of a cell must be an integer from 1 to {max_cost}!")
+        if cell.cost == cost:
+            return
+        self.n_weighted_cells += (cost != 1) - (cell.cost != 1)
+        cell.cost = cost
+        self.revision.change(cell)  # the layout of the maze is changed
+
     def get_cell(self, coords: Coords):
         """
             Its job is finding a cell in the maze based on its coordinates
         :param coords: coordinates of a cell
         :return: the cell having the given coordinates
         """
-        for c in self.cell_list:
-            if c.coords == coords:
-                return c
+        if 0 <= coords.row < self.n_rows and 0 <= coords.column < self.n_columns:
+            return self.grid[coords.row][coords.column]
+        return None
+
+    def set_connectivity(self, connectivity, corner_rule="strict"):
+        """
+            Its job is to set the moves which can be made from a cell
+        :param connectivity: 4 for straight moves or 8 for straight and diagonal moves
+        :param corner_rule: rule of the diagonal moves around obstacles (strict, cut or squeeze)
+        :return: None
+        """
+        if connectivity not in connectivities:
+            raise Exception(f"Connectivity of a maze must be one of {connectivities}!")
+        if corner_rule not in corner_rules:
+            raise Exception(f"Corner rule of a maze must be one of {corner_rules}!")
+        if (connectivity, corner_rule) == (self.connectivity, self.corner_rule):
+            return
+        self.connectivity, self.corner_rule = connectivity, corner_rule
+        self.adjacency = None
+        self.revision.value += 1  # the layout of the maze is changed, as all of its moves are
+
+    def get_adjacency(self):
+        """
+            Its job is to give the adjacency table of the maze, building it on the first use. It is patched by itself
+            after a cell is changed.
+        :return: the Adjacency of the maze
+        """
+        if self.adjacency is None:
+            from adjacency import Adjacency  # the adjacency module imports this one
+            self.adjacency = Adjacency(self)
+        return self.adjacency
 
     def get_neighbors(self, cell):
         """
             Its job is to find valid neighbors of a given cell (neither out of maze cells nor obstacles)
         :param cell: a cell of the maze
-        :return: a lost of valid neighbors
-        """
-        neighbors_coords = [Coords(cell.coords.row, cell.coords.column - 1),
-                            Coords(cell.coords.row + 1, cell.coords.column),
-                            Coords(cell.coords.row, cell.coords.column + 1),
-                            Coords(cell.coords.row - 1, cell.coords.column)]
-        
-        in_maze_neighbors_coords = [coords for coords in neighbors_coords if
-                                    (0 <= coords.column < self.n_columns and 0 <= coords.row < self.n_rows)]
-        
-        valid_neighbors = [cell for cell in self.cell_list if
-                           cell.type != CellTypes.Obstacle.value and cell.coords in in_maze_neighbors_coords]
-        
-        return valid_neighbors
+        :return: a list of valid neighbors in row-major order (up, left, right and down for 4 moves)
+        """
+        return [self.cells[neighbor] for neighbor in self.get_adjacency().neighbors_of(cell.id)]
 
     def reset_distances(self):
         """
             Its job is to reset all distances and computed values to be ready for running again.
+            Starting a new generation makes the search data of all cells stale, so it does not visit the cells.
         :return: None
         """
         if self.cell_list is None:
             raise Exception("Cell_list is still empty!")
-        for cell in self.cell_list:
-            cell.passed_distance = float("inf")
-            cell.ongoing_distance = float("inf")
-            cell.total_distance = float("inf")
-            cell.previous_cell = None
+        self.generation.value += 2  # the next value marks the closed cells of the run
         self.n_checked_cells = 0
 
+    # the search data of the cells by id, the same as the one of SearchData, so an algorithm runs on both mazes
+
+    def is_visited(self, cell):
+        """
+            Its job is to check whether a cell has search data in the current search run
+        :param cell: id of a cell
+        :return: True if the cell is visited in the current run and False otherwise
+        """
+        return self.cells[cell].stamp >= self.generation.value
+
+    def is_closed(self, cell):
+        """
+            Its job is to check whether a cell is closed in the current search run, so it is not expanded again unless
+            its search data is improved
+        :param cell: id of a cell
+        :return: True if the cell is closed in the current run and False otherwise
+        """
+        return self.cells[cell].stamp == self.generation.value + 1
+
+    def close(self, cell):
+        """
+            Its job is to close a visited cell in the current search run, putting its search data again opens it
+        :param cell: id of a visited cell
+        :return: None
+        """
+        self.cells[cell].stamp = self.generation.value + 1
+
+    def passed_distance_of(self, cell):
+        """
+            Its job is to give the distance from source to a cell in the current search run
+        :param cell: id of a cell
+        :return: the distance, inf if the cell is not visited in the current run
+        """
+        return self.cells[cell].passed_distance
+
+    def total_distance_of(self, cell):
+        """
+            Its job is to give the total distance of a cell in the current search run
+        :param cell: id of a cell
+        :return: the distance, inf if the cell is not visited in the current run
+        """
+        return self.cells[cell].total_distance
+
+    def previous_cell_of(self, cell):
+        """
+            Its job is to give the parent of a cell in the current search run
+        :param cell: id of a cell
+        :return: id of the parent, -1 if the cell has no parent or is not visited in the current run
+        """
+        previous_cell = self.cells[cell].previous_cell
+        return -1 if previous_cell is None else previous_cell.id
+
+    def set_search_data(self, cell, passed_distance, total_distance, previous_cell, ongoing_distance=float("inf")):
+        """
+            Its job is to put the search data of a cell in the current search run, the cell is open after it
+        :param cell: id of a cell
+        :param passed_distance: distance from source to the cell
+        :param total_distance: total distance of the cell
+        :param previous_cell: id of the parent of the cell, -1 for no parent
+        :param ongoing_distance: estimated distance from the cell to the target
+        :return: None
+        """
+        cell = self.cells[cell]
+        cell.stamp = self.generation.value
+        cell._passed_distance, cell._ongoing_distance, cell._total_distance = \
+            passed_distance, ongoing_distance, total_distance
+        cell._previous_cell = None if previous_cell == -1 else self.cells[previous_cell]
+
+    def cost_of(self, cell):
+        """
+            Its job is to give the cost of moving to a cell
+        :param cell: id of a cell
+        :return: the cost of the cell
+        """
+        return self.cells[cell].cost
+
+    def is_open(self, cell):
+        """
+            Its job is to check whether a cell is not an obstacle
+        :param cell: id of a cell
+        :return: True if the cell is not an obstacle and False otherwise
+        """
+        return self.cells[cell].type != CellTypes.Obstacle.value
+
+    def get_backward_search(self):
+        """
+            Its job is to give the search data of the searches from the target of the bidirectional algorithms, made
+            on the first use and kept with the maze
+        :return: the SearchData of the backward searches
+        """
+        if self.backward_search is None:
+            self.backward_search = SearchData(len(self.cells))
+        return self.backward_search
+
     @staticmethod
     def build(data=None, file_address=None):
         """
@@ -205,27 +557,69 @@ class Maze:
         if file_address is None:
             if data is None:
                 raise Exception("At least one of data and file_address should be given!")
+        elif maze_format.is_binary(file_address):
+            return Maze.build_binary(file_address)
         else:
             with open(file_address, 'r') as json_file:
                 data = json.load(json_file)
         if not is_valid(data):
             return None
-        obstacles_coords_list = data.get("obstacles")
-        for i, obstacle_coords in enumerate(obstacles_coords_list):
-            obstacles_coords_list[i] = tuple(obstacle_coords)
         n_rows, n_columns = data.get("n_rows"), data.get("n_columns")
-        source_tuple, target_tuple = tuple(data.get("source")), tuple(data.get("target"))
+        obstacle_grid = [[False] * n_columns for _ in range(n_rows)]
+        for r, c in data.get("obstacles"):
+            obstacle_grid[r][c] = True
+        cost_grid = None
+        if data.get("costs"):
+            cost_grid = [[1] * n_columns for _ in range(n_rows)]
+            for r, c, cost in data.get("costs"):
+                cost_grid[r][c] = cost
+        maze = Maze.build_grid_maze(n_rows, n_columns, tuple(data.get("source")), tuple(data.get("target")),
+                                    obstacle_grid, cost_grid)
+        maze.set_connectivity(data.get("connectivity", 4), data.get("corner_rule", "strict"))
+        return maze
+
+    @staticmethod
+    def build_binary(file_address):
+        """
+            Its job is to build an object of maze based on a binary maze file. Only the file is memory-mapped: the
+            maze still has a Cell object for each cell, which is a few hundred bytes, so CompactMaze.build_binary is
+            used for very large files.
+        :param file_address: address of the binary maze file
+        :return: The built maze
+        """
+        with maze_format.MazeFile(file_address) as maze_file:
+            if not is_valid(maze_file.header_data()):
+                return None
+            obstacle_grid = maze_file.obstacle_grid().tolist()
+            cost_grid = maze_file.cost_grid().tolist() if maze_file.costs is not None else None
+            maze = Maze.build_grid_maze(maze_file.n_rows, maze_file.n_columns, maze_file.source, maze_file.target,
+                                        obstacle_grid, cost_grid)
+            maze.set_connectivity(maze_file.connectivity, maze_file.corner_rule)
+            return maze
+
+    @staticmethod
+    def build_grid_maze(n_rows, n_columns, source_tuple, target_tuple, obstacle_grid, cost_grid=None):
+        """
+            Its job is to build an object of maze based on its dimensions, source, target, obstacles and costs.
+        :param n_rows: number of rows in the maze
+        :param n_columns: number of columns in the maze
+        :param source_tuple: (row, column) of the source
+        :param target_tuple: (row, column) of the target
+        :param obstacle_grid: a 2D list which is truthy for the obstacles
+        :param cost_grid: a 2D list of the costs of the cells, None if all of them cost 1
+        :return: The built maze
+        """
         source_cell, target_cell = None, None
         cell_list = []
         for r in range(n_rows):
             for c in range(n_columns):
                 # determining the cell type to build it based on the coordinates
-                typ = CellTypes.Obstacle.value if (r, c) in obstacles_coords_list else CellTypes.Normal.value
+                typ = CellTypes.Obstacle.value if obstacle_grid[r][c] else CellTypes.Normal.value
                 if source_tuple == (r, c):
                     typ = CellTypes.Source.value
                 elif target_tuple == (r, c):
                     typ = CellTypes.Target.value
-                cell = Cell(Coords(r, c), cell_type=typ)
+                cell = Cell(Coords(r, c), cost=cost_grid[r][c] if cost_grid is not None else 1, cell_type=typ)
                 if typ == CellTypes.Source.value:
                     source_cell = cell  # setting source for building maze
                 elif typ == CellTypes.Target.value:
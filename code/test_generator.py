@@ -1,9 +1,11 @@
-import random
-from datetime import datetime
+import argparse
 import sys
 import os
 import json
-import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import maze_format
+from validation import max_cost
 
 # default values for test generator to create tests.
 n_test = 10  # number of tests
@@ -14,86 +16,182 @@ column_start_range = 50  # start range of selecting number of columns
 column_end_range = 500  # end range of selecting number of columns
 # -> the number of columns randomly select from range[column_start_range, column_end_range]
 obstacle_percent = 25  # percentage of obstacles we want in the maze
+max_cell_cost = 1  # costs of the cells are chosen from range[1, max_cell_cost], so 1 means all cells cost 1
+tests_directory = "./tests/"  # directory of the generated tests
 
-try:
-    if len(sys.argv) > 1:  # check whether we have first argument.
-        n_test = int(sys.argv[1])
-    if len(sys.argv) > 2:  # check whether we have second argument.
-        row_start_range = int(sys.argv[2])
-    if len(sys.argv) > 3:  # check whether we have third argument.
-        row_end_range = int(sys.argv[3])
-    if len(sys.argv) > 4:  # check whether we have fourth argument.
-        column_start_range = int(sys.argv[4])
-    if len(sys.argv) > 5:  # check whether we have fifth argument.
-        column_end_range = int(sys.argv[5])
-    if len(sys.argv) > 6:  # check whether we have sixth argument.
-        obstacle_percent = int(sys.argv[6])
-except ValueError:  # check whether the given arguments are integer.
-    print("Arguments must be integers! Run it again.")
-    exit(0)
-
-invalid = False
-if n_test <= 0 or n_test > 100:  # check whether number of tests is between 1 and 100 cause it is the reasonable range.
-    print("Number of tests must be between 1 and 100. You can run multiple times if you want more tests. "
-          "Please run again with correct values.")
-    invalid = True
-if row_start_range < 2 or row_end_range < 2:  # check whether the given range for number of rows is reasonable or not.
-    invalid = True
-    print("Number of rows must be greater than 2, so the range must be (2, 2) at least. "
-          "Please run again with correct values.")
-if row_start_range > row_end_range:  # check whether the given range is reasonable or not.
-    invalid = True
-    print("The given range is not valid. start of the range of rows must be less than end of the range! "
-          "Please run again with correct values.")
-if column_start_range < 2 or column_end_range < 2:  # check whether the given range for number of columns is reasonable or not.
-    invalid = True
-    print("Number of columns must be greater than 2, so the range must be (2, 2) at least. "
-          "Please run again with correct values.")
-if column_start_range > column_end_range:  # check whether the given range is reasonable or not.
-    invalid = True
-    print("The given range is not valid. start of the range of columns must be less than end of the range! "
-          "Please run again with correct values.")
-if obstacle_percent < 0 or obstacle_percent > 100:  # check whether the given percentage is valid.
-    print("Percentage of obstacles must in range 0 and 100! Please run again with correct values.")
-    invalid = True
-
-if obstacle_percent > 50:
-    print(
-        "With over 50% obstacles in the maze the probability of existing a path between start point and target is low.")
-
-if invalid:
-    exit(0)
-
-for test_i in range(n_test):
-    # Name of test files is datetime of system.
-    test_file_name = (str(datetime.now().date()) + "_" + str(datetime.now().time()).replace(':', '') + '.json')
-    if os.path.isfile("./tests/" + test_file_name):  # because of the speed of the system the name of two test can be the same. we do not want this to happen.
-        time.sleep(1)
-        test_file_name = (str(datetime.now().date()) + "_" + str(datetime.now().time()).replace(':', '') + '.json')
-    # number of rows, number of columns, source, target, and obstacles determine randomly.
-    n_rows = random.randint(row_start_range, row_end_range)
-    n_columns = random.randint(column_start_range, column_end_range)
-    source = (random.randint(0, n_rows - 1), random.randint(0, n_columns - 1))
-    target = None
-    while target is None or source == target:
-        target = (random.randint(0, n_rows - 1), random.randint(0, n_columns - 1))
-    n_obstacles = obstacle_percent * (n_rows * n_columns) // 100
-    obstacles = []
-    for obstacle_i in range(n_obstacles):
-        obstacle = None
-        while obstacle is None or obstacle in obstacles + [source, target]:
-            obstacle = (random.randint(0, n_rows - 1), random.randint(0, n_columns - 1))
-        obstacles.append(obstacle)
-    test_data_dictionary = {
+
+def sample_obstacles(rng, n_cells, n_obstacles, source, target):
+    """
+        Its job is to choose distinct obstacle cells at once, none of them being the source or the target
+    :param rng: the numpy random generator
+    :param n_cells: number of cells of the maze
+    :param n_obstacles: number of obstacles
+    :param source: id of the source cell
+    :param target: id of the target cell
+    :return: a numpy array of the ids of the obstacle cells
+    """
+    first, second = sorted((source, target))
+    # choosing from the other n_cells - 2 cells and then shifting the ids over the source and the target
+    obstacles = rng.choice(n_cells - 2, size=n_obstacles, replace=False)
+    obstacles += obstacles >= first
+    obstacles += obstacles >= second
+    return obstacles
+
+
+def generate_test(seed, test_i, row_range, column_range, obstacle_percent_):
+    """
+        Its job is to generate a test randomly, the same seed and test number always give the same test
+    :param seed: seed of the tests
+    :param test_i: number of the test
+    :param row_range: (start, end) range of selecting number of rows
+    :param column_range: (start, end) range of selecting number of columns
+    :param obstacle_percent_: percentage of obstacles we want in the maze
+    :return: number of rows, number of columns, source id, target id and numpy array of obstacle ids
+    """
+    rng = np.random.default_rng([seed, test_i])
+    n_rows = int(rng.integers(row_range[0], row_range[1] + 1))
+    n_columns = int(rng.integers(column_range[0], column_range[1] + 1))
+    n_cells = n_rows * n_columns
+    source, target = (int(cell) for cell in rng.choice(n_cells, size=2, replace=False))
+    n_obstacles = min(obstacle_percent_ * n_cells // 100, n_cells - 2)
+    return n_rows, n_columns, source, target, sample_obstacles(rng, n_cells, n_obstacles, source, target)
+
+
+def generate_costs(seed, test_i, n_cells, max_cell_cost_):
+    """
+        Its job is to choose the costs of the cells of a test randomly, apart from the random numbers of its layout,
+        so the same seed and test number give the same maze with or without costs
+    :param seed: seed of the tests
+    :param test_i: number of the test
+    :param n_cells: number of cells of the maze
+    :param max_cell_cost_: the costs are chosen from range[1, max_cell_cost_]
+    :return: numpy array of the costs of the cells by id
+    """
+    rng = np.random.default_rng([seed, test_i, 1])
+    return rng.integers(1, max_cell_cost_ + 1, size=n_cells).astype(np.uint8)
+
+
+def test_data(n_rows, n_columns, source, target, obstacles, costs=None):
+    """
+        Its job is to turn a generated test to the data of a JSON test
+    :param n_rows: number of rows
+    :param n_columns: number of columns
+    :param source: id of the source cell
+    :param target: id of the target cell
+    :param obstacles: numpy array of obstacle ids
+    :param costs: numpy array of the costs of the cells by id, None if all of them cost 1
+    :return: a dictionary of data of the test
+    """
+    data = {
         "n_rows": n_rows,
         "n_columns": n_columns,
-        "source": source,
-        "target": target,
-        "obstacles": obstacles
+        "source": divmod(source, n_columns),
+        "target": divmod(target, n_columns),
+        "obstacles": np.stack(np.divmod(obstacles, n_columns), axis=1).tolist()
     }
-    # we store each test as a json file.
-    test_data_json = json.dumps(test_data_dictionary)
-    if not os.path.isdir("./tests/"):
-        os.mkdir("./tests/")
-    with open("./tests/" + test_file_name, "w") as test_file:
-        test_file.write(test_data_json)
+    if costs is not None:
+        data["costs"] = maze_format.cost_list(costs.reshape(n_rows, n_columns))
+    return data
+
+
+def write_test(job):
+    """
+        Its job is to generate a test and write it in the tests directory
+    :param job: a tuple of (seed, test number, row range, column range, obstacle percentage, maximum cost of the cells,
+        binary, directory)
+    :return: address of the test file
+    """
+    seed, test_i, row_range, column_range, obstacle_percent_, max_cell_cost_, binary, directory = job
+    n_rows, n_columns, source, target, obstacles = generate_test(seed, test_i, row_range, column_range,
+                                                                 obstacle_percent_)
+    costs = generate_costs(seed, test_i, n_rows * n_columns, max_cell_cost_) if max_cell_cost_ > 1 else None
+    # Name of a test comes from its seed and number, so names never collide and a test can be generated again
+    test_file_name = f"{n_rows}-{n_columns}-{obstacle_percent_}pObstacle-" + \
+        (f"{max_cell_cost_}maxCost-" if costs is not None else "") + f"{seed}-{test_i}"
+    if binary:
+        test_file_address = os.path.join(directory, test_file_name + ".maze")
+        maze_format.write_obstacle_ids(test_file_address, n_rows, n_columns, divmod(source, n_columns),
+                                       divmod(target, n_columns), obstacles, costs)
+    else:
+        test_file_address = os.path.join(directory, test_file_name + ".json")
+        # we store each test as a json file.
+        with open(test_file_address, "w") as test_file:
+            test_file.write(json.dumps(test_data(n_rows, n_columns, source, target, obstacles, costs)))
+    return test_file_address
+
+
+def main(argv):
+    """
+        Its job is to parse the arguments, check them and generate the tests over a pool of processes
+    :param argv: the command line arguments (without the program name)
+    :return: None
+    """
+    parser = argparse.ArgumentParser(prog="test_generator.py", description="Generate random tests.")
+    parser.add_argument("n_test", type=int, nargs="?", default=n_test, help="number of tests")
+    parser.add_argument("row_start_range", type=int, nargs="?", default=row_start_range)
+    parser.add_argument("row_end_range", type=int, nargs="?", default=row_end_range)
+    parser.add_argument("column_start_range", type=int, nargs="?", default=column_start_range)
+    parser.add_argument("column_end_range", type=int, nargs="?", default=column_end_range)
+    parser.add_argument("obstacle_percent", type=int, nargs="?", default=obstacle_percent)
+    parser.add_argument("--seed", type=int, default=None, help="seed of the tests (random by default)")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: CPUs)")
+    parser.add_argument("--max-cost", type=int, default=max_cell_cost,
+                        help=f"costs of the cells are chosen from 1 to this number (at most {max_cost}, default: 1)")
+    parser.add_argument("--binary", action="store_true", help="write the tests in the binary maze format")
+    parser.add_argument("--output-dir", default=tests_directory, help="directory of the generated tests")
+    args = parser.parse_args(argv)
+
+    invalid = False
+    if args.n_test <= 0:  # check whether number of tests is positive.
+        print("Number of tests must be at least 1. Please run again with correct values.")
+        invalid = True
+    if args.row_start_range < 2 or args.row_end_range < 2:  # check whether the given range for number of rows is reasonable or not.
+        invalid = True
+        print("Number of rows must be greater than 2, so the range must be (2, 2) at least. "
+              "Please run again with correct values.")
+    if args.row_start_range > args.row_end_range:  # check whether the given range is reasonable or not.
+        invalid = True
+        print("The given range is not valid. start of the range of rows must be less than end of the range! "
+              "Please run again with correct values.")
+    if args.column_start_range < 2 or args.column_end_range < 2:  # check whether the given range for number of columns is reasonable or not.
+        invalid = True
+        print("Number of columns must be greater than 2, so the range must be (2, 2) at least. "
+              "Please run again with correct values.")
+    if args.column_start_range > args.column_end_range:  # check whether the given range is reasonable or not.
+        invalid = True
+        print("The given range is not valid. start of the range of columns must be less than end of the range! "
+              "Please run again with correct values.")
+    if args.obstacle_percent < 0 or args.obstacle_percent > 100:  # check whether the given percentage is valid.
+        print("Percentage of obstacles must in range 0 and 100! Please run again with correct values.")
+        invalid = True
+    if not 1 <= args.max_cost <= max_cost:
+        print(f"Maximum cost of the cells must be in range 1 and {max_cost}! Please run again with correct values.")
+        invalid = True
+    if args.workers is not None and args.workers < 1:
+        print("Number of workers must be at least 1! Please run again with correct values.")
+        invalid = True
+
+    if args.obstacle_percent > 50:
+        print(
+            "With over 50% obstacles in the maze the probability of existing a path between start point and target is low.")
+
+    if invalid:
+        exit(0)
+
+    seed = args.seed
+    if seed is None:
+        seed = int(np.random.SeedSequence().entropy % 2 ** 32)
+        print(f"Seed of the tests: {seed}")
+    if not os.path.isdir(args.output_dir):
+        os.makedirs(args.output_dir)
+    jobs = [(seed, test_i, (args.row_start_range, args.row_end_range),
+             (args.column_start_range, args.column_end_range), args.obstacle_percent, args.max_cost, args.binary,
+             args.output_dir)
+            for test_i in range(args.n_test)]
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for _ in pool.map(write_test, jobs):
+            pass
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
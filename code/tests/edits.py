@@ -0,0 +1,26 @@
+from compact_structures import CompactMaze
+from structures import CellTypes
+
+
+def cell_of(maze, cell):
+    """
+        Its job is to give the cell of a maze by its id, the way the maze takes it
+    :param maze: the maze (Maze or CompactMaze)
+    :param cell: id of a cell
+    :return: a Cell of a Maze or the id for a CompactMaze
+    """
+    return cell if isinstance(maze, CompactMaze) else maze.cells[cell]
+
+
+def open_cell(maze, cell):
+    """
+        Its job is to turn an obstacle of a maze into a normal cell, a compact maze has no method of its own for it
+    :param maze: the maze (Maze or CompactMaze)
+    :param cell: id of an obstacle
+    :return: None
+    """
+    if isinstance(maze, CompactMaze):
+        maze.types[cell] = CellTypes.Normal.value
+        maze.revision.change(cell)
+    else:
+        maze.cells[cell].reset()
@@ -0,0 +1,103 @@
+import random
+import numpy as np
+import pytest
+import test_generator
+from components import Components
+from compact_structures import CompactMaze
+from edits import cell_of, open_cell
+from structures import Maze
+
+
+def parts(labels, cells):
+    """
+        Its job is to group cells by their component, so two labelings can be compared whatever their roots are
+    :param labels: the Components of a maze
+    :param cells: ids of the cells
+    :return: sorted list of the sorted groups of ids
+    """
+    groups = {}
+    for cell in cells:
+        groups.setdefault(labels.find(cell), []).append(cell)
+    return sorted(sorted(group) for group in groups.values())
+
+
+def assert_same_as_rebuild(maze, labels):
+    """
+        Its job is to check the labels kept up to date by a maze against labels found from scratch
+    :param maze: the maze (Maze or CompactMaze)
+    :param labels: the Components of the maze
+    :return: None
+    """
+    labels.update()
+    rebuilt = Components(maze)
+    rebuilt.build()
+    maze.revision.watchers.discard(rebuilt)
+    open_cells = [cell for cell in range(maze.n_rows * maze.n_columns) if maze.is_open(cell)]
+    assert parts(labels, open_cells) == parts(rebuilt, open_cells)
+
+
+@pytest.mark.parametrize("maze_type", [Maze, CompactMaze])
+@pytest.mark.parametrize("connectivity, corner_rule", [(4, "strict"), (8, "strict"), (8, "cut"), (8, "squeeze")])
+def test_random_edits_match_rebuild(maze_type, connectivity, corner_rule):
+    rng = random.Random(connectivity * 10 + len(corner_rule))
+    for test_i in range(3):
+        data = test_generator.test_data(*test_generator.generate_test(7, test_i, (12, 24), (12, 24), 35))
+        data["connectivity"], data["corner_rule"] = connectivity, corner_rule
+        maze = maze_type.build(data)
+        labels = Components(maze)
+        labels.build()
+        ends = {maze.source, maze.target} if isinstance(maze, CompactMaze) else {maze.source.id, maze.target.id}
+        n_cells = maze.n_rows * maze.n_columns
+        for _ in range(150):
+            cell = rng.randrange(n_cells)
+            if cell in ends:
+                continue
+            if maze.is_open(cell):
+                maze.set_obstacle(cell_of(maze, cell))
+            else:
+                open_cell(maze, cell)
+            assert_same_as_rebuild(maze, labels)
+        assert labels.n_builds < 150  # most edits are patched without finding the labels again
+
+
+@pytest.mark.parametrize("maze_type", [Maze, CompactMaze])
+def test_split_beyond_budget_falls_back_to_rebuild(maze_type):
+    # a wall down the middle of an open maze with one gap, closing the gap cuts the maze in two large halves
+    n_rows = n_columns = 20
+    wall = [row * n_columns + n_columns // 2 for row in range(n_rows)]
+    data = test_generator.test_data(n_rows, n_columns, 0, n_rows * n_columns - 1, np.array(wall[1:]))
+    maze = maze_type.build(data)
+    labels = Components(maze)
+    labels.build()
+    source, target = 0, n_rows * n_columns - 1
+    assert labels.is_connected(source, target)
+
+    maze.set_obstacle(cell_of(maze, 3))  # a closed cell which cuts nothing is patched
+    assert_same_as_rebuild(maze, labels)
+    assert labels.n_builds == 1
+
+    maze.set_obstacle(cell_of(maze, wall[0]))
+    # each half is far more cells than the search of the split may reach, so the labels are found again
+    assert (n_rows * n_columns // 2 - n_rows) > n_rows * n_columns // 8
+    assert_same_as_rebuild(maze, labels)
+    assert labels.n_builds == 2
+    assert not labels.is_connected(source, target)
+
+    open_cell(maze, wall[0])  # an opened cell joins the halves again without a rebuild
+    assert_same_as_rebuild(maze, labels)
+    assert labels.n_builds == 2
+    assert labels.is_connected(source, target)
+
+
+@pytest.mark.parametrize("maze_type", [Maze, CompactMaze])
+def test_enclosed_cell_is_split_within_budget(maze_type):
+    # closing the last open neighbor of a corner cell cuts it off, which the search finds without a rebuild
+    n_rows = n_columns = 20
+    data = test_generator.test_data(n_rows, n_columns, 5 * n_columns + 5, 15 * n_columns + 15, np.array([1]))
+    maze = maze_type.build(data)
+    labels = Components(maze)
+    labels.build()
+    maze.set_obstacle(cell_of(maze, n_columns))
+    assert_same_as_rebuild(maze, labels)
+    assert labels.n_builds == 1
+    assert not labels.is_connected(0, 5 * n_columns + 5)
@@ -0,0 +1,129 @@
+import random
+import pytest
+import algorithms
+import heuristics
+import test_generator
+from compact_structures import CompactMaze
+from edits import cell_of, open_cell
+from heuristic_tables import heuristic_table
+from hierarchical import AbstractGraph
+from structures import Maze
+
+cluster_size = 5  # small clusters, so the mazes of the tests have many of them and their borders
+
+
+def build_maze(maze_type, test_i, connectivity, corner_rule="strict"):
+    """
+        Its job is to build a weighted maze with obstacles for the tests
+    :param maze_type: Maze or CompactMaze
+    :param test_i: number of the generated test
+    :param connectivity: connectivity of the maze
+    :param corner_rule: rule of the diagonal moves around obstacles
+    :return: the maze
+    """
+    n_rows, n_columns, source, target, obstacles = test_generator.generate_test(13, test_i, (14, 26), (14, 26), 25)
+    costs = test_generator.generate_costs(13, test_i, n_rows * n_columns, 4)
+    data = test_generator.test_data(n_rows, n_columns, source, target, obstacles, costs)
+    data["connectivity"], data["corner_rule"] = connectivity, corner_rule
+    return maze_type.build(data)
+
+
+def new_graph(maze):
+    """
+        Its job is to make the abstract graph of a maze from scratch
+    :param maze: the maze (Maze or CompactMaze)
+    :return: the built AbstractGraph
+    """
+    graph = AbstractGraph(maze, cluster_size)
+    graph.build()
+    return graph
+
+
+def assert_same_as_rebuild(maze, graph):
+    """
+        Its job is to check a graph brought up to date after cells are changed against one built from scratch
+    :param maze: the maze (Maze or CompactMaze)
+    :param graph: the AbstractGraph of the maze
+    :return: None
+    """
+    graph.update()
+    rebuilt = new_graph(maze)
+    maze.revision.watchers.discard(rebuilt)
+    assert {segment: set(moves) for segment, moves in graph.segment_transitions.items()} == \
+        {segment: set(moves) for segment, moves in rebuilt.segment_transitions.items()}
+    assert graph.transitions == rebuilt.transitions
+    assert {cluster: nodes for cluster, nodes in graph.cluster_nodes.items() if nodes} == \
+        {cluster: nodes for cluster, nodes in rebuilt.cluster_nodes.items() if nodes}
+    for cluster in rebuilt.cluster_nodes:
+        assert {node: set(edges) for node, edges in graph.edges_of(cluster).items()} == \
+            {node: set(edges) for node, edges in rebuilt.edges_of(cluster).items()}
+
+
+def assert_refined_path(maze, graph):
+    """
+        Its job is to find a path by the graph and check it is a path of the maze no shorter than the shortest one
+    :param maze: the maze (Maze or CompactMaze)
+    :param graph: the AbstractGraph of the maze
+    :return: None
+    """
+    source, target = algorithms.ends_of(maze, None, None)
+    path, distance, _, _ = graph.find_path(source, target, heuristic_table(maze, heuristics.euclidean_distance))
+    maze.reset_distances()
+    shortest_distance = algorithms.dijkstra(maze)["total_distance"]
+    if path is None:
+        assert distance == shortest_distance == float("inf")
+        return
+    assert path[0] == source and path[-1] == target
+    assert all(maze.is_open(cell) for cell in path)
+    neighbors_of = maze.get_adjacency().neighbors_of
+    assert all(next_cell in neighbors_of(cell) for cell, next_cell in zip(path, path[1:]))
+    assert sum(maze.cost_of(cell) for cell in path[1:]) == distance
+    assert distance >= shortest_distance
+
+
+@pytest.mark.parametrize("maze_type", [Maze, CompactMaze])
+@pytest.mark.parametrize("connectivity, corner_rule", [(4, "strict"), (8, "strict"), (8, "cut"), (8, "squeeze")])
+def test_segments_after_edits_match_rebuild(maze_type, connectivity, corner_rule):
+    rng = random.Random(connectivity * 10 + len(corner_rule))
+    for test_i in range(2):
+        maze = build_maze(maze_type, test_i, connectivity, corner_rule)
+        graph = new_graph(maze)
+        ends = set(algorithms.ends_of(maze, None, None))
+        n_cells = maze.n_rows * maze.n_columns
+        for _ in range(40):
+            for _ in range(rng.randrange(1, 4)):
+                cell = rng.randrange(n_cells)
+                if cell in ends:
+                    continue
+                if maze.is_open(cell):
+                    maze.set_obstacle(cell_of(maze, cell))
+                else:
+                    open_cell(maze, cell)
+            assert_same_as_rebuild(maze, graph)
+
+
+@pytest.mark.parametrize("maze_type", [Maze, CompactMaze])
+@pytest.mark.parametrize("connectivity, corner_rule", [(4, "strict"), (8, "strict"), (8, "cut"), (8, "squeeze")])
+def test_refined_path_is_valid_and_not_shorter_than_optimum(maze_type, connectivity, corner_rule):
+    for test_i in range(12):
+        maze = build_maze(maze_type, test_i, connectivity, corner_rule)
+        assert_refined_path(maze, new_graph(maze))
+
+
+@pytest.mark.parametrize("maze_type", [Maze, CompactMaze])
+def test_refined_path_after_edits(maze_type):
+    rng = random.Random(5)
+    maze = build_maze(maze_type, 3, 8)
+    graph = new_graph(maze)
+    ends = set(algorithms.ends_of(maze, None, None))
+    for _ in range(30):
+        cell = rng.randrange(maze.n_rows * maze.n_columns)
+        if cell in ends:
+            continue
+        if rng.randrange(3) == 0 and maze.is_open(cell):
+            maze.set_cost(cell_of(maze, cell), rng.randrange(1, 5))
+        elif maze.is_open(cell):
+            maze.set_obstacle(cell_of(maze, cell))
+        else:
+            open_cell(maze, cell)
+        assert_refined_path(maze, graph)
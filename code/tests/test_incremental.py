@@ -0,0 +1,147 @@
+import random
+import pytest
+import algorithms
+import heuristics
+import test_generator
+from compact_structures import CompactMaze
+from edits import cell_of, open_cell
+from incremental import DStarLite
+from structures import Maze
+
+
+def build_maze(maze_type, test_i, connectivity):
+    """
+        Its job is to build a weighted maze with obstacles for the tests
+    :param maze_type: Maze or CompactMaze
+    :param test_i: number of the generated test
+    :param connectivity: connectivity of the maze
+    :return: the maze
+    """
+    n_rows, n_columns, source, target, obstacles = test_generator.generate_test(11, test_i, (10, 18), (10, 18), 25)
+    costs = test_generator.generate_costs(11, test_i, n_rows * n_columns, 5)
+    data = test_generator.test_data(n_rows, n_columns, source, target, obstacles, costs)
+    data["connectivity"] = connectivity
+    return maze_type.build(data)
+
+
+def fresh_distance(maze, source):
+    """
+        Its job is to find the distance from a cell to the target of a maze with a new search of Dijkstra
+    :param maze: the maze (Maze or CompactMaze)
+    :param source: id of the starting cell
+    :return: the distance, inf if the target cannot be reached
+    """
+    maze.reset_distances()
+    return algorithms.dijkstra(maze, cell_of(maze, source))["total_distance"]
+
+
+def assert_planned(maze, planner, source):
+    """
+        Its job is to plan from a cell and check the distance and the path against a new search
+    :param maze: the maze (Maze or CompactMaze)
+    :param planner: the DStarLite of the maze
+    :param source: id of the starting cell
+    :return: None
+    """
+    distance = planner.plan(cell_of(maze, source))
+    assert distance == fresh_distance(maze, source)
+    path = planner.path()
+    if path is None:
+        assert distance == float("inf")
+        return
+    assert path[0] == source and path[-1] == planner.target
+    assert all(maze.is_open(cell) for cell in path)
+    assert sum(maze.cost_of(cell) for cell in path[1:]) == distance
+
+
+def edit_randomly(maze, rng, kept_cells):
+    """
+        Its job is to close, open or change the cost of some random cells of a maze
+    :param maze: the maze (Maze or CompactMaze)
+    :param rng: the random number generator
+    :param kept_cells: ids of the cells which are not changed
+    :return: None
+    """
+    for _ in range(rng.randrange(1, 6)):
+        cell = rng.randrange(maze.n_rows * maze.n_columns)
+        if cell in kept_cells:
+            continue
+        edit = rng.randrange(3)
+        if edit == 0:
+            maze.set_obstacle(cell_of(maze, cell))
+        elif edit == 1 and not maze.is_open(cell):
+            open_cell(maze, cell)
+        elif maze.is_open(cell):
+            maze.set_cost(cell_of(maze, cell), rng.randrange(1, 6))
+
+
+@pytest.mark.parametrize("maze_type", [Maze, CompactMaze])
+@pytest.mark.parametrize("connectivity, h", [(4, heuristics.manhattan_distance), (8, heuristics.chebyshev_distance)])
+def test_replanning_after_edits_matches_dijkstra(maze_type, connectivity, h):
+    rng = random.Random(connectivity)
+    for test_i in range(3):
+        maze = build_maze(maze_type, test_i, connectivity)
+        source, target = algorithms.ends_of(maze, None, None)
+        planner = DStarLite(maze, h)
+        assert_planned(maze, planner, source)
+        for _ in range(25):
+            edit_randomly(maze, rng, {source, target})
+            assert_planned(maze, planner, source)
+            assert planner.key_modifier == 0  # the source did not move, so the keys did not change
+
+
+@pytest.mark.parametrize("maze_type", [Maze, CompactMaze])
+def test_moving_source_raises_key_modifier(maze_type):
+    rng = random.Random(3)
+    maze = build_maze(maze_type, 0, 4)
+    source, target = algorithms.ends_of(maze, None, None)
+    planner = DStarLite(maze, heuristics.manhattan_distance)
+    assert_planned(maze, planner, source)
+    key_modifier = 0
+    for _ in range(25):
+        next_source = rng.randrange(maze.n_rows * maze.n_columns)
+        if next_source == target or not maze.is_open(next_source):
+            continue
+        # the keys in the frontier are lowered by the heuristic distance the source is moved
+        expected_modifier = key_modifier + planner.h_table[next_source]
+        source = next_source
+        edit_randomly(maze, rng, {source, target})
+        assert_planned(maze, planner, source)
+        assert planner.key_modifier == expected_modifier
+        key_modifier = planner.key_modifier
+    assert key_modifier > 0
+
+
+@pytest.mark.parametrize("maze_type", [Maze, CompactMaze])
+def test_new_target_restarts_search(maze_type):
+    maze = build_maze(maze_type, 1, 4)
+    source, target = algorithms.ends_of(maze, None, None)
+    planner = DStarLite(maze, heuristics.manhattan_distance)
+    assert_planned(maze, planner, source)
+    source = next(cell for cell in range(maze.n_rows * maze.n_columns)
+                  if cell not in (source, target) and maze.is_open(cell))
+    assert_planned(maze, planner, source)
+    assert planner.key_modifier > 0
+    new_target = next(cell for cell in reversed(range(maze.n_rows * maze.n_columns))
+                      if cell not in (source, target) and maze.is_open(cell))
+    maze.set_target(cell_of(maze, new_target))
+    assert_planned(maze, planner, source)
+    assert planner.target == new_target
+    assert planner.key_modifier == 0  # the search is started again from the new target
+
+
+@pytest.mark.parametrize("maze_type", [Maze, CompactMaze])
+def test_new_connectivity_restarts_search(maze_type):
+    maze = build_maze(maze_type, 2, 4)
+    source, target = algorithms.ends_of(maze, None, None)
+    planner = DStarLite(maze, heuristics.chebyshev_distance)
+    assert_planned(maze, planner, source)
+    source = next(cell for cell in range(maze.n_rows * maze.n_columns)
+                  if cell not in (source, target) and maze.is_open(cell))
+    assert_planned(maze, planner, source)
+    assert planner.key_modifier > 0
+    for connectivity, corner_rule in [(8, "strict"), (8, "cut"), (8, "squeeze"), (4, "strict")]:
+        maze.set_connectivity(connectivity, corner_rule)
+        assert_planned(maze, planner, source)
+        assert (planner.connectivity, planner.corner_rule) == (connectivity, corner_rule)
+        assert planner.key_modifier == 0  # the search is started again with the new moves
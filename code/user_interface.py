@@ -1,9 +1,12 @@
 import pygame
 import structures
+import event_trace
 from algorithms import AlgorithmTypes
 from heuristics import HeuristicTypes
+import itertools
 import os
-import time
+
+INSTANT = 0  # speed of replaying which draws a whole run in one frame
 
 
 class UI:
@@ -23,11 +26,20 @@ class UI:
         self.screen_size = screen_size
         self.background_color = background_color
         self.maze = maze
-        self.delay = 0.1  # amount of delay in showing next step
+        self.checking_color = pygame.Color(135, 197, 233, 255)  # color of the cells in the queue of checking
+        self.visited_color = pygame.Color(102, 255, 178, 255)  # color of the cells popped from the queue
+        self.path_color = pygame.Color("Darkgreen")  # color of the cells of the found path
+        self.fps = 60  # frames per second of the display
+        self.clock = pygame.time.Clock()
+        self.dirty_rects = []  # parts of the screen drawn since the last frame
+        self.speeds = [1, 2, 4, 8, 16, 32, 64, 128, 256, INSTANT]
+        self.speed = 4  # number of cells drawn in each frame of replaying a run
+        self.playback = None  # (trace, iterator of its remaining events) of the run being animated
         os.environ['SDL_VIDEO_WINDOW_POS'] = "%d,%d" % (90, 90)
         pygame.init()
         self.screen = pygame.display.set_mode(screen_size)
         self.font = pygame.font.SysFont("calibri", 18)
+        self.show_speed()
 
         # Default location of buttons
         self.source_mode_rb = ((120, self.screen.get_height() - int(7.4 * self.rect_size.row)), 10)
@@ -50,6 +62,15 @@ class UI:
         self.reset_rect = pygame.Rect(520, self.screen.get_height() - int(6 * self.rect_size.row), 100, 50)
         self.run_rect = pygame.Rect(650, self.screen.get_height() - int(6 * self.rect_size.row), 100, 50)
 
+        # more algorithms are in a row under reset and run buttons
+        self.jps_algo_rb = ((self.reset_rect.left + 45, self.reset_rect.bottom + 17), self.source_mode_rb[1])
+        self.bibfs_algo_rb = ((self.jps_algo_rb[0][0] + 90, self.jps_algo_rb[0][1]), self.source_mode_rb[1])
+        self.biastar_algo_rb = ((self.bibfs_algo_rb[0][0] + 80, self.jps_algo_rb[0][1]), self.source_mode_rb[1])
+        # and in a row above them
+        self.dstar_algo_rb = ((self.reset_rect.left + 65, self.reset_rect.top - 19), self.source_mode_rb[1])
+        self.dijkstra_algo_rb = ((self.dstar_algo_rb[0][0] + 100, self.dstar_algo_rb[0][1]), self.source_mode_rb[1])
+        self.hpa_algo_rb = ((self.dijkstra_algo_rb[0][0] + 75, self.dstar_algo_rb[0][1]), self.source_mode_rb[1])
+
     def calculate_pos(self, cell):
         """
             Its job is to calculate position of a given cell in the pygame screen
@@ -59,15 +80,18 @@ class UI:
         return structures.Coords(cell.coords.row * (self.rect_size.row + self.margin),
                                  cell.coords.column * (self.rect_size.column + self.margin))
 
-    def draw_all(self):
+    def draw_all(self, with_buttons=True):
         """
             Its job is to draw all elements
+        :param with_buttons: whether to draw the buttons or only the maze
         :return: None
         """
         self.screen.fill(self.background_color)
+        self.invalidate()
         for cell in self.maze.cell_list:
             self.draw(cell)
-        self.draw_buttons()
+        if with_buttons:
+            self.draw_buttons()
 
     def draw(self, cell, color=None):
         """
@@ -79,8 +103,18 @@ class UI:
         if color is None:
             color = self.get_color(cell)
         pos = self.calculate_pos(cell)
-        pygame.draw.rect(self.screen, color,
-                         pygame.Rect(pos.column, pos.row, self.rect_size.column, self.rect_size.row))
+        rect = pygame.Rect(pos.column, pos.row, self.rect_size.column, self.rect_size.row)
+        pygame.draw.rect(self.screen, color, rect)
+        self.dirty_rects.append(rect)
+
+    def cell_colors(self):
+        """
+            Its job is to list every color a cell can be drawn with, and the background
+        :return: list of the colors
+        """
+        return [self.background_color] + [self.get_color(structures.Cell(structures.Coords(0, 0), cell_type=typ.value))
+                                          for typ in structures.CellTypes] + \
+            [self.checking_color, self.visited_color, self.path_color]
 
     def change_color(self, cell, new_color):
         """
@@ -111,6 +145,7 @@ class UI:
             Its job is to reset all the cells of the maze
         :return: None
         """
+        self.playback = None
         for cell in self.maze.cell_list:
             typ = structures.CellTypes.Normal.value
             if cell.type in (structures.CellTypes.Source.value, structures.CellTypes.Target.value):
@@ -129,6 +164,7 @@ class UI:
         r = int(pos.row / (self.rect_size.row + self.margin))
         if c >= self.maze.n_columns or r >= self.maze.n_rows:
             return
+        self.playback = None  # the animated run is not of the edited maze
         cell = self.maze.get_cell(structures.Coords(r, c))
         if cell.type in (structures.CellTypes.Source.value, structures.CellTypes.Target.value):
             return
@@ -160,6 +196,12 @@ class UI:
         self.draw_bfs_algo_rb(True)
         self.draw_gbfs_algo_rb(True)
         self.draw_astar_algo_rb(True)
+        self.draw_jps_algo_rb(True)
+        self.draw_bibfs_algo_rb(True)
+        self.draw_biastar_algo_rb(True)
+        self.draw_dstar_algo_rb(True)
+        self.draw_dijkstra_algo_rb(True)
+        self.draw_hpa_algo_rb(True)
 
         text = self.font.render("Heuristics:", True, pygame.Color("Black"))
         self.screen.blit(text, (330, self.screen.get_height() - 8 * self.rect_size.row))
@@ -273,6 +315,100 @@ class UI:
         pygame.draw.circle(self.screen, self.background_color, center, radius)
         pygame.draw.circle(self.screen, pygame.Color("Black"), center, radius, 2)
 
+    def draw_jps_algo_rb(self, first=False):
+        """
+            Its job is drawing or redrawing Jump Point Search algorithm mode radio button
+        :param first: is it the first time to draw or it is redraw
+        :return: None
+        """
+        if first:
+            text = self.font.render("JPS", True, pygame.Color("Black"))
+            self.screen.blit(text, (self.reset_rect.left, self.jps_algo_rb[0][1] - 9))
+        center, radius = self.jps_algo_rb[0], self.jps_algo_rb[1]
+        pygame.draw.circle(self.screen, self.background_color, center, radius)
+        pygame.draw.circle(self.screen, pygame.Color("Black"), center, radius, 2)
+
+    def draw_bibfs_algo_rb(self, first=False):
+        """
+            Its job is drawing or redrawing bidirectional BFS algorithm mode radio button
+        :param first: is it the first time to draw or it is redraw
+        :return: None
+        """
+        if first:
+            text = self.font.render("Bi-BFS", True, pygame.Color("Black"))
+            self.screen.blit(text, (self.jps_algo_rb[0][0] + 20, self.bibfs_algo_rb[0][1] - 9))
+        center, radius = self.bibfs_algo_rb[0], self.bibfs_algo_rb[1]
+        pygame.draw.circle(self.screen, self.background_color, center, radius)
+        pygame.draw.circle(self.screen, pygame.Color("Black"), center, radius, 2)
+
+    def draw_biastar_algo_rb(self, first=False):
+        """
+            Its job is drawing or redrawing bidirectional A* algorithm mode radio button
+        :param first: is it the first time to draw or it is redraw
+        :return: None
+        """
+        if first:
+            text = self.font.render("Bi-A*", True, pygame.Color("Black"))
+            self.screen.blit(text, (self.bibfs_algo_rb[0][0] + 20, self.biastar_algo_rb[0][1] - 9))
+        center, radius = self.biastar_algo_rb[0], self.biastar_algo_rb[1]
+        pygame.draw.circle(self.screen, self.background_color, center, radius)
+        pygame.draw.circle(self.screen, pygame.Color("Black"), center, radius, 2)
+
+    def draw_dstar_algo_rb(self, first=False):
+        """
+            Its job is drawing or redrawing D* Lite algorithm mode radio button
+        :param first: is it the first time to draw or it is redraw
+        :return: None
+        """
+        if first:
+            text = self.font.render("D* Lite", True, pygame.Color("Black"))
+            self.screen.blit(text, (self.reset_rect.left, self.dstar_algo_rb[0][1] - 9))
+        center, radius = self.dstar_algo_rb[0], self.dstar_algo_rb[1]
+        pygame.draw.circle(self.screen, self.background_color, center, radius)
+        pygame.draw.circle(self.screen, pygame.Color("Black"), center, radius, 2)
+
+    def draw_dijkstra_algo_rb(self, first=False):
+        """
+            Its job is drawing or redrawing Dijkstra algorithm mode radio button
+        :param first: is it the first time to draw or it is redraw
+        :return: None
+        """
+        if first:
+            text = self.font.render("Dijkstra", True, pygame.Color("Black"))
+            self.screen.blit(text, (self.dstar_algo_rb[0][0] + 20, self.dijkstra_algo_rb[0][1] - 9))
+        center, radius = self.dijkstra_algo_rb[0], self.dijkstra_algo_rb[1]
+        pygame.draw.circle(self.screen, self.background_color, center, radius)
+        pygame.draw.circle(self.screen, pygame.Color("Black"), center, radius, 2)
+
+    def draw_hpa_algo_rb(self, first=False):
+        """
+            Its job is drawing or redrawing hierarchical A* algorithm mode radio button
+        :param first: is it the first time to draw or it is redraw
+        :return: None
+        """
+        if first:
+            text = self.font.render("HPA*", True, pygame.Color("Black"))
+            self.screen.blit(text, (self.dijkstra_algo_rb[0][0] + 20, self.hpa_algo_rb[0][1] - 9))
+        center, radius = self.hpa_algo_rb[0], self.hpa_algo_rb[1]
+        pygame.draw.circle(self.screen, self.background_color, center, radius)
+        pygame.draw.circle(self.screen, pygame.Color("Black"), center, radius, 2)
+
+    def draw_algo_rbs(self):
+        """
+            Its job is redrawing all algorithm mode radio buttons, so none of them is filled
+        :return: None
+        """
+        self.draw_dfs_algo_rb()
+        self.draw_bfs_algo_rb()
+        self.draw_gbfs_algo_rb()
+        self.draw_astar_algo_rb()
+        self.draw_jps_algo_rb()
+        self.draw_bibfs_algo_rb()
+        self.draw_biastar_algo_rb()
+        self.draw_dstar_algo_rb()
+        self.draw_dijkstra_algo_rb()
+        self.draw_hpa_algo_rb()
+
     def draw_chebyshev_heu_rb(self, first=False):
         """
             Its job is drawing or redrawing Chebyshev heuristic mode radio button
@@ -395,6 +531,54 @@ class UI:
         center, radius = self.astar_algo_rb[0], self.astar_algo_rb[1]
         pygame.draw.circle(self.screen, pygame.Color("Green"), center, radius)
 
+    def fill_jps_algo_rb(self):
+        """
+            Its job is to fill Jump Point Search algorithm mode radio button
+        :return: None
+        """
+        center, radius = self.jps_algo_rb[0], self.jps_algo_rb[1]
+        pygame.draw.circle(self.screen, pygame.Color("Green"), center, radius)
+
+    def fill_bibfs_algo_rb(self):
+        """
+            Its job is to fill bidirectional BFS algorithm mode radio button
+        :return: None
+        """
+        center, radius = self.bibfs_algo_rb[0], self.bibfs_algo_rb[1]
+        pygame.draw.circle(self.screen, pygame.Color("Green"), center, radius)
+
+    def fill_biastar_algo_rb(self):
+        """
+            Its job is to fill bidirectional A* algorithm mode radio button
+        :return: None
+        """
+        center, radius = self.biastar_algo_rb[0], self.biastar_algo_rb[1]
+        pygame.draw.circle(self.screen, pygame.Color("Green"), center, radius)
+
+    def fill_dstar_algo_rb(self):
+        """
+            Its job is to fill D* Lite algorithm mode radio button
+        :return: None
+        """
+        center, radius = self.dstar_algo_rb[0], self.dstar_algo_rb[1]
+        pygame.draw.circle(self.screen, pygame.Color("Green"), center, radius)
+
+    def fill_dijkstra_algo_rb(self):
+        """
+            Its job is to fill Dijkstra algorithm mode radio button
+        :return: None
+        """
+        center, radius = self.dijkstra_algo_rb[0], self.dijkstra_algo_rb[1]
+        pygame.draw.circle(self.screen, pygame.Color("Green"), center, radius)
+
+    def fill_hpa_algo_rb(self):
+        """
+            Its job is to fill hierarchical A* algorithm mode radio button
+        :return: None
+        """
+        center, radius = self.hpa_algo_rb[0], self.hpa_algo_rb[1]
+        pygame.draw.circle(self.screen, pygame.Color("Green"), center, radius)
+
     def fill_chebyshev_heu_rb(self):
         """
             Its job is to fill Chebyshev heuristic mode radio button
@@ -430,6 +614,7 @@ class UI:
         :return: updated draw_mode, updated algo_mode, updated heuristic, updated erase_mode, and is_run which shows whether the run button is clicked
         """
         is_run = False
+        self.invalidate()  # the buttons are redrawn
         if self.source_mode_rb[0][0] - self.source_mode_rb[1] <= pos.column <= self.source_mode_rb[0][0] + \
                 self.source_mode_rb[1] and self.source_mode_rb[0][1] - self.source_mode_rb[1] <= pos.row <= \
                 self.source_mode_rb[0][1] + self.source_mode_rb[1]:
@@ -466,37 +651,71 @@ class UI:
             1]:
             if algo_mode != AlgorithmTypes.DFS.value:
                 algo_mode = AlgorithmTypes.DFS.value
+                self.draw_algo_rbs()
                 self.fill_dfs_algo_rb()
-                self.draw_bfs_algo_rb()
-                self.draw_gbfs_algo_rb()
-                self.draw_astar_algo_rb()
         elif self.bfs_algo_rb[0][0] - self.bfs_algo_rb[1] <= pos.column <= self.bfs_algo_rb[0][0] + self.bfs_algo_rb[
             1] and self.bfs_algo_rb[0][1] - self.bfs_algo_rb[1] <= pos.row <= self.bfs_algo_rb[0][1] + self.bfs_algo_rb[
             1]:
             if algo_mode != AlgorithmTypes.BFS.value:
                 algo_mode = AlgorithmTypes.BFS.value
-                self.draw_dfs_algo_rb()
+                self.draw_algo_rbs()
                 self.fill_bfs_algo_rb()
-                self.draw_gbfs_algo_rb()
-                self.draw_astar_algo_rb()
         elif self.gbfs_algo_rb[0][0] - self.gbfs_algo_rb[1] <= pos.column <= self.gbfs_algo_rb[0][0] + \
                 self.gbfs_algo_rb[1] and self.gbfs_algo_rb[0][1] - self.gbfs_algo_rb[1] <= pos.row <= \
                 self.gbfs_algo_rb[0][1] + self.gbfs_algo_rb[1]:
             if algo_mode != AlgorithmTypes.GreedyBFS.value:
                 algo_mode = AlgorithmTypes.GreedyBFS.value
-                self.draw_dfs_algo_rb()
-                self.draw_bfs_algo_rb()
+                self.draw_algo_rbs()
                 self.fill_gbfs_algo_rb()
-                self.draw_astar_algo_rb()
         elif self.astar_algo_rb[0][0] - self.astar_algo_rb[1] <= pos.column <= self.astar_algo_rb[0][0] + \
                 self.astar_algo_rb[1] and self.astar_algo_rb[0][1] - self.astar_algo_rb[1] <= pos.row <= \
                 self.astar_algo_rb[0][1] + self.astar_algo_rb[1]:
             if algo_mode != AlgorithmTypes.A_star.value:
                 algo_mode = AlgorithmTypes.A_star.value
-                self.draw_dfs_algo_rb()
-                self.draw_bfs_algo_rb()
-                self.draw_gbfs_algo_rb()
+                self.draw_algo_rbs()
                 self.fill_astar_algo_rb()
+        elif self.jps_algo_rb[0][0] - self.jps_algo_rb[1] <= pos.column <= self.jps_algo_rb[0][0] + \
+                self.jps_algo_rb[1] and self.jps_algo_rb[0][1] - self.jps_algo_rb[1] <= pos.row <= \
+                self.jps_algo_rb[0][1] + self.jps_algo_rb[1]:
+            if algo_mode != AlgorithmTypes.JPS.value:
+                algo_mode = AlgorithmTypes.JPS.value
+                self.draw_algo_rbs()
+                self.fill_jps_algo_rb()
+        elif self.bibfs_algo_rb[0][0] - self.bibfs_algo_rb[1] <= pos.column <= self.bibfs_algo_rb[0][0] + \
+                self.bibfs_algo_rb[1] and self.bibfs_algo_rb[0][1] - self.bibfs_algo_rb[1] <= pos.row <= \
+                self.bibfs_algo_rb[0][1] + self.bibfs_algo_rb[1]:
+            if algo_mode != AlgorithmTypes.BidirectionalBFS.value:
+                algo_mode = AlgorithmTypes.BidirectionalBFS.value
+                self.draw_algo_rbs()
+                self.fill_bibfs_algo_rb()
+        elif self.biastar_algo_rb[0][0] - self.biastar_algo_rb[1] <= pos.column <= self.biastar_algo_rb[0][0] + \
+                self.biastar_algo_rb[1] and self.biastar_algo_rb[0][1] - self.biastar_algo_rb[1] <= pos.row <= \
+                self.biastar_algo_rb[0][1] + self.biastar_algo_rb[1]:
+            if algo_mode != AlgorithmTypes.BidirectionalA_star.value:
+                algo_mode = AlgorithmTypes.BidirectionalA_star.value
+                self.draw_algo_rbs()
+                self.fill_biastar_algo_rb()
+        elif self.dstar_algo_rb[0][0] - self.dstar_algo_rb[1] <= pos.column <= self.dstar_algo_rb[0][0] + \
+                self.dstar_algo_rb[1] and self.dstar_algo_rb[0][1] - self.dstar_algo_rb[1] <= pos.row <= \
+                self.dstar_algo_rb[0][1] + self.dstar_algo_rb[1]:
+            if algo_mode != AlgorithmTypes.DStarLite.value:
+                algo_mode = AlgorithmTypes.DStarLite.value
+                self.draw_algo_rbs()
+                self.fill_dstar_algo_rb()
+        elif self.dijkstra_algo_rb[0][0] - self.dijkstra_algo_rb[1] <= pos.column <= self.dijkstra_algo_rb[0][0] + \
+                self.dijkstra_algo_rb[1] and self.dijkstra_algo_rb[0][1] - self.dijkstra_algo_rb[1] <= pos.row <= \
+                self.dijkstra_algo_rb[0][1] + self.dijkstra_algo_rb[1]:
+            if algo_mode != AlgorithmTypes.Dijkstra.value:
+                algo_mode = AlgorithmTypes.Dijkstra.value
+                self.draw_algo_rbs()
+                self.fill_dijkstra_algo_rb()
+        elif self.hpa_algo_rb[0][0] - self.hpa_algo_rb[1] <= pos.column <= self.hpa_algo_rb[0][0] + \
+                self.hpa_algo_rb[1] and self.hpa_algo_rb[0][1] - self.hpa_algo_rb[1] <= pos.row <= \
+                self.hpa_algo_rb[0][1] + self.hpa_algo_rb[1]:
+            if algo_mode != AlgorithmTypes.HierarchicalA_star.value:
+                algo_mode = AlgorithmTypes.HierarchicalA_star.value
+                self.draw_algo_rbs()
+                self.fill_hpa_algo_rb()
         elif self.chebyshev_heu_rb[0][0] - self.chebyshev_heu_rb[1] <= pos.column <= self.chebyshev_heu_rb[0][0] + \
                 self.chebyshev_heu_rb[1] and self.chebyshev_heu_rb[0][1] - self.chebyshev_heu_rb[1] <= pos.row <= \
                 self.chebyshev_heu_rb[0][1] + self.chebyshev_heu_rb[1]:
@@ -544,6 +763,7 @@ class UI:
             self.draw(cell)
         pygame.draw.rect(self.screen, self.background_color,
                          pygame.Rect(800, self.screen.get_height() - 8 * self.rect_size.row, 230, 110))
+        self.invalidate()
 
     def draw_result(self, res, t):
         """
@@ -552,13 +772,12 @@ class UI:
         :param t: CPU time of execution
         :return: None
         """
+        self.invalidate()
         path = res.get("path")
         d = res.get("total_distance")
         n_checked_cells = res.get("checked_cells_no")
         if path is not None:
-            for cell in path:
-                if cell.type not in (structures.CellTypes.Source.value, structures.CellTypes.Target.value):
-                    self.draw(cell, pygame.Color("Darkgreen"))
+            self.draw_path(path)
             d = str(int(d))
         else:
             d = "Not Reachable!"
@@ -573,6 +792,16 @@ class UI:
         memory_str = self.font.render(f"Memory: {memory}", True, pygame.Color("Black"))
         self.screen.blit(memory_str, (800, self.screen.get_height() - 2 * self.rect_size.row))
 
+    def draw_path(self, path):
+        """
+            Its job is to draw the cells of a found path
+        :param path: list of the cells of the path
+        :return: None
+        """
+        for cell in path:
+            if cell.type not in (structures.CellTypes.Source.value, structures.CellTypes.Target.value):
+                self.draw(cell, self.path_color)
+
     def draw_checking_cell(self, cell):
         """
             Its job is to draw the cells which are in the queue of checking
@@ -581,7 +810,7 @@ class UI:
         """
         if cell.type in (structures.CellTypes.Source.value, structures.CellTypes.Target.value):
             return
-        self.draw(cell, pygame.Color(135, 197, 233, 255))
+        self.draw(cell, self.checking_color)
 
     def draw_visited_cell(self, cell):
         """
@@ -591,9 +820,78 @@ class UI:
         """
         if cell.type in (structures.CellTypes.Source.value, structures.CellTypes.Target.value):
             return
-        self.draw(cell, pygame.Color(102, 255, 178, 255))
+        self.draw(cell, self.visited_color)
+
+    def invalidate(self):
+        """
+            Its job is to mark the whole screen to be shown in the next frame, for the drawings which are not cells
+            like buttons and texts
+        :return: None
+        """
+        self.dirty_rects.append(self.screen.get_rect())
+
+    def present(self):
+        """
+            Its job is to show the parts of the screen drawn since the last frame and wait for the next frame, so the
+            loop calling it runs at the frame rate instead of spinning
+        :return: None
+        """
+        if self.dirty_rects:
+            if any(rect == self.screen.get_rect() for rect in self.dirty_rects):
+                pygame.display.flip()
+            else:
+                pygame.display.update(self.dirty_rects)
+            self.dirty_rects = []
+        self.clock.tick(self.fps)
+
+    def change_speed(self, step):
+        """
+            Its job is to move the speed of replaying to a faster or slower one of self.speeds
+        :param step: 1 for the next faster speed and -1 for the next slower one
+        :return: None
+        """
+        index = min(max(self.speeds.index(self.speed) + step, 0), len(self.speeds) - 1)
+        self.speed = self.speeds[index]
+        self.show_speed()
+
+    def show_speed(self):
+        """
+            Its job is to show the speed of replaying in the caption of the window
+        :return: None
+        """
+        speed = "instant" if self.speed == INSTANT else f"{self.speed} cells per frame"
+        pygame.display.set_caption(f"Maze Problem - speed: {speed} (up/down to change)")
 
-        start = time.time()
-        while time.time() - start < self.delay:
-            pass
-        pygame.display.flip()
+    def show_trace(self, trace):
+        """
+            Its job is to clean the display and start animating a recorded run, which is drawn frame by frame by
+            play_frame and gets its results drawn at the end
+        :param trace: the Trace of the run
+        :return: None
+        """
+        self.clean_display()
+        self.playback = (trace, trace.cells(self.maze))
+
+    def play_frame(self):
+        """
+            Its job is to draw the cells of the next frame of the animated run, self.speed events or all of them for
+            instant speed, and the results of the run after its last event
+        :return: True if a run is being animated and False otherwise
+        """
+        if self.playback is None:
+            return False
+        trace, events = self.playback
+        n_events = len(trace.events) if self.speed == INSTANT else self.speed
+        n_drawn_events = 0
+        for cell, kind in itertools.islice(events, n_events):
+            if kind == event_trace.VISITED:
+                self.draw_visited_cell(cell)
+            else:
+                self.draw_checking_cell(cell)
+            n_drawn_events += 1
+        if n_drawn_events < n_events:  # the run is over
+            self.playback = None
+            res = dict(trace.result)
+            res["path"] = trace.path(self.maze)
+            self.draw_result(res, res.get("time"))
+        return True
@@ -1,3 +1,8 @@
+max_cost = 255  # the costs of the cells are kept in 1 byte, from 1 to max_cost
+connectivities = [4, 8]  # number of the moves from a cell, straight ones or straight and diagonal ones
+# rules of the diagonal moves: strict needs both cells next to the move open, cut needs one of them and squeeze none
+corner_rules = ["strict", "cut", "squeeze"]
+
 
 def is_valid(dictionary):
     """
@@ -34,4 +39,33 @@ def is_valid(dictionary):
     for obstacle_coords in obstacles_coords:
         if not (0 <= obstacle_coords[0] < n_rows and 0 <= obstacle_coords[1] < n_columns):
             return False
+    if dictionary.get("connectivity", 4) not in connectivities:
+        print(f"Connectivity must be one of {connectivities}! Run it again.")
+        return False
+    if dictionary.get("corner_rule", "strict") not in corner_rules:
+        print(f"Corner rule must be one of {corner_rules}! Run it again.")
+        return False
+    return are_valid_costs(dictionary.get("costs", []), n_rows, n_columns)
+
+
+def are_valid_costs(costs, n_rows, n_columns):
+    """
+        Its job is to validate the costs of the cells of a test, a list of [row, column, cost] for the cells which
+        do not cost 1
+    :param costs: the list of the costs
+    :param n_rows: number of rows of the test
+    :param n_columns: number of columns of the test
+    :return: True if the costs are valid and False otherwise.
+    """
+    for cell_cost in costs:
+        if not isinstance(cell_cost, list) or len(cell_cost) != 3 or \
+                [val for val in cell_cost if not isinstance(val, int)]:
+            print("Costs must be lists of three integers (row, column and cost)! Run it again.")
+            return False
+        row, column, cost = cell_cost
+        if not (0 <= row < n_rows and 0 <= column < n_columns):
+            return False
+        if not 1 <= cost <= max_cost:
+            print(f"Costs must be from 1 to {max_cost}! Run it again.")
+            return False
     return True